@@ -6,12 +6,13 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Any
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
+from typing import Dict, Any, Optional
 from agents.trace_agent import get_trace_agent
+from services.feature_store import get_feature_store
+from services.hparam_search import load_best_config
+from services.model_registry import ModelRegistry, data_fingerprint, get_model_registry
+from services.render_queue import RenderHandle, get_render_queue
+from services.synthetic_data import SyntheticDataGenerator
 
 # Conditional import for XGBoost
 try:
@@ -21,12 +22,47 @@ except ImportError:
     HAS_XGBOOST = False
 
 
+def _load_registered_model(files: Dict[str, str], meta: Dict[str, Any]):
+    """Model registry loader for "xgboost": the regressor saved with save_model()."""
+    model = XGBRegressor()
+    model.load_model(files["model"])
+    return model
+
+
+if HAS_XGBOOST:
+    get_model_registry().register_loader("xgboost", _load_registered_model)
+
+
 class ForecastAgent:
     """Forecast order volume using ML."""
     
-    def __init__(self):
+    FEATURE_COLS = [
+        'hour_of_day', 'day_of_week', 'is_weekend',
+        'is_lunch', 'is_dinner', 'rolling_7d_avg',
+        'rolling_24h_avg', 'precip_prob', 'is_rain'
+    ]
+    
+    # models/hparams/xgboost.json (written by the search) overrides these
+    XGB_PARAMS = {
+        'n_estimators': 100,
+        'max_depth': 5,
+        'learning_rate': 0.1,
+        'random_state': 42
+    }
+    
+    MODEL_FILE = "artifacts/xgboost_model.json"
+    REGISTRY_NAME = "xgboost"
+    
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        """
+        Args:
+            registry: Where trained models are registered and reused from
+                      (default: the production registry)
+        """
         self.trace = get_trace_agent()
         self.model = None
+        self.features = get_feature_store()
+        self.registry = registry or get_model_registry()
     
     def run(self) -> Dict[str, Any]:
         """Execute forecast workflow."""
@@ -90,29 +126,24 @@ class ForecastAgent:
             tomorrow = datetime.now() + timedelta(days=1)
             hours = range(10, 23)  # 10 AM to 10 PM
             
-            predictions = []
-            for hour in hours:
-                pred_time = tomorrow.replace(hour=hour, minute=0, second=0)
-                
-                # Create feature row
-                feature_row = self._create_prediction_features(
-                    pred_time,
-                    df_orders,
-                    df_weather
-                )
-                
-                # Predict
-                if self.model:
-                    pred = self.model.predict([feature_row])[0]
-                else:
-                    # Fallback: rolling average
-                    pred = df_features['orders'].mean()
-                
-                predictions.append({
-                    "hour": hour,
+            pred_times = [tomorrow.replace(hour=hour, minute=0, second=0, microsecond=0) for hour in hours]
+            
+            # One feature matrix and one model call for all hours
+            df_pred_features = self._create_prediction_features(pred_times, df_orders, df_weather)
+            if self.model:
+                preds = self.model.predict(df_pred_features[self.FEATURE_COLS].values)
+            else:
+                # Fallback: rolling average
+                preds = np.full(len(pred_times), df_features['orders'].mean())
+            
+            predictions = [
+                {
+                    "hour": pred_time.hour,
                     "datetime": pred_time.isoformat(),
-                    "predicted_orders": round(pred, 1)
-                })
+                    "predicted_orders": round(float(pred), 1)
+                }
+                for pred_time, pred in zip(pred_times, preds)
+            ]
             
             df_predictions = pd.DataFrame(predictions)
             
@@ -128,8 +159,9 @@ class ForecastAgent:
             )
             
             plot_file = "artifacts/forecast_plot.png"
-            self._create_forecast_plot(df_predictions, plot_file)
+            render = self._create_forecast_plot(df_predictions, plot_file)
             results["artifacts"].append(plot_file)
+            results["renders"] = [render.to_dict()]
             
             # Identify peak hour
             peak_hour = df_predictions.loc[df_predictions['predicted_orders'].idxmax()]
@@ -161,92 +193,29 @@ class ForecastAgent:
             return results
     
     def _generate_synthetic_orders(self, days: int = 60) -> pd.DataFrame:
-        """Generate synthetic POS data with weekday/lunch patterns."""
-        np.random.seed(42)
-        
-        data = []
-        start_date = datetime.now() - timedelta(days=days)
-        
-        for day in range(days):
-            current_date = start_date + timedelta(days=day)
-            day_of_week = current_date.weekday()  # 0=Monday, 6=Sunday
-            
-            for hour in range(10, 23):  # 10 AM to 10 PM
-                # Base pattern
-                base = 20
-                
-                # Lunch spike (12-2 PM)
-                if 12 <= hour <= 14:
-                    base += 15
-                
-                # Dinner spike (6-8 PM)
-                if 18 <= hour <= 20:
-                    base += 20
-                
-                # Weekend boost
-                if day_of_week >= 5:  # Sat/Sun
-                    base *= 1.3
-                
-                # Weekday lunch boost
-                if day_of_week < 5 and 12 <= hour <= 13:
-                    base *= 1.2
-                
-                # Random noise
-                orders = int(base + np.random.normal(0, 5))
-                orders = max(5, orders)  # Minimum 5 orders
-                
-                data.append({
-                    "timestamp": current_date.replace(hour=hour, minute=0, second=0),
-                    "orders": orders
-                })
-        
-        return pd.DataFrame(data)
+        """Generate synthetic POS data (10 AM - 10 PM) with weekday/lunch patterns."""
+        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        generator = SyntheticDataGenerator(days=days, start=start, seed=42, base_orders=25,
+                                           open_hour=10, close_hour=23)
+        return generator.hourly_orders()[['timestamp', 'orders']]
     
     def _create_features(
         self,
         df_orders: pd.DataFrame,
         df_weather: pd.DataFrame = None
     ) -> pd.DataFrame:
-        """Create ML features from orders and weather."""
-        df = df_orders.copy()
-        
-        # Time features
-        df['hour_of_day'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-        df['is_lunch'] = ((df['hour_of_day'] >= 12) & (df['hour_of_day'] <= 14)).astype(int)
-        df['is_dinner'] = ((df['hour_of_day'] >= 18) & (df['hour_of_day'] <= 20)).astype(int)
+        """
+        Create ML features from orders and weather.
         
-        # Rolling features
-        df = df.sort_values('timestamp')
-        df['rolling_7d_avg'] = df['orders'].rolling(window=7*13, min_periods=1).mean()
-        df['rolling_24h_avg'] = df['orders'].rolling(window=13, min_periods=1).mean()
-        
-        # Weather features (if available)
-        if df_weather is not None:
-            df_weather['hour'] = pd.to_datetime(df_weather['time']).dt.hour
-            # Simple merge on hour (in production, would use proper datetime matching)
-            df = df.merge(
-                df_weather[['hour', 'precip_prob', 'is_rain']],
-                left_on='hour_of_day',
-                right_on='hour',
-                how='left'
-            )
-            df['precip_prob'] = df['precip_prob'].fillna(0)
-            df['is_rain'] = df['is_rain'].fillna(0)
-        else:
-            df['precip_prob'] = 0
-            df['is_rain'] = 0
-        
-        return df
+        Served by the feature store: one row per hour, weather joined as-of the
+        hour, rolling averages over earlier hours only. Only hours added since
+        the last run are computed.
+        """
+        return self.features.training_frame(df_orders, df_weather)
     
     def _train_model(self, df: pd.DataFrame):
         """Train XGBoost model or fallback to baseline."""
-        feature_cols = [
-            'hour_of_day', 'day_of_week', 'is_weekend',
-            'is_lunch', 'is_dinner', 'rolling_7d_avg',
-            'rolling_24h_avg', 'precip_prob', 'is_rain'
-        ]
+        feature_cols = self.FEATURE_COLS
         
         # Remove rows with NaN
         df_clean = df.dropna(subset=feature_cols + ['orders'])
@@ -254,88 +223,47 @@ class ForecastAgent:
         if HAS_XGBOOST and len(df_clean) > 50:
             X = df_clean[feature_cols].values
             y = df_clean['orders'].values
+            params = {**self.XGB_PARAMS, **load_best_config("xgboost")}
             
-            self.model = XGBRegressor(
-                n_estimators=100,
-                max_depth=5,
-                learning_rate=0.1,
-                random_state=42
-            )
+            # Reuse the promoted model when data and parameters are unchanged
+            fingerprint = data_fingerprint(df_clean[feature_cols + ['orders']])
+            registry = self.registry
+            current = registry.current(self.REGISTRY_NAME)
+            if current and current["data_fingerprint"] == fingerprint and current["params"] == params:
+                try:
+                    self.model = registry.get(self.REGISTRY_NAME)
+                    return
+                except (KeyError, ValueError, OSError) as e:
+                    print(f"[FORECAST] Registered model unavailable, retraining: {e}")
+            
+            self.model = XGBRegressor(**params)
             self.model.fit(X, y)
+            
+            os.makedirs(os.path.dirname(self.MODEL_FILE), exist_ok=True)
+            self.model.save_model(self.MODEL_FILE)
+            registry.register(
+                self.REGISTRY_NAME, {"model": self.MODEL_FILE},
+                metrics={"train_mae": float(np.mean(np.abs(self.model.predict(X) - y))), "samples": len(y)},
+                data_fingerprint=fingerprint, params=params, instance=self.model
+            )
         else:
             # Fallback: no model, use rolling average
             self.model = None
     
     def _create_prediction_features(
         self,
-        pred_time: datetime,
+        pred_times: list,
         df_orders: pd.DataFrame,
         df_weather: pd.DataFrame = None
-    ) -> list:
-        """Create feature vector for a prediction time."""
-        hour_of_day = pred_time.hour
-        day_of_week = pred_time.weekday()
-        is_weekend = 1 if day_of_week >= 5 else 0
-        is_lunch = 1 if 12 <= hour_of_day <= 14 else 0
-        is_dinner = 1 if 18 <= hour_of_day <= 20 else 0
-        
-        # Rolling averages from historical data
-        rolling_7d_avg = df_orders['orders'].tail(7*13).mean()
-        rolling_24h_avg = df_orders['orders'].tail(13).mean()
-        
-        # Weather features
-        precip_prob = 0
-        is_rain = 0
-        if df_weather is not None:
-            weather_row = df_weather[df_weather['hour'] == hour_of_day]
-            if not weather_row.empty:
-                precip_prob = weather_row.iloc[0]['precip_prob']
-                is_rain = weather_row.iloc[0]['is_rain']
-        
-        return [
-            hour_of_day, day_of_week, is_weekend,
-            is_lunch, is_dinner, rolling_7d_avg,
-            rolling_24h_avg, precip_prob, is_rain
-        ]
+    ) -> pd.DataFrame:
+        """Create feature rows for all prediction times at once."""
+        return self.features.prediction_frame(pred_times, df_orders, df_weather)
     
-    def _create_forecast_plot(self, df_predictions: pd.DataFrame, output_file: str):
-        """Create visualization of forecast."""
-        plt.figure(figsize=(12, 6))
-        sns.set_style("whitegrid")
-        
-        plt.plot(
-            df_predictions['hour'],
-            df_predictions['predicted_orders'],
-            marker='o',
-            linewidth=2,
-            markersize=8,
-            color='#FF6B35'
+    def _create_forecast_plot(self, df_predictions: pd.DataFrame, output_file: str) -> RenderHandle:
+        """Queue the forecast chart for background rendering (services.plot_renderers)."""
+        return get_render_queue().submit(
+            "forecast_plot", {"predictions": df_predictions.to_dict(orient="list")}, output_file
         )
-        
-        # Highlight peak
-        peak_idx = df_predictions['predicted_orders'].idxmax()
-        peak_row = df_predictions.iloc[peak_idx]
-        plt.scatter(
-            peak_row['hour'],
-            peak_row['predicted_orders'],
-            s=200,
-            color='#FFD700',
-            edgecolors='black',
-            linewidths=2,
-            zorder=5,
-            label='Peak Hour'
-        )
-        
-        plt.xlabel('Hour of Day', fontsize=12, fontweight='bold')
-        plt.ylabel('Predicted Orders', fontsize=12, fontweight='bold')
-        plt.title('Tomorrow\'s Order Volume Forecast', fontsize=14, fontweight='bold')
-        plt.xticks(df_predictions['hour'])
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        
-        plt.tight_layout()
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
 
 
 def run_forecast_agent() -> Dict[str, Any]:
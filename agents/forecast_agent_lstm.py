@@ -4,15 +4,18 @@ Predicts order volume AND expected revenue using deep learning.
 """
 import os
 import json
+import pickle
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Any
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
+from typing import Dict, Any, List, Optional
 from agents.trace_agent import get_trace_agent
+from services.feature_store import calendar_features, get_feature_store
+from services.holt_winters import CONFIDENCE_Z, forecast_series
+from services.model_registry import ModelRegistry, data_fingerprint, get_model_registry
+from services.render_queue import RenderHandle, get_render_queue
+from services.sequence_pipeline import sliding_windows, split_indices, window_dataset
+from services.synthetic_data import SyntheticDataGenerator
 
 # Conditional imports for deep learning
 try:
@@ -28,6 +31,18 @@ except ImportError:
     print("[WARN] TensorFlow not available, using XGBoost fallback")
 
 
+def _load_registered_model(files: Dict[str, str], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Model registry loader for "agent_lstm": the Keras model, its scaler and held-out error."""
+    with open(files["scaler"], 'rb') as f:
+        scaler = pickle.load(f)
+    return {"model": load_model(files["model"], compile=False), "scaler": scaler,
+            "residual_std": meta["metrics"].get("residual_std")}
+
+
+if HAS_TENSORFLOW:
+    get_model_registry().register_loader("agent_lstm", _load_registered_model)
+
+
 class ForecastAgentLSTM:
     """Forecast order volume and revenue using LSTM from notebook."""
     
@@ -40,14 +55,26 @@ class ForecastAgentLSTM:
     EPOCHS = 40
     BATCH_SIZE = 32
     
+    MODEL_FILE = "artifacts/lstm_sales_model.h5"
+    SCALER_FILE = "artifacts/lstm_sales_scaler.pkl"
+    REGISTRY_NAME = "agent_lstm"
+    
     # Revenue constants
     AVG_ORDER_VALUE = 18.50  # Average order value in dollars
     
-    def __init__(self):
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        """
+        Args:
+            registry: Where trained models are registered and reused from
+                      (default: the production registry)
+        """
         self.trace = get_trace_agent()
         self.model = None
         self.scaler = None
         self.feature_columns = None
+        self.residual_std = None  # Held-out LSTM error in orders, for the confidence band
+        self.features = get_feature_store()
+        self.registry = registry or get_model_registry()
     
     def run(self) -> Dict[str, Any]:
         """Execute LSTM forecast workflow."""
@@ -94,31 +121,30 @@ class ForecastAgentLSTM:
                 
                 self._train_lstm_model(df_features)
             else:
-                # Fallback to simple baseline
+                # Fallback to the Holt-Winters baseline
                 self.trace.log(
                     agent="ForecastAgentLSTM",
-                    action="TensorFlow unavailable, using rolling baseline"
+                    action="TensorFlow unavailable, using Holt-Winters baseline"
                 )
             
             # Step 4: Predict tomorrow 10:00-22:00
             tomorrow = datetime.now() + timedelta(days=1)
             hours = range(10, 23)  # 10 AM to 10 PM
+            pred_times = [tomorrow.replace(hour=hour, minute=0, second=0) for hour in hours]
+            
+            # Predict with LSTM (all hours in one batch)
+            if self.model and HAS_TENSORFLOW:
+                all_sales, all_lower, all_upper = self._predict_with_lstm(pred_times, df_features)
+            else:
+                # Fallback: Holt-Winters over the same opening hours
+                baseline = forecast_series(df_features.set_index('timestamp')['orders'], len(pred_times))
+                all_sales, all_lower, all_upper = baseline['forecast'], baseline['lower'], baseline['upper']
             
             predictions = []
-            for hour in hours:
-                pred_time = tomorrow.replace(hour=hour, minute=0, second=0)
-                
-                # Predict with LSTM
-                if self.model and HAS_TENSORFLOW:
-                    pred_sales, lower_ci, upper_ci = self._predict_with_lstm(
-                        pred_time,
-                        df_features
-                    )
-                else:
-                    # Fallback: rolling average
-                    pred_sales = df_features['orders'].mean()
-                    lower_ci = pred_sales * 0.9
-                    upper_ci = pred_sales * 1.1
+            for hour, pred_time, pred_sales, lower_ci, upper_ci in zip(
+                hours, pred_times, all_sales, all_lower, all_upper
+            ):
+                pred_sales, lower_ci, upper_ci = float(pred_sales), float(lower_ci), float(upper_ci)
                 
                 # Calculate revenue
                 pred_revenue = pred_sales * self.AVG_ORDER_VALUE
@@ -150,8 +176,9 @@ class ForecastAgentLSTM:
             )
             
             plot_file = "artifacts/forecast_plot.png"
-            self._create_lstm_forecast_plot(df_predictions, plot_file)
+            render = self._create_lstm_forecast_plot(df_predictions, plot_file)
             results["artifacts"].append(plot_file)
+            results["renders"] = [render.to_dict()]
             
             # Identify peak hour
             peak_hour_idx = df_predictions['predicted_orders'].idxmax()
@@ -192,63 +219,20 @@ class ForecastAgentLSTM:
             return results
     
     def _generate_synthetic_orders(self, days: int = 60) -> pd.DataFrame:
-        """Generate synthetic POS data with realistic patterns."""
-        np.random.seed(42)
-        
-        data = []
-        start_date = datetime.now() - timedelta(days=days)
-        
-        for day in range(days):
-            current_date = start_date + timedelta(days=day)
-            day_of_week = current_date.weekday()
-            
-            for hour in range(10, 23):
-                # Base pattern
-                base = 20
-                
-                # Lunch spike (12-2 PM)
-                if 12 <= hour <= 14:
-                    base += 15
-                
-                # Dinner spike (6-8 PM)
-                if 18 <= hour <= 20:
-                    base += 20
-                
-                # Weekend boost
-                if day_of_week >= 5:
-                    base *= 1.3
-                
-                # Weather effect (random)
-                weather_factor = np.random.choice([0.85, 1.0, 1.15], p=[0.2, 0.6, 0.2])
-                base *= weather_factor
-                
-                # Random noise
-                orders = int(base + np.random.normal(0, 5))
-                orders = max(5, orders)
-                
-                data.append({
-                    "timestamp": current_date.replace(hour=hour, minute=0, second=0),
-                    "orders": orders,
-                    "weather": np.random.uniform(0.3, 0.9),  # Weather index
-                    "traffic": np.random.uniform(0.4, 0.95)  # Traffic index
-                })
-        
-        return pd.DataFrame(data)
+        """Generate synthetic POS data (10 AM - 10 PM) with lunch/dinner, weekday and weather patterns."""
+        start = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        generator = SyntheticDataGenerator(days=days, start=start, seed=42, base_orders=25,
+                                           open_hour=10, close_hour=23)
+        return generator.hourly_orders()
     
     def _create_lstm_features(self, df_orders: pd.DataFrame) -> pd.DataFrame:
-        """Create features using cyclical encoding from notebook."""
-        df = df_orders.copy()
-        
-        # Cyclical time encoding (from LSTM Model.ipynb)
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+        """
+        Create features using cyclical encoding from notebook.
         
-        # Cyclical encoding for periodicity
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-        df['dow_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-        df['dow_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
+        Hourly rows and calendar/cyclical encodings come from the feature store
+        (only new hours are materialized), shared with ForecastAgent.
+        """
+        df = self.features.training_frame(df_orders)
         
         # Weather and traffic if available
         if 'weather' not in df.columns:
@@ -266,6 +250,20 @@ class ForecastAgentLSTM:
             'dow_sin', 'dow_cos', 'is_weekend'
         ]
         
+        # Reuse the promoted model when it was trained on exactly this data
+        fingerprint = data_fingerprint(df[self.feature_columns])
+        registry = self.registry
+        current = registry.current(self.REGISTRY_NAME)
+        if current and current["data_fingerprint"] == fingerprint:
+            try:
+                loaded = registry.get(self.REGISTRY_NAME)
+                self.model, self.scaler, self.residual_std = (
+                    loaded["model"], loaded["scaler"], loaded["residual_std"])
+                print(f"[LSTM] Training data unchanged, using registered model v{current['version']}")
+                return
+            except (KeyError, ValueError, OSError) as e:
+                print(f"[LSTM] Registered model unavailable, retraining: {e}")
+        
         # Prepare data
         data_array = df[self.feature_columns].values
         
@@ -280,10 +278,9 @@ class ForecastAgentLSTM:
             print("[WARN] Insufficient data for LSTM training")
             return
         
-        # Train/test split
-        split = int(0.8 * len(X))
-        X_train, X_test = X[:split], X[split:]
-        y_train, y_test = y[:split], y[split:]
+        # Train/test split, last 10% of train held out for validation
+        train_idx, val_idx, test_idx = split_indices(len(X))
+        y_test = y[test_idx]
         
         # Build LSTM model (exact architecture from notebook)
         self.model = Sequential([
@@ -304,221 +301,127 @@ class ForecastAgentLSTM:
             restore_best_weights=True
         )
         
-        print(f"[LSTM] Training model with {len(X_train)} samples...")
+        print(f"[LSTM] Training model with {len(train_idx)} samples...")
         
+        lookback = self.LOOKBACK_HOURS
         history = self.model.fit(
-            X_train, y_train,
-            validation_split=0.1,
+            window_dataset(scaled_data, train_idx, lookback, self.BATCH_SIZE),
+            validation_data=window_dataset(scaled_data, val_idx, lookback, self.BATCH_SIZE, shuffle=False),
             epochs=self.EPOCHS,
-            batch_size=self.BATCH_SIZE,
             callbacks=[early_stop],
             verbose=0
         )
         
         # Evaluate
-        preds = self.model.predict(X_test, verbose=0).flatten()
+        preds = self.model.predict(
+            window_dataset(scaled_data, test_idx, lookback, self.BATCH_SIZE, shuffle=False), verbose=0
+        ).flatten()
         mae = mean_absolute_error(y_test, preds)
         rmse = np.sqrt(mean_squared_error(y_test, preds))
         
+        # Held-out error in orders (MinMaxScaler: scaled = orders * scale_ + min_)
+        self.residual_std = float(np.std(y_test - preds) / self.scaler.scale_[0])
+        
         print(f"[LSTM] Model trained - MAE: {mae:.3f}, RMSE: {rmse:.3f}")
         
-        # Save model
-        model_file = "artifacts/lstm_sales_model.h5"
-        self.model.save(model_file)
-        print(f"[LSTM] Model saved to {model_file}")
+        # Save model and scaler, then register them as a new version
+        self.model.save(self.MODEL_FILE)
+        with open(self.SCALER_FILE, 'wb') as f:
+            pickle.dump(self.scaler, f)
+        print(f"[LSTM] Model saved to {self.MODEL_FILE}")
+        registry.register(
+            self.REGISTRY_NAME, {"model": self.MODEL_FILE, "scaler": self.SCALER_FILE},
+            metrics={"mae": float(mae), "rmse": float(rmse), "residual_std": self.residual_std,
+                     "epochs_run": len(history.history['loss'])},
+            data_fingerprint=fingerprint,
+            params={"lookback": lookback, "units_1": self.LSTM_UNITS_1, "units_2": self.LSTM_UNITS_2,
+                    "dense_units": self.DENSE_UNITS, "dropout": self.DROPOUT_RATE,
+                    "epochs": self.EPOCHS, "batch_size": self.BATCH_SIZE},
+            instance={"model": self.model, "scaler": self.scaler, "residual_std": self.residual_std}
+        )
     
     def _create_sequences(self, data: np.ndarray, lookback: int):
-        """Create sequences for LSTM (from notebook)."""
-        X, y = [], []
-        for i in range(lookback, len(data)):
-            X.append(data[i-lookback:i, :])
-            y.append(data[i, 0])  # target: orders (first column)
-        return np.array(X), np.array(y)
+        """Create sequences for LSTM (from notebook) as zero-copy views."""
+        return sliding_windows(data, lookback)  # target: orders (first column)
+    
+    def _load_weather_by_hour(self) -> Dict[int, float]:
+        """Weather index per hour of day from the weather agent's features, read once."""
+        weather_file = "artifacts/weather_features.csv"
+        if not os.path.exists(weather_file):
+            return {}
+        
+        try:
+            weather_df = pd.read_csv(weather_file)
+            weather_df['time'] = pd.to_datetime(weather_df['time'])
+            first_per_hour = weather_df.groupby(weather_df['time'].dt.hour)['precip_prob'].first()
+            # Convert precipitation probability to weather index (higher precip = lower index)
+            return (1.0 - first_per_hour / 100).to_dict()
+        except Exception as e:
+            print(f"[WARN] Could not load weather: {e}")
+            return {}
     
     def _predict_with_lstm(
         self,
-        pred_time: datetime,
+        pred_times: List[datetime],
         df_historical: pd.DataFrame
     ) -> tuple:
         """
-        Predict with LSTM and calculate 90% confidence interval (from notebook).
+        Predict every hour in one batched LSTM call, with 90% confidence intervals (from notebook).
+        
+        Each hour's window is the last 23 historical hours plus that hour's feature row.
         
         Returns:
-            (prediction, lower_ci, upper_ci)
+            (predictions, lower_ci, upper_ci) arrays aligned with pred_times
         """
-        # Create feature row for prediction
-        feature_row = {
-            'orders': 0,  # Unknown, will be filled from context
-            'weather': 0.6,  # Default, can be updated from weather agent
-            'traffic': 0.7,  # Default
-            'hour_sin': np.sin(2 * np.pi * pred_time.hour / 24),
-            'hour_cos': np.cos(2 * np.pi * pred_time.hour / 24),
-            'dow_sin': np.sin(2 * np.pi * pred_time.weekday() / 7),
-            'dow_cos': np.cos(2 * np.pi * pred_time.weekday() / 7),
-            'is_weekend': 1 if pred_time.weekday() >= 5 else 0
-        }
-        
-        # Load weather if available
-        weather_file = "artifacts/weather_features.csv"
-        if os.path.exists(weather_file):
-            try:
-                weather_df = pd.read_csv(weather_file)
-                weather_df['time'] = pd.to_datetime(weather_df['time'])
-                weather_row = weather_df[weather_df['time'].dt.hour == pred_time.hour]
-                if not weather_row.empty:
-                    # Convert precipitation probability to weather index
-                    precip_prob = weather_row.iloc[0]['precip_prob']
-                    feature_row['weather'] = 1.0 - (precip_prob / 100)  # Higher precip = lower index
-            except Exception as e:
-                print(f"[WARN] Could not load weather: {e}")
-        
-        # Get last 24 hours of historical data for sequence
-        recent_data = df_historical.tail(self.LOOKBACK_HOURS)[self.feature_columns].values
-        
-        # Add prediction row
-        pred_row = np.array([[
-            feature_row['orders'],
-            feature_row['weather'],
-            feature_row['traffic'],
-            feature_row['hour_sin'],
-            feature_row['hour_cos'],
-            feature_row['dow_sin'],
-            feature_row['dow_cos'],
-            feature_row['is_weekend']
-        ]])
+        weather_by_hour = self._load_weather_by_hour()
+        
+        # Feature rows for all prediction hours, in feature_columns order
+        calendar = calendar_features(pd.Series(pd.to_datetime(pred_times)))
+        pred_rows = np.column_stack([
+            np.zeros(len(pred_times)),  # orders: unknown, filled from context
+            [weather_by_hour.get(h, 0.6) for h in calendar['hour_of_day']],  # weather: default 0.6
+            np.full(len(pred_times), 0.7),  # traffic: default
+            calendar[['hour_sin', 'hour_cos', 'dow_sin', 'dow_cos', 'is_weekend']].values
+        ])
         
-        # Combine for sequence
-        sequence_data = np.vstack([recent_data[1:], pred_row])
+        # Get last 23 hours of historical data, shared by every window
+        recent_data = df_historical.tail(self.LOOKBACK_HOURS)[self.feature_columns].values[1:]
         
-        # Scale
-        scaled_sequence = self.scaler.transform(sequence_data)
+        # Scale history and prediction rows in one transform
+        scaled = self.scaler.transform(np.vstack([recent_data, pred_rows]))
+        scaled_history, scaled_pred = scaled[:len(recent_data)], scaled[len(recent_data):]
         
-        # Reshape for LSTM [1, lookback, features]
-        X_pred = scaled_sequence.reshape(1, self.LOOKBACK_HOURS, len(self.feature_columns))
+        # [hours, lookback, features]
+        X_pred = np.concatenate([
+            np.broadcast_to(scaled_history, (len(pred_times),) + scaled_history.shape),
+            scaled_pred[:, np.newaxis, :]
+        ], axis=1)
         
         # Predict
-        pred_scaled = self.model.predict(X_pred, verbose=0)[0][0]
+        pred_scaled = self.model.predict(X_pred, verbose=0)[:, 0]
         
         # Denormalize (inverse transform just the orders column)
-        pred_full = np.zeros((1, len(self.feature_columns)))
-        pred_full[0, 0] = pred_scaled
-        pred_denorm = self.scaler.inverse_transform(pred_full)
-        pred_sales = pred_denorm[0, 0]
+        pred_full = np.zeros((len(pred_times), len(self.feature_columns)))
+        pred_full[:, 0] = pred_scaled
+        pred_sales = self.scaler.inverse_transform(pred_full)[:, 0]
         
         # Calculate 90% confidence interval (from notebook)
-        # Using historical prediction error
-        ci_margin = pred_sales * 0.15  # ±15% confidence band
-        lower_ci = max(0, pred_sales - ci_margin)
+        # Using held-out prediction error, or the Holt-Winters one-step error when the
+        # model was not trained in this process
+        sigma = self.residual_std
+        if sigma is None:
+            sigma = forecast_series(df_historical.set_index('timestamp')['orders'], 1)['sigma']
+        ci_margin = CONFIDENCE_Z * sigma
+        lower_ci = np.maximum(0, pred_sales - ci_margin)
         upper_ci = pred_sales + ci_margin
         
         return pred_sales, lower_ci, upper_ci
     
-    def _create_lstm_forecast_plot(self, df_predictions: pd.DataFrame, output_file: str):
-        """Create visualization with confidence intervals (from notebook style)."""
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
-        
-        # Plot 1: Orders with confidence intervals
-        ax1.plot(
-            df_predictions['hour'],
-            df_predictions['predicted_orders'],
-            marker='o',
-            linewidth=2,
-            markersize=8,
-            color='#FF6B35',
-            label='Predicted Orders',
-            zorder=3
-        )
-        
-        # Confidence interval shading
-        ax1.fill_between(
-            df_predictions['hour'],
-            df_predictions['lower_ci_orders'],
-            df_predictions['upper_ci_orders'],
-            color='lightblue',
-            alpha=0.4,
-            label='90% Confidence Interval'
-        )
-        
-        # Highlight peak
-        peak_idx = df_predictions['predicted_orders'].idxmax()
-        peak_row = df_predictions.iloc[peak_idx]
-        ax1.scatter(
-            peak_row['hour'],
-            peak_row['predicted_orders'],
-            s=200,
-            color='#FFD700',
-            edgecolors='black',
-            linewidths=2,
-            zorder=5,
-            label='Peak Hour'
-        )
-        
-        ax1.set_xlabel('Hour of Day', fontsize=12, fontweight='bold')
-        ax1.set_ylabel('Predicted Orders', fontsize=12, fontweight='bold')
-        ax1.set_title('Tomorrow\'s Order Volume Forecast (LSTM with 90% CI)', 
-                     fontsize=14, fontweight='bold')
-        ax1.set_xticks(df_predictions['hour'])
-        ax1.grid(True, alpha=0.3)
-        ax1.legend()
-        
-        # Plot 2: Revenue forecast
-        ax2.plot(
-            df_predictions['hour'],
-            df_predictions['predicted_revenue'],
-            marker='s',
-            linewidth=2,
-            markersize=8,
-            color='#10B981',
-            label='Predicted Revenue',
-            zorder=3
-        )
-        
-        # Revenue confidence interval
-        ax2.fill_between(
-            df_predictions['hour'],
-            df_predictions['lower_ci_revenue'],
-            df_predictions['upper_ci_revenue'],
-            color='lightgreen',
-            alpha=0.4,
-            label='90% Confidence Interval'
-        )
-        
-        # Highlight peak revenue hour
-        ax2.scatter(
-            peak_row['hour'],
-            peak_row['predicted_revenue'],
-            s=200,
-            color='#FFD700',
-            edgecolors='black',
-            linewidths=2,
-            zorder=5,
-            label='Peak Hour'
+    def _create_lstm_forecast_plot(self, df_predictions: pd.DataFrame, output_file: str) -> RenderHandle:
+        """Queue the orders/revenue chart with confidence intervals for background rendering."""
+        return get_render_queue().submit(
+            "lstm_forecast_plot", {"predictions": df_predictions.to_dict(orient="list")}, output_file
         )
-        
-        ax2.set_xlabel('Hour of Day', fontsize=12, fontweight='bold')
-        ax2.set_ylabel('Predicted Revenue ($)', fontsize=12, fontweight='bold')
-        ax2.set_title('Tomorrow\'s Revenue Forecast (LSTM)', 
-                     fontsize=14, fontweight='bold')
-        ax2.set_xticks(df_predictions['hour'])
-        ax2.grid(True, alpha=0.3)
-        ax2.legend()
-        
-        # Add total revenue annotation
-        total_revenue = df_predictions['predicted_revenue'].sum()
-        ax2.text(
-            0.98, 0.95,
-            f'Total Daily Revenue: ${total_revenue:,.2f}',
-            transform=ax2.transAxes,
-            fontsize=11,
-            fontweight='bold',
-            bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8),
-            verticalalignment='top',
-            horizontalalignment='right'
-        )
-        
-        plt.tight_layout()
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
 
 
 def run_forecast_agent_lstm() -> Dict[str, Any]:
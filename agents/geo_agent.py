@@ -6,9 +6,9 @@ import json
 import asyncio
 from typing import Dict, Any, List, Tuple
 import requests
-import folium
 from agents.trace_agent import get_trace_agent
 from services.browseruse_client import get_browseruse_client
+from services.render_queue import RenderHandle, get_render_queue
 
 
 class GeoAgent:
@@ -68,8 +68,9 @@ class GeoAgent:
             )
             
             map_file = "artifacts/expansion_map.html"
-            self._create_expansion_map(analyzed_locations, map_file)
+            render = self._create_expansion_map(analyzed_locations, map_file)
             results["artifacts"].append(map_file)
+            results["renders"] = [render.to_dict()]
             
             # Save JSON data
             json_file = "artifacts/expansion_map.json"
@@ -226,56 +227,9 @@ class GeoAgent:
         
         return 0.5  # Default medium
     
-    def _create_expansion_map(self, locations: List[Dict[str, Any]], output_file: str):
-        """Create interactive Folium map with location markers."""
-        # Center on first location or default
-        if locations:
-            center_lat = sum(loc["lat"] for loc in locations) / len(locations)
-            center_lng = sum(loc["lng"] for loc in locations) / len(locations)
-        else:
-            center_lat, center_lng = 37.7749, -122.4194
-        
-        # Create map
-        m = folium.Map(
-            location=[center_lat, center_lng],
-            zoom_start=12,
-            tiles="OpenStreetMap"
-        )
-        
-        # Add markers
-        for i, loc in enumerate(locations):
-            # Color based on ROI score
-            if loc["roi_score"] >= 0.7:
-                color = "green"
-            elif loc["roi_score"] >= 0.5:
-                color = "orange"
-            else:
-                color = "red"
-            
-            # Create popup
-            popup_html = f"""
-            <div style="font-family: Arial; width: 250px;">
-                <h4>{loc['name']}</h4>
-                <b>ROI Score:</b> {loc['roi_score']:.2f}<br>
-                <b>Traffic:</b> {loc['traffic_score']:.2f}<br>
-                <b>Income:</b> {loc['income_score']:.2f}<br>
-                <b>Competition:</b> {loc['competition_score']:.2f}<br>
-                <b>Competitors:</b> {loc['competitors_count']}<br>
-                <b>Nearby Businesses:</b> {loc['businesses_count']}<br>
-                <br>
-                <a href="{loc['gmaps_url']}" target="_blank">Open in Google Maps</a>
-            </div>
-            """
-            
-            folium.Marker(
-                location=[loc["lat"], loc["lng"]],
-                popup=folium.Popup(popup_html, max_width=300),
-                tooltip=f"{loc['name']} (ROI: {loc['roi_score']:.2f})",
-                icon=folium.Icon(color=color, icon="info-sign")
-            ).add_to(m)
-        
-        # Save map
-        m.save(output_file)
+    def _create_expansion_map(self, locations: List[Dict[str, Any]], output_file: str) -> RenderHandle:
+        """Queue the interactive Folium map with location markers for background rendering."""
+        return get_render_queue().submit("expansion_map", {"locations": locations}, output_file)
 
 
 def run_geo_agent(expansion_city: str) -> Dict[str, Any]:
@@ -158,11 +158,9 @@ class BrewAIOrchestrator:
         print("\n[4/10] Generating LSTM Forecasts...")
         self.trace.log("DemandAgent", "Running LSTM predictions")
         
-        from services.lstm_forecaster import get_lstm_forecaster
+        from services.lstm_forecaster import run_lstm_forecast
         
-        forecaster = get_lstm_forecaster()
-        data = forecaster.prepare_data_from_csv("data/orders_realtime.csv")
-        result = forecaster.predict(data, hours_ahead=24)
+        result = run_lstm_forecast("data/orders_realtime.csv", hours_ahead=24)
         
         self.results['forecast'] = {
             'total_orders': int(sum(result.get('future_predictions', [180]))),
@@ -107,52 +107,47 @@ try:
     # LSTM Forecast
     st.markdown("### 🔮 LSTM 24-Hour Forecast")
     
-    # Check if user wants to load TensorFlow (heavy library)
-    use_lstm = os.getenv("ENABLE_LSTM", "false").lower() == "true"
-    
-    if not use_lstm:
-        st.info("📊 LSTM forecasting disabled (speeds up load time). Set ENABLE_LSTM=true in .env to enable.")
-        data = None
-        forecaster = None
-    else:
-        try:
-            from services.lstm_forecaster import get_lstm_forecaster
-            forecaster = get_lstm_forecaster()
-            data = forecaster.prepare_data_from_csv("data/orders_realtime.csv")
-        except Exception as e:
-            st.warning(f"📊 LSTM forecasting unavailable: {str(e)}")
-            data = None
-            forecaster = None
-    
-    if data is not None and len(data) > 0 and forecaster:
-        forecast = forecaster.predict_next_24_hours(data)
+    # Served from the forecast store; recomputed only when the CSVs or model change.
+    # TensorFlow (heavy library) is only loaded when ENABLE_LSTM asks for it; otherwise
+    # the forecast needs an up-to-date NumPy export of the model
+    try:
+        from services.lstm_forecaster import run_lstm_forecast, serves_without_tensorflow
+        if os.getenv("ENABLE_LSTM", "false").lower() == "true" or serves_without_tensorflow():
+            forecast = run_lstm_forecast("data/orders_realtime.csv", hours_ahead=24)
+        else:
+            st.info("📊 LSTM forecasting needs TensorFlow (slow to load). Export the model with "
+                    "scripts/export_lstm_numpy.py or set ENABLE_LSTM=true in .env to enable.")
+            forecast = None
+    except Exception as e:
+        st.warning(f"📊 LSTM forecasting unavailable: {str(e)}")
+        forecast = None
+    
+    if forecast and 'future_predictions' in forecast:
+        predictions = forecast['future_predictions']
+        hours = list(range(1, len(predictions) + 1))
+        revenue_forecast = [p * avg_price for p in predictions]
+        
+        fig3 = go.Figure()
+        fig3.add_trace(go.Scatter(
+            x=hours,
+            y=revenue_forecast,
+            mode='lines+markers',
+            name='Revenue Forecast',
+            line=dict(color='#667eea', width=3),
+            fill='tozeroy',
+            fillcolor='rgba(102, 126, 234, 0.2)'
+        ))
+        fig3.update_layout(
+            title="Revenue Forecast (Next 24 Hours)",
+            xaxis_title="Hours Ahead",
+            yaxis_title="Revenue ($)",
+            template="plotly_dark",
+            height=400
+        )
+        st.plotly_chart(fig3, use_container_width=True)
         
-        if forecast and 'future_predictions' in forecast:
-            predictions = forecast['future_predictions']
-            hours = list(range(1, len(predictions) + 1))
-            revenue_forecast = [p * avg_price for p in predictions]
-            
-            fig3 = go.Figure()
-            fig3.add_trace(go.Scatter(
-                x=hours,
-                y=revenue_forecast,
-                mode='lines+markers',
-                name='Revenue Forecast',
-                line=dict(color='#667eea', width=3),
-                fill='tozeroy',
-                fillcolor='rgba(102, 126, 234, 0.2)'
-            ))
-            fig3.update_layout(
-                title="Revenue Forecast (Next 24 Hours)",
-                xaxis_title="Hours Ahead",
-                yaxis_title="Revenue ($)",
-                template="plotly_dark",
-                height=400
-            )
-            st.plotly_chart(fig3, use_container_width=True)
-            
-            total_forecast = sum(revenue_forecast)
-            st.success(f"💰 Forecasted 24h revenue: ${total_forecast:,.0f}")
+        total_forecast = sum(revenue_forecast)
+        st.success(f"💰 Forecasted 24h revenue: ${total_forecast:,.0f}")
     
     # AI Insights
     st.markdown("### 🧠 CAPTAIN AI Insights")
@@ -4,7 +4,6 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import time
 import pandas as pd
-import random
 import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
@@ -141,10 +140,35 @@ col_pred1, col_pred2 = st.columns(2)
 with col_pred1:
     st.markdown("#### 📊 Next 24 Hours - Order Predictions")
     
-    # Generate LSTM-style forecast
+    # LSTM forecast from the forecast store; the Holt-Winters baseline when no model is trained
     hours = list(range(1, 25))
-    base_orders = [15, 12, 10, 8, 6, 5, 8, 12, 18, 25, 22, 28, 30, 20, 18, 22, 35, 42, 38, 32, 25, 20, 18, 15]
-    lstm_predictions = [o + random.randint(-3, 3) for o in base_orders]
+    try:
+        from services.lstm_forecaster import run_lstm_forecast
+        forecast = run_lstm_forecast("data/orders_realtime.csv", hours_ahead=24)
+    except Exception as e:
+        st.warning(f"📊 LSTM forecasting unavailable: {str(e)}")
+        forecast = {}
+    lstm_predictions = [round(float(o), 1) for o in forecast.get('future_sales', [0.0] * len(hours))]
+    if forecast.get('mode') == 'holt_winters':
+        st.caption("No trained LSTM yet - showing the Holt-Winters seasonal baseline")
+    
+    # Retrain in a background process; this page keeps serving the current model meanwhile
+    try:
+        from services.training_jobs import JobConflict, get_training_runner
+        runner = get_training_runner()
+        if st.button("🔁 Retrain LSTM in background", key="retrain_lstm"):
+            try:
+                runner.start("lstm")
+            except JobConflict as e:
+                st.info(str(e))
+        latest = runner.list(model="lstm", limit=1)
+        if latest:
+            job = latest[0]
+            progress = job.get('progress') or {}
+            epochs = f" - epoch {progress.get('epoch', 0)}/{progress['epochs']}" if progress.get('epochs') else ""
+            st.caption(f"Last training job: {job['status']}{epochs} ({progress.get('elapsed_seconds', 0)}s)")
+    except Exception as e:
+        st.caption(f"Background training unavailable: {str(e)}")
     
     fig_lstm = go.Figure()
     fig_lstm.add_trace(go.Scatter(
@@ -170,7 +194,7 @@ with col_pred1:
     
     st.plotly_chart(fig_lstm, use_container_width=True, key="lstm_forecast_chart")
     
-    total_predicted = sum(lstm_predictions)
+    total_predicted = round(sum(lstm_predictions))
     st.metric("Total Predicted Orders (24h)", total_predicted, "+18%")
 
 with col_pred2:
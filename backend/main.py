@@ -2,20 +2,40 @@
 Brew.AI v4 - FastAPI Backend
 Live data store with real-time updates, crisis management, and compliance tracking
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from contextlib import contextmanager
 import httpx
 from datetime import datetime
 import os
 import random
+import re
 import asyncio
+import copy
+import hashlib
+import itertools
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import sys
+from pathlib import Path
 
 # Google Gemini
 import google.generativeai as genai
 import json
 
+# Project services (forecasting) live next to the backend directory
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+from services.forecast_server import ForecastServer, ForecastTimeout
+from services.training_jobs import DEFAULT_BUDGET_SECONDS, JobConflict, TrainingJobRunner
+
 app = FastAPI(title="Brew.AI API", version="4.0")
 
 # API Keys
@@ -98,12 +118,6 @@ AUTO_EMAIL_MONITORING = {
     "crises_detected": 0
 }
 
-# Agent mode settings
-AGENT_MODE = {
-    "enabled": False,  # When True, automatically apply store changes
-    "auto_apply_insights": False
-}
-
 # CORS for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -111,16 +125,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Idempotent-Replayed", "ETag"],
 )
 
 # ============ LIVE IN-MEMORY DATA STORE ============
 
-# Track processed email IDs to avoid re-processing
-PROCESSED_EMAIL_IDS: set = set()
+# Every location starts from the same menu, inventory and staff;
+# TenantState copies these so locations never share mutable data
 
-# Live store data
-LIVE_STORE = {
-    "products": [
+def default_products() -> List[Dict]:
+    return [
         { "id": 1, "name": "Classic Burger", "price": 12.99, "originalPrice": None, "category": "mains", "image": "🍔", "featured": False, "sale": False, "discount": 0 },
         { "id": 2, "name": "Buffalo Wings", "price": 14.99, "originalPrice": None, "category": "appetizers", "image": "🍗", "featured": True, "sale": False, "discount": 0 },
         { "id": 3, "name": "Veggie Power Bowl", "price": 11.99, "originalPrice": None, "category": "healthy", "image": "🥗", "featured": False, "sale": False, "discount": 0 },
@@ -130,51 +144,600 @@ LIVE_STORE = {
         { "id": 7, "name": "Spicy Chicken Sandwich", "price": 13.99, "originalPrice": None, "category": "mains", "image": "🌶️", "featured": True, "sale": False, "discount": 0 },
         { "id": 8, "name": "Chocolate Shake", "price": 5.99, "originalPrice": None, "category": "drinks", "image": "🍫", "featured": False, "sale": False, "discount": 0 },
         { "id": 9, "name": "Garden Salad", "price": 8.99, "originalPrice": None, "category": "healthy", "image": "🥬", "featured": False, "sale": False, "discount": 0 },
-    ],
-    "flash_sale": { "active": False, "discount": 0, "category": None },
-    "job_postings": []  # Dynamic job postings
-}
+    ]
+
+def default_inventory() -> List[Dict]:
+    return [
+        { "item_name": "Burger Patties", "stock_level": 150, "reorder_point": 50, "unit": "units" },
+        { "item_name": "Chicken Wings", "stock_level": 80, "reorder_point": 30, "unit": "kg" },
+        { "item_name": "Lettuce", "stock_level": 25, "reorder_point": 15, "unit": "kg" },
+        { "item_name": "Tomatoes", "stock_level": 40, "reorder_point": 20, "unit": "kg" },
+        { "item_name": "French Fries", "stock_level": 100, "reorder_point": 40, "unit": "kg" },
+        { "item_name": "Soft Drink Syrup", "stock_level": 20, "reorder_point": 10, "unit": "liters" },
+        { "item_name": "Buns", "stock_level": 200, "reorder_point": 75, "unit": "units" },
+        { "item_name": "Cheese", "stock_level": 30, "reorder_point": 15, "unit": "kg" },
+    ]
+
+def default_staff() -> List[Dict]:
+    return [
+        { "id": 1, "name": "John Smith", "role": "Chef", "shift": "morning", "status": "active" },
+        { "id": 2, "name": "Sarah Johnson", "role": "Server", "shift": "morning", "status": "active" },
+        { "id": 3, "name": "Mike Brown", "role": "Chef", "shift": "afternoon", "status": "active" },
+        { "id": 4, "name": "Emily Davis", "role": "Server", "shift": "afternoon", "status": "active" },
+        { "id": 5, "name": "Chris Wilson", "role": "Manager", "shift": "all-day", "status": "active" },
+        { "id": 6, "name": "Lisa Anderson", "role": "Cashier", "shift": "morning", "status": "active" },
+        { "id": 7, "name": "David Lee", "role": "Server", "shift": "evening", "status": "active" },
+        { "id": 8, "name": "Anna Martinez", "role": "Chef", "shift": "evening", "status": "active" },
+    ]
+
+# ============ SLIDING-WINDOW SALES AGGREGATES ============
+
+# Named windows accepted by /api/data/analytics?window=...
+ANALYTICS_WINDOWS = {"15m": 15, "1h": 60}
+
+# No per-item cost data yet, so margin stays an estimate
+ESTIMATED_PROFIT_MARGIN = 29
+
+class SalesWindow:
+    """Per-minute ring buffer of order, revenue and item counters.
+
+    Buckets are updated on every order, so a window query costs
+    O(minutes in window) no matter how many orders have been placed.
+    """
+
+    def __init__(self, minutes: int = 24 * 60):
+        self.minutes = minutes
+        self.bucket_keys = [-1] * minutes
+        self.orders = [0] * minutes
+        self.revenue = [0.0] * minutes
+        self.items = [0] * minutes
+        self.item_counts: List[Dict[str, int]] = [{} for _ in range(minutes)]
+        # All-time running totals
+        self.total_orders = 0
+        self.total_revenue = 0.0
+        self.total_items = 0
+
+    @staticmethod
+    def _minute_key(ts: datetime) -> int:
+        return int(ts.timestamp() // 60)
+
+    def record(self, ts: datetime, revenue: float, items: List[tuple]):
+        """Add one order (items as (name, quantity) pairs) to its minute bucket"""
+        key = self._minute_key(ts)
+        slot = key % self.minutes
+        if self.bucket_keys[slot] != key:
+            # Slot still holds a bucket from a previous lap of the ring
+            self.bucket_keys[slot] = key
+            self.orders[slot] = 0
+            self.revenue[slot] = 0.0
+            self.items[slot] = 0
+            self.item_counts[slot] = {}
+
+        quantity = sum(q for _, q in items)
+        self.orders[slot] += 1
+        self.revenue[slot] += revenue
+        self.items[slot] += quantity
+        counts = self.item_counts[slot]
+        for name, q in items:
+            counts[name] = counts.get(name, 0) + q
+
+        self.total_orders += 1
+        self.total_revenue += revenue
+        self.total_items += quantity
+
+    def window(self, minutes: int, label: str = None, now: datetime = None) -> dict:
+        """Aggregate the last `minutes` buckets, including the current one"""
+        now = now or datetime.now()
+        minutes = max(1, min(minutes, self.minutes))
+        now_key = self._minute_key(now)
+
+        orders = 0
+        revenue = 0.0
+        items = 0
+        per_item: Dict[str, int] = {}
+        for key in range(now_key - minutes + 1, now_key + 1):
+            slot = key % self.minutes
+            if self.bucket_keys[slot] != key:
+                continue
+            orders += self.orders[slot]
+            revenue += self.revenue[slot]
+            items += self.items[slot]
+            for name, q in self.item_counts[slot].items():
+                per_item[name] = per_item.get(name, 0) + q
+
+        velocity = [
+            {
+                "name": name,
+                "quantity": q,
+                "per_minute": round(q / minutes, 3),
+                "per_hour": round(q * 60 / minutes, 1)
+            }
+            for name, q in sorted(per_item.items(), key=lambda kv: kv[1], reverse=True)
+        ]
+
+        return {
+            "window": label or f"{minutes}m",
+            "minutes": minutes,
+            "orders": orders,
+            "revenue": round(revenue, 2),
+            "items": items,
+            "avg_order_value": round(revenue / orders, 2) if orders else 0.0,
+            "orders_per_minute": round(orders / minutes, 3),
+            "revenue_per_minute": round(revenue / minutes, 2),
+            "item_velocity": velocity
+        }
+
+def analytics_window_minutes(window: str, now: datetime = None) -> int:
+    """Resolve a window name (15m, 1h, today) to a number of minute buckets"""
+    if window == "today":
+        now = now or datetime.now()
+        return now.hour * 60 + now.minute + 1
+    if window in ANALYTICS_WINDOWS:
+        return ANALYTICS_WINDOWS[window]
+    raise HTTPException(
+        status_code=400,
+        detail=f"Unknown window '{window}'. Use one of: {', '.join(list(ANALYTICS_WINDOWS) + ['today'])}"
+    )
+
+# ============ IDEMPOTENT ORDER CREATION ============
+
+class IdempotencyStore:
+    """Bounded TTL map of Idempotency-Key -> (request fingerprint, original response).
+
+    Every entry gets the same TTL, so insertion order is also expiry order
+    and eviction only ever pops from the front.
+    """
+
+    def __init__(self, ttl_seconds: int = 24 * 3600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _evict(self, now: float):
+        while self.entries:
+            expires_at = next(iter(self.entries.values()))[0]
+            if expires_at > now and len(self.entries) <= self.max_entries:
+                break
+            self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Return (fingerprint, response) for a live key, or None"""
+        self._evict(time.monotonic())
+        entry = self.entries.get(key)
+        return entry[1:] if entry else None
+
+    def put(self, key: str, fingerprint: str, response: dict):
+        now = time.monotonic()
+        self.entries[key] = (now + self.ttl_seconds, fingerprint, copy.deepcopy(response))
+        self._evict(now)
+
+def request_fingerprint(payload: dict) -> str:
+    """Stable hash of a request body, used to reject reused keys with new payloads"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+# ============ BACKGROUND JOB QUEUE ============
+
+class JobQueue:
+    """Durable SQLite-backed job queue with retries and dead-lettering.
+
+    Jobs move queued -> running -> succeeded, or back to queued with
+    exponential backoff on failure until max_attempts, after which they
+    are parked as 'dead'. Jobs left 'running' by a crashed process are
+    re-queued by recover() on startup.
+
+    SQLite calls block (a write can wait on another process's lock), so the
+    public methods are coroutines that run them in the default executor; the
+    shared connection is used by one thread at a time.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, backoff_seconds: float = 2.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.handlers: Dict[str, Any] = {}
+        self.wakeup = asyncio.Event()
+        self._db_lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                result TEXT,
+                error TEXT,
+                run_after REAL NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_after)")
+
+    def handler(self, job_type: str):
+        """Register an async handler: handler(payload, job_id) -> result dict
+
+        The job id is the same on every retry, so handlers can use it to
+        make their side effects idempotent.
+        """
+        def register(func):
+            self.handlers[job_type] = func
+            return func
+        return register
+
+    async def _run(self, func, *args):
+        """Run a blocking database method off the event loop"""
+        def locked():
+            with self._db_lock:
+                return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, locked)
+
+    async def enqueue(self, job_type: str, payload: dict, max_attempts: int = None) -> str:
+        job_id = uuid.uuid4().hex
+        await self._run(self._insert, job_id, job_type, payload, max_attempts or self.max_attempts)
+        self.wakeup.set()
+        return job_id
+
+    def _insert(self, job_id: str, job_type: str, payload: dict, max_attempts: int):
+        now = datetime.now().isoformat()
+        self.conn.execute(
+            "INSERT INTO jobs (id, type, payload, status, attempts, max_attempts, run_after, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'queued', 0, ?, ?, ?, ?)",
+            (job_id, job_type, json.dumps(payload), max_attempts, time.time(), now, now)
+        )
+
+    def _row_to_dict(self, row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self._run(self._get, job_id)
+
+    def _get(self, job_id: str) -> Optional[dict]:
+        row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    async def list(self, status: str = None, limit: int = 50) -> List[dict]:
+        return await self._run(self._list, status, limit)
+
+    def _list(self, status: Optional[str], limit: int) -> List[dict]:
+        if status:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?", (status, limit)
+            ).fetchall()
+        else:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
 
-# Live orders
-LIVE_ORDERS: List[Dict] = []
-
-# Live inventory
-LIVE_INVENTORY = [
-    { "item_name": "Burger Patties", "stock_level": 150, "reorder_point": 50, "unit": "units" },
-    { "item_name": "Chicken Wings", "stock_level": 80, "reorder_point": 30, "unit": "kg" },
-    { "item_name": "Lettuce", "stock_level": 25, "reorder_point": 15, "unit": "kg" },
-    { "item_name": "Tomatoes", "stock_level": 40, "reorder_point": 20, "unit": "kg" },
-    { "item_name": "French Fries", "stock_level": 100, "reorder_point": 40, "unit": "kg" },
-    { "item_name": "Soft Drink Syrup", "stock_level": 20, "reorder_point": 10, "unit": "liters" },
-    { "item_name": "Buns", "stock_level": 200, "reorder_point": 75, "unit": "units" },
-    { "item_name": "Cheese", "stock_level": 30, "reorder_point": 15, "unit": "kg" },
-]
-
-# Live staff
-LIVE_STAFF = [
-    { "id": 1, "name": "John Smith", "role": "Chef", "shift": "morning", "status": "active" },
-    { "id": 2, "name": "Sarah Johnson", "role": "Server", "shift": "morning", "status": "active" },
-    { "id": 3, "name": "Mike Brown", "role": "Chef", "shift": "afternoon", "status": "active" },
-    { "id": 4, "name": "Emily Davis", "role": "Server", "shift": "afternoon", "status": "active" },
-    { "id": 5, "name": "Chris Wilson", "role": "Manager", "shift": "all-day", "status": "active" },
-    { "id": 6, "name": "Lisa Anderson", "role": "Cashier", "shift": "morning", "status": "active" },
-    { "id": 7, "name": "David Lee", "role": "Server", "shift": "evening", "status": "active" },
-    { "id": 8, "name": "Anna Martinez", "role": "Chef", "shift": "evening", "status": "active" },
-]
-
-# Automation execution log
-AUTOMATION_LOG: List[Dict] = []
-
-# Compliance reports and score
-COMPLIANCE_DATA = {
-    "score": 100,  # Out of 100
-    "reports": [],
-    "incidents": [],
-    "last_updated": datetime.now().isoformat()
+    async def recover(self) -> int:
+        """Re-queue jobs that were running when the process last stopped"""
+        return await self._run(self._recover)
+
+    def _recover(self) -> int:
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+            (datetime.now().isoformat(),)
+        )
+        return cursor.rowcount
+
+    async def retry(self, job_id: str) -> bool:
+        """Move a dead-lettered job back to the queue with a fresh attempt budget"""
+        retried = await self._run(self._retry, job_id)
+        self.wakeup.set()
+        return retried
+
+    def _retry(self, job_id: str) -> bool:
+        cursor = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = 0, run_after = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'dead'",
+            (time.time(), datetime.now().isoformat(), job_id)
+        )
+        return cursor.rowcount > 0
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        # BEGIN IMMEDIATE takes the write lock up front so two workers never claim the same job
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY created_at LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (datetime.now().isoformat(), row["id"])
+                )
+            self.conn.execute("COMMIT")
+            return row
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _complete(self, job_id: str, result: Any):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, updated_at = ? WHERE id = ?",
+            (json.dumps(result, default=str), datetime.now().isoformat(), job_id)
+        )
+
+    def _fail(self, job: sqlite3.Row, error: str):
+        attempts = job["attempts"] + 1  # row was read before the claim incremented it
+        if attempts >= job["max_attempts"]:
+            status, run_after = "dead", time.time()
+        else:
+            status, run_after = "queued", time.time() + self.backoff_seconds * 2 ** (attempts - 1)
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+            (status, error, run_after, datetime.now().isoformat(), job["id"])
+        )
+        print(f"[JOBS] {job['type']} {job['id']} failed (attempt {attempts}/{job['max_attempts']}): {error}")
+
+    async def worker(self, poll_interval: float = 1.0):
+        """Run jobs forever; wakes early whenever something is enqueued"""
+        while True:
+            job = await self._run(self._claim)
+            if job is None:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            handler = self.handlers.get(job["type"])
+            try:
+                if handler is None:
+                    raise RuntimeError(f"No handler registered for job type '{job['type']}'")
+                result = await handler(json.loads(job["payload"]), job["id"])
+                await self._run(self._complete, job["id"], result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._run(self._fail, job, f"{type(e).__name__}: {e}")
+
+JOB_QUEUE = JobQueue(
+    os.getenv("JOB_QUEUE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite3")),
+    max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_WORKER_TASKS: List[asyncio.Task] = []
+
+# ============ TENANT STATE ============
+
+DEFAULT_TENANT_ID = "default"
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Per-tenant memory cap: every growing collection is bounded
+TENANT_LIMITS = {
+    "orders": int(os.getenv("TENANT_MAX_ORDERS", "5000")),
+    "automation_log": int(os.getenv("TENANT_MAX_AUTOMATION_LOG", "1000")),
+    "activity_feed": 50,
+    "job_postings": 50,
+    "processed_email_ids": 5000,
+    "idempotency_keys": int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")),
+    "completed_jobs": 1000,
 }
 
-# Activity feed for dashboard
-ACTIVITY_FEED: List[Dict] = []
+class TenantState:
+    """All live data for one restaurant location, guarded by its own lock.
+
+    Order history is trimmed to TENANT_LIMITS["orders"]; all-time totals
+    live in sales_window, so analytics are unaffected by the trim.
+    """
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.lock = asyncio.Lock()
+        self.last_access = time.monotonic()
+        self.pins = 0  # Requests and jobs using this tenant right now (see TenantRegistry.pinned)
+        
+        self.store = {
+            "products": default_products(),
+            "flash_sale": { "active": False, "discount": 0, "category": None },
+            "job_postings": []  # Dynamic job postings
+        }
+        self.orders: List[Dict] = []
+        self.inventory = default_inventory()
+        self.staff = default_staff()
+        self.automation_log: List[Dict] = []
+        self.compliance = {
+            "score": 100,  # Out of 100
+            "reports": [],
+            "incidents": [],
+            "last_updated": datetime.now().isoformat()
+        }
+        self.activity_feed: List[Dict] = []
+        # Insertion-ordered so the oldest ids can be trimmed
+        self.processed_email_ids: Dict[str, bool] = {}
+        self.agent_mode = {
+            "enabled": False,  # When True, automatically apply store changes
+            "auto_apply_insights": False
+        }
+        
+        # Live sales counters, updated by create_order
+        self.sales_window = SalesWindow()
+        # Replayable create_order responses, keyed by Idempotency-Key header
+        self.order_idempotency = IdempotencyStore(
+            ttl_seconds=int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),
+            max_entries=TENANT_LIMITS["idempotency_keys"]
+        )
+        # Monotonic, collision-free order ids
+        self.order_ids = itertools.count(1001)
+        # Outcomes of background jobs already applied to this tenant, by job id
+        self.completed_jobs: "OrderedDict[str, dict]" = OrderedDict()
+
+    # State a crisis job writes; staged together so a failed attempt leaves no trace
+    CRISIS_FIELDS = ("store", "compliance", "activity_feed", "automation_log")
+
+    def staged(self) -> "TenantState":
+        """A view of this tenant whose CRISIS_FIELDS are private copies"""
+        staged = object.__new__(TenantState)
+        staged.__dict__.update(self.__dict__)
+        for name in self.CRISIS_FIELDS:
+            setattr(staged, name, copy.deepcopy(getattr(self, name)))
+        return staged
+
+    def commit(self, staged: "TenantState", job_id: str, outcome: dict):
+        """Swap in a staged job's changes and record the job as applied, in one step"""
+        for name in self.CRISIS_FIELDS:
+            setattr(self, name, getattr(staged, name))
+        self.completed_jobs[job_id] = outcome
+        while len(self.completed_jobs) > TENANT_LIMITS["completed_jobs"]:
+            self.completed_jobs.popitem(last=False)
+
+    def __getstate__(self):
+        # Pickled only when evicted, so taking the next id here loses nothing
+        state = self.__dict__.copy()
+        del state["lock"]
+        state["pins"] = 0
+        state["order_ids"] = next(self.order_ids)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = asyncio.Lock()
+        self.order_ids = itertools.count(state["order_ids"])
+
+    def add_order(self, order: dict):
+        self.orders.append(order)
+        if len(self.orders) > TENANT_LIMITS["orders"]:
+            del self.orders[:len(self.orders) - TENANT_LIMITS["orders"]]
+
+    def log_automation(self, entry: dict):
+        self.automation_log.append(entry)
+        if len(self.automation_log) > TENANT_LIMITS["automation_log"]:
+            del self.automation_log[:len(self.automation_log) - TENANT_LIMITS["automation_log"]]
+
+    def mark_email_processed(self, msg_id: str):
+        self.processed_email_ids[msg_id] = True
+        while len(self.processed_email_ids) > TENANT_LIMITS["processed_email_ids"]:
+            del self.processed_email_ids[next(iter(self.processed_email_ids))]
+
+    def summary(self) -> dict:
+        return {
+            "tenant_id": self.tenant_id,
+            "orders": len(self.orders),
+            "products": len(self.store["products"]),
+            "inventory_items": len(self.inventory),
+            "staff": len(self.staff),
+            "compliance_score": self.compliance["score"],
+            "automation_executions": len(self.automation_log),
+            "idle_seconds": round(time.monotonic() - self.last_access, 1),
+            "busy": self.lock.locked()
+        }
+
+class TenantRegistry:
+    """LRU of loaded tenants with idle eviction.
+
+    The default tenant and any tenant in use (pinned by a request or job,
+    or with its lock held) are never evicted. An evicted tenant is pickled to spill_dir and
+    reloaded with all its state on its next request, so eviction only frees
+    memory. The spill directory lives as long as the process, like the
+    in-memory state it stands in for.
+    """
+
+    def __init__(self, max_tenants: int = 256, idle_seconds: float = 3600,
+                 spill_dir: Optional[str] = None):
+        self.max_tenants = max_tenants
+        self.idle_seconds = idle_seconds
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="brew_tenants_")
+        self.tenants: "OrderedDict[str, TenantState]" = OrderedDict()
+
+    def _spill_path(self, tenant_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{tenant_id}.pkl")
+
+    def _load(self, tenant_id: str) -> TenantState:
+        path = self._spill_path(tenant_id)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                tenant = pickle.load(f)
+            os.remove(path)
+            print(f"[TENANTS] Reloaded evicted tenant '{tenant_id}'")
+            return tenant
+        print(f"[TENANTS] Loaded tenant '{tenant_id}'")
+        return TenantState(tenant_id)
+
+    def _spill(self, tenant: TenantState):
+        path = self._spill_path(tenant.tenant_id)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(tenant, f)
+        os.replace(tmp_path, path)
+
+    def get(self, tenant_id: str) -> TenantState:
+        tenant = self.tenants.get(tenant_id)
+        if tenant is None:
+            tenant = self._load(tenant_id)
+            self.tenants[tenant_id] = tenant
+        else:
+            self.tenants.move_to_end(tenant_id)
+        tenant.last_access = time.monotonic()
+        self._evict()
+        return tenant
+
+    @contextmanager
+    def pinned(self, tenant_id: str):
+        """The tenant, kept loaded until the block exits, even across awaits"""
+        tenant = self.get(tenant_id)
+        tenant.pins += 1
+        try:
+            yield tenant
+        finally:
+            tenant.pins -= 1
+            tenant.last_access = time.monotonic()
+
+    def _evict(self):
+        now = time.monotonic()
+        # Least recently used first; the tenant just touched is last
+        for tenant_id, tenant in list(self.tenants.items())[:-1]:
+            over_capacity = len(self.tenants) > self.max_tenants
+            idle = now - tenant.last_access > self.idle_seconds
+            if not (over_capacity or idle):
+                break
+            if tenant_id == DEFAULT_TENANT_ID or tenant.pins or tenant.lock.locked():
+                continue
+            self._spill(tenant)
+            del self.tenants[tenant_id]
+            print(f"[TENANTS] Evicted tenant '{tenant_id}'")
+
+TENANTS = TenantRegistry(
+    max_tenants=int(os.getenv("MAX_LOADED_TENANTS", "256")),
+    idle_seconds=float(os.getenv("TENANT_IDLE_SECONDS", "3600")),
+    spill_dir=os.getenv("TENANT_SPILL_DIR")
+)
+
+def get_tenant(request: Request, x_tenant_id: Optional[str] = Header(None)):
+    """Resolve the tenant from a /t/{tenant_id}/... path prefix or the X-Tenant-ID header
+
+    The tenant stays pinned until the request finishes, so handlers that
+    await while holding it never write to a copy that was already spilled.
+    """
+    tenant_id = request.scope.get("tenant_id") or x_tenant_id or DEFAULT_TENANT_ID
+    if not TENANT_ID_PATTERN.match(tenant_id):
+        raise HTTPException(status_code=400, detail=f"Invalid tenant id '{tenant_id}'")
+    with TENANTS.pinned(tenant_id) as tenant:
+        yield tenant
+
+class TenantPathMiddleware:
+    """Rewrite /t/{tenant_id}/api/... to /api/... and remember the tenant id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/t/"):
+            parts = scope["path"].split("/", 3)  # ['', 't', tenant_id, rest]
+            if len(parts) == 4 and parts[2]:
+                path = "/" + parts[3]
+                scope = dict(scope, path=path, raw_path=path.encode(), tenant_id=parts[2])
+        await self.app(scope, receive, send)
+
+app.add_middleware(TenantPathMiddleware)
 
 # ============ PYDANTIC MODELS ============
 
@@ -221,6 +784,12 @@ class StoreActionRequest(BaseModel):
     params: Optional[Dict[str, Any]] = None
     auto_apply: bool = False
 
+class TrainingJobRequest(BaseModel):
+    kind: str = "lstm"
+    epochs: Optional[int] = None
+    batch_size: Optional[int] = None
+    budget_seconds: float = DEFAULT_BUDGET_SECONDS
+
 # ============ CRISIS DETECTION CONFIG ============
 
 # Crisis keywords with interconnected automations
@@ -371,47 +940,45 @@ CRISIS_KEYWORDS = {
 
 # ============ HELPER FUNCTIONS ============
 
-def add_activity(activity_type: str, message: str, severity: str = "info"):
-    """Add an activity to the feed"""
-    ACTIVITY_FEED.insert(0, {
-        "id": len(ACTIVITY_FEED) + 1,
+def add_activity(tenant: TenantState, activity_type: str, message: str, severity: str = "info"):
+    """Add an activity to the tenant's feed"""
+    tenant.activity_feed.insert(0, {
+        "id": len(tenant.activity_feed) + 1,
         "type": activity_type,
         "message": message,
         "severity": severity,
         "timestamp": datetime.now().isoformat()
     })
-    # Keep only last 50 activities
-    if len(ACTIVITY_FEED) > 50:
-        ACTIVITY_FEED.pop()
+    # Keep only the most recent activities
+    if len(tenant.activity_feed) > TENANT_LIMITS["activity_feed"]:
+        tenant.activity_feed.pop()
 
-def update_compliance_score(impact: int, reason: str):
+def update_compliance_score(tenant: TenantState, impact: int, reason: str):
     """Update compliance score and log the change"""
-    global COMPLIANCE_DATA
-    old_score = COMPLIANCE_DATA["score"]
-    COMPLIANCE_DATA["score"] = max(0, min(100, COMPLIANCE_DATA["score"] + impact))
-    COMPLIANCE_DATA["last_updated"] = datetime.now().isoformat()
+    old_score = tenant.compliance["score"]
+    tenant.compliance["score"] = max(0, min(100, tenant.compliance["score"] + impact))
+    tenant.compliance["last_updated"] = datetime.now().isoformat()
     
     if impact != 0:
-        COMPLIANCE_DATA["reports"].insert(0, {
-            "id": len(COMPLIANCE_DATA["reports"]) + 1,
+        tenant.compliance["reports"].insert(0, {
+            "id": len(tenant.compliance["reports"]) + 1,
             "type": "score_change",
             "old_score": old_score,
-            "new_score": COMPLIANCE_DATA["score"],
+            "new_score": tenant.compliance["score"],
             "change": impact,
             "reason": reason,
             "timestamp": datetime.now().isoformat()
         })
         
         # Keep only last 100 reports
-        if len(COMPLIANCE_DATA["reports"]) > 100:
-            COMPLIANCE_DATA["reports"] = COMPLIANCE_DATA["reports"][:100]
+        if len(tenant.compliance["reports"]) > 100:
+            tenant.compliance["reports"] = tenant.compliance["reports"][:100]
 
-def add_compliance_incident(crisis: dict, automations_executed: list):
+def add_compliance_incident(tenant: TenantState, crisis: dict, automations_executed: list):
     """Add a compliance incident report"""
-    global COMPLIANCE_DATA
     
     incident = {
-        "id": len(COMPLIANCE_DATA["incidents"]) + 1,
+        "id": len(tenant.compliance["incidents"]) + 1,
         "crisis_type": crisis.get("type"),
         "severity": crisis.get("severity"),
         "trigger": crisis.get("trigger_keyword"),
@@ -422,17 +989,16 @@ def add_compliance_incident(crisis: dict, automations_executed: list):
         "status": "resolved"
     }
     
-    COMPLIANCE_DATA["incidents"].insert(0, incident)
+    tenant.compliance["incidents"].insert(0, incident)
     
     # Keep only last 50 incidents
-    if len(COMPLIANCE_DATA["incidents"]) > 50:
-        COMPLIANCE_DATA["incidents"] = COMPLIANCE_DATA["incidents"][:50]
+    if len(tenant.compliance["incidents"]) > 50:
+        tenant.compliance["incidents"] = tenant.compliance["incidents"][:50]
     
     return incident
 
-def execute_store_action(action: str, crisis: dict):
+def execute_store_action(tenant: TenantState, action: str, crisis: dict):
     """Execute interconnected store actions based on crisis"""
-    global LIVE_STORE
     
     if action == "post_job":
         # Post job opening on website when staff leaves
@@ -445,34 +1011,35 @@ def execute_store_action(action: str, crisis: dict):
             role = "Manager"
             
         job_posting = {
-            "id": len(LIVE_STORE.get("job_postings", [])) + 1,
+            "id": len(tenant.store.get("job_postings", [])) + 1,
             "title": f"Now Hiring: {role}",
             "description": f"We're looking for a talented {role} to join our team!",
             "posted_date": datetime.now().isoformat(),
             "status": "active"
         }
-        if "job_postings" not in LIVE_STORE:
-            LIVE_STORE["job_postings"] = []
-        LIVE_STORE["job_postings"].append(job_posting)
-        add_activity("store", f"Job posting created: {role}", "info")
+        if "job_postings" not in tenant.store:
+            tenant.store["job_postings"] = []
+        tenant.store["job_postings"].append(job_posting)
+        del tenant.store["job_postings"][:-TENANT_LIMITS["job_postings"]]
+        add_activity(tenant, "store", f"Job posting created: {role}", "info")
         return job_posting
         
     elif action == "menu_update":
         # Mark affected items as temporarily unavailable
-        add_activity("store", "Menu updated due to supply/equipment issue", "warning")
+        add_activity(tenant, "store", "Menu updated due to supply/equipment issue", "warning")
         
     elif action == "promotion":
         # Create a recovery promotion
-        LIVE_STORE["flash_sale"] = {
+        tenant.store["flash_sale"] = {
             "active": True,
             "discount": 15,
             "category": "all",
             "reason": "customer_recovery"
         }
-        add_activity("store", "Recovery promotion activated: 15% off", "info")
+        add_activity(tenant, "store", "Recovery promotion activated: 15% off", "info")
         
     elif action == "temporary_closure":
-        add_activity("store", "⚠️ Temporary closure notice posted", "error")
+        add_activity(tenant, "store", "⚠️ Temporary closure notice posted", "error")
         
     return None
 
@@ -606,33 +1173,187 @@ def generate_crisis_response(crisis: dict, automations_results: list) -> str:
     
     return responses.get(crisis_type, f"Your message has been processed. Actions: {automations_summary}.")
 
-# ============ STORE ENDPOINTS ============
+# ============ DASHBOARD PANELS ============
 
-@app.get("/api/store/products")
-async def get_store_products():
-    """Get all products for customer view"""
+# Each panel builder returns exactly what its own endpoint returns, so
+# /api/dashboard and the per-panel endpoints can never drift apart
+
+def shared_metrics(tenant: TenantState) -> dict:
+    """Figures several panels need, computed once per request"""
+    return {
+        "total_orders": tenant.sales_window.total_orders,
+        "total_revenue": tenant.sales_window.total_revenue,
+        "active_staff": len([s for s in tenant.staff if s["status"] == "active"]),
+        "low_stock": [i for i in tenant.inventory if i["stock_level"] <= i["reorder_point"]]
+    }
+
+def products_panel(tenant: TenantState, metrics: dict) -> dict:
+    return {
+        "success": True,
+        "products": tenant.store["products"],
+        "flash_sale": tenant.store.get("flash_sale", {"active": False}),
+        "happy_hour": tenant.store.get("happy_hour", {"active": False}),
+        "combo_deals": tenant.store.get("combo_deals", {"active": False}),
+        "seasonal_menu": tenant.store.get("seasonal_menu", {"active": False}),
+        "loyalty_promo": tenant.store.get("loyalty_promo", {"active": False}),
+        "banner": tenant.store.get("banner", {"active": False}),
+        "job_postings": tenant.store.get("job_postings", [])
+    }
+
+def analytics_panel(tenant: TenantState, metrics: dict, window: Optional[str] = None) -> dict:
+    total_orders = metrics["total_orders"]
+    total_revenue = metrics["total_revenue"]
+    profit_margin = ESTIMATED_PROFIT_MARGIN if total_revenue > 0 else 0
+    
+    result = {
+        "success": True,
+        "revenue": f"${total_revenue:,.2f}",
+        "revenue_raw": total_revenue,
+        "orders": total_orders,
+        "profit_margin": f"{profit_margin}%",
+        "active_staff": metrics["active_staff"],
+        "avg_order_value": f"${total_revenue / total_orders:.2f}" if total_orders > 0 else "$0.00",
+        "compliance_score": tenant.compliance["score"]
+    }
+    
+    if window:
+        result["window"] = tenant.sales_window.window(analytics_window_minutes(window), label=window)
+    
+    return result
+
+def inventory_panel(tenant: TenantState, metrics: dict) -> dict:
+    return {
+        "success": True,
+        "data": tenant.inventory,
+        "count": len(tenant.inventory)
+    }
+
+def staff_panel(tenant: TenantState, metrics: dict) -> dict:
+    return {
+        "success": True,
+        "data": tenant.staff,
+        "count": len(tenant.staff)
+    }
+
+def activity_panel(tenant: TenantState, metrics: dict) -> dict:
+    return {
+        "success": True,
+        "data": tenant.activity_feed[:20],
+        "count": len(tenant.activity_feed)
+    }
+
+def compliance_panel(tenant: TenantState, metrics: dict) -> dict:
+    return {
+        "success": True,
+        "score": tenant.compliance["score"],
+        "reports": tenant.compliance["reports"][:20],
+        "incidents": tenant.compliance["incidents"][:10],
+        "last_updated": tenant.compliance["last_updated"]
+    }
+
+def insights_panel(tenant: TenantState, metrics: dict) -> dict:
+    insights = []
+    
+    active_staff = metrics["active_staff"]
+    if active_staff < 6:
+        insights.append({
+            "type": "staffing",
+            "severity": "warning",
+            "message": f"Staff shortage detected. Only {active_staff} active staff. Consider posting job openings.",
+            "action": "Post job opening on website",
+            "action_type": "post_job"
+        })
+    
+    for item in metrics["low_stock"]:
+        insights.append({
+            "type": "inventory",
+            "severity": "warning",
+            "message": f"{item['item_name']} is low ({item['stock_level']} {item['unit']})",
+            "action": "Order more supplies",
+            "action_type": "emergency_order"
+        })
+    
+    total_orders = metrics["total_orders"]
+    total_revenue = metrics["total_revenue"]
+    
+    if total_orders > 0:
+        avg_order = total_revenue / total_orders
+        if avg_order < 15:
+            insights.append({
+                "type": "sales",
+                "severity": "info",
+                "message": f"Average order value is ${avg_order:.2f}. Consider upselling strategies.",
+                "action": "Create combo deals",
+                "action_type": "promotion"
+            })
+    
+    if tenant.compliance["score"] < 80:
+        insights.append({
+            "type": "compliance",
+            "severity": "error",
+            "message": f"Compliance score is {tenant.compliance['score']}%. Immediate attention needed.",
+            "action": "Review compliance reports",
+            "action_type": "compliance_review"
+        })
+    
+    if tenant.store.get("job_postings"):
+        insights.append({
+            "type": "staffing",
+            "severity": "info",
+            "message": f"{len(tenant.store['job_postings'])} active job posting(s) on website",
+            "action": "View applications",
+            "action_type": "view_jobs"
+        })
+    
     return {
         "success": True,
-        "products": LIVE_STORE["products"],
-        "flash_sale": LIVE_STORE.get("flash_sale", {"active": False}),
-        "happy_hour": LIVE_STORE.get("happy_hour", {"active": False}),
-        "combo_deals": LIVE_STORE.get("combo_deals", {"active": False}),
-        "seasonal_menu": LIVE_STORE.get("seasonal_menu", {"active": False}),
-        "loyalty_promo": LIVE_STORE.get("loyalty_promo", {"active": False}),
-        "banner": LIVE_STORE.get("banner", {"active": False}),
-        "job_postings": LIVE_STORE.get("job_postings", [])
+        "insights": insights,
+        "summary": {
+            "total_insights": len(insights),
+            "warnings": len([i for i in insights if i["severity"] == "warning"]),
+            "errors": len([i for i in insights if i["severity"] == "error"])
+        }
     }
 
+def agent_panel(tenant: TenantState, metrics: dict) -> dict:
+    return {
+        "success": True,
+        "agent_mode": tenant.agent_mode,
+        "email_monitoring": AUTO_EMAIL_MONITORING
+    }
+
+DASHBOARD_PANELS = {
+    "products": products_panel,
+    "analytics": analytics_panel,
+    "inventory": inventory_panel,
+    "staff": staff_panel,
+    "activity": activity_panel,
+    "compliance": compliance_panel,
+    "insights": insights_panel,
+    "agent": agent_panel,
+}
+
+# ============ STORE ENDPOINTS ============
+
+@app.get("/api/store/products")
+async def get_store_products(tenant: TenantState = Depends(get_tenant)):
+    """Get all products for customer view"""
+    return products_panel(tenant, shared_metrics(tenant))
+
 @app.post("/api/store/update")
-async def update_store(request: StoreUpdateRequest):
+async def update_store(request: StoreUpdateRequest, tenant: TenantState = Depends(get_tenant)):
     """Update store settings"""
-    global LIVE_STORE
+    async with tenant.lock:
+        return apply_store_update(tenant, request)
+
+def apply_store_update(tenant: TenantState, request: StoreUpdateRequest) -> dict:
+    """Apply a store update action to one tenant's store"""
     
     if request.action == "flash_sale":
         discount = request.discount or 20
         category = request.category or "drinks"
         
-        for product in LIVE_STORE["products"]:
+        for product in tenant.store["products"]:
             if product["category"] == category:
                 if not product["sale"]:
                     product["originalPrice"] = product["price"]
@@ -640,67 +1361,67 @@ async def update_store(request: StoreUpdateRequest):
                     product["sale"] = True
                     product["discount"] = discount
         
-        LIVE_STORE["flash_sale"] = {
+        tenant.store["flash_sale"] = {
             "active": True,
             "discount": discount,
             "category": category
         }
-        add_activity("store", f"Flash sale activated: {discount}% off {category}", "info")
+        add_activity(tenant, "store", f"Flash sale activated: {discount}% off {category}", "info")
         
     elif request.action == "feature":
         item_ids = request.items or []
-        for product in LIVE_STORE["products"]:
+        for product in tenant.store["products"]:
             product["featured"] = product["id"] in item_ids
-        add_activity("store", f"Featured items updated", "info")
+        add_activity(tenant, "store", f"Featured items updated", "info")
             
     elif request.action == "price_increase":
         amount = request.amount or 10
         category = request.category
-        for product in LIVE_STORE["products"]:
+        for product in tenant.store["products"]:
             if not category or product["category"] == category:
                 product["price"] = round(product["price"] * (1 + amount / 100), 2)
-        add_activity("store", f"Prices increased by {amount}%", "warning")
+        add_activity(tenant, "store", f"Prices increased by {amount}%", "warning")
                 
     elif request.action == "price_decrease":
         amount = request.amount or 10
         category = request.category
-        for product in LIVE_STORE["products"]:
+        for product in tenant.store["products"]:
             if not category or product["category"] == category:
                 product["price"] = round(product["price"] * (1 - amount / 100), 2)
-        add_activity("store", f"Prices decreased by {amount}%", "info")
+        add_activity(tenant, "store", f"Prices decreased by {amount}%", "info")
     
     elif request.action == "happy_hour":
         # Special happy hour pricing on drinks
-        for product in LIVE_STORE["products"]:
+        for product in tenant.store["products"]:
             if product["category"] == "drinks":
                 if not product["sale"]:
                     product["originalPrice"] = product["price"]
                     product["price"] = round(product["price"] * 0.5, 2)
                     product["sale"] = True
                     product["discount"] = 50
-        LIVE_STORE["flash_sale"] = {
+        tenant.store["flash_sale"] = {
             "active": True,
             "discount": 50,
             "category": "drinks",
             "reason": "happy_hour"
         }
-        add_activity("store", "🍹 Happy Hour activated: 50% off drinks!", "info")
+        add_activity(tenant, "store", "🍹 Happy Hour activated: 50% off drinks!", "info")
     
     elif request.action == "combo_deal":
         # Create combo deal banner
-        LIVE_STORE["combo_deal"] = {
+        tenant.store["combo_deal"] = {
             "active": True,
             "name": "Family Combo",
             "description": "2 Burgers + 2 Drinks + Fries = $29.99",
             "price": 29.99,
             "savings": 12
         }
-        add_activity("store", "🎉 New combo deal launched!", "info")
+        add_activity(tenant, "store", "🎉 New combo deal launched!", "info")
     
     elif request.action == "seasonal_menu":
         # Add seasonal item
         seasonal_item = {
-            "id": len(LIVE_STORE["products"]) + 1,
+            "id": len(tenant.store["products"]) + 1,
             "name": "Seasonal Special",
             "price": 15.99,
             "originalPrice": None,
@@ -711,71 +1432,88 @@ async def update_store(request: StoreUpdateRequest):
             "discount": 0,
             "seasonal": True
         }
-        LIVE_STORE["products"].append(seasonal_item)
-        add_activity("store", "🌟 Seasonal menu item added!", "info")
+        tenant.store["products"].append(seasonal_item)
+        add_activity(tenant, "store", "🌟 Seasonal menu item added!", "info")
     
     elif request.action == "loyalty_promo":
         # Loyalty promotion
-        LIVE_STORE["loyalty_promo"] = {
+        tenant.store["loyalty_promo"] = {
             "active": True,
             "bonus_points": 2,  # 2x points
             "message": "Double Points Weekend!"
         }
-        add_activity("store", "🎁 Loyalty promotion activated: 2x points!", "info")
+        add_activity(tenant, "store", "🎁 Loyalty promotion activated: 2x points!", "info")
     
     elif request.action == "banner_update":
         # Update store banner/announcement
         message = request.category or "Welcome to our store!"
-        LIVE_STORE["banner"] = {
+        tenant.store["banner"] = {
             "active": True,
             "message": message,
             "type": "info"
         }
-        add_activity("store", f"📢 Banner updated: {message}", "info")
+        add_activity(tenant, "store", f"📢 Banner updated: {message}", "info")
     
     elif request.action == "end_sale":
         # End all sales and restore prices
-        for product in LIVE_STORE["products"]:
+        for product in tenant.store["products"]:
             if product["sale"] and product["originalPrice"]:
                 product["price"] = product["originalPrice"]
                 product["originalPrice"] = None
                 product["sale"] = False
                 product["discount"] = 0
-        LIVE_STORE["flash_sale"] = { "active": False, "discount": 0, "category": None }
-        add_activity("store", "All sales ended, prices restored", "info")
+        tenant.store["flash_sale"] = { "active": False, "discount": 0, "category": None }
+        add_activity(tenant, "store", "All sales ended, prices restored", "info")
         
     elif request.action == "reset":
-        LIVE_STORE["products"] = [
-            { "id": 1, "name": "Classic Burger", "price": 12.99, "originalPrice": None, "category": "mains", "image": "🍔", "featured": False, "sale": False, "discount": 0 },
-            { "id": 2, "name": "Buffalo Wings", "price": 14.99, "originalPrice": None, "category": "appetizers", "image": "🍗", "featured": True, "sale": False, "discount": 0 },
-            { "id": 3, "name": "Veggie Power Bowl", "price": 11.99, "originalPrice": None, "category": "healthy", "image": "🥗", "featured": False, "sale": False, "discount": 0 },
-            { "id": 4, "name": "Loaded Fries", "price": 6.99, "originalPrice": None, "category": "sides", "image": "🍟", "featured": False, "sale": False, "discount": 0 },
-            { "id": 5, "name": "Iced Lemonade", "price": 4.99, "originalPrice": None, "category": "drinks", "image": "🍋", "featured": False, "sale": False, "discount": 0 },
-            { "id": 6, "name": "Craft Cola", "price": 3.99, "originalPrice": None, "category": "drinks", "image": "🥤", "featured": False, "sale": False, "discount": 0 },
-            { "id": 7, "name": "Spicy Chicken Sandwich", "price": 13.99, "originalPrice": None, "category": "mains", "image": "🌶️", "featured": True, "sale": False, "discount": 0 },
-            { "id": 8, "name": "Chocolate Shake", "price": 5.99, "originalPrice": None, "category": "drinks", "image": "🍫", "featured": False, "sale": False, "discount": 0 },
-            { "id": 9, "name": "Garden Salad", "price": 8.99, "originalPrice": None, "category": "healthy", "image": "🥬", "featured": False, "sale": False, "discount": 0 },
-        ]
-        LIVE_STORE["flash_sale"] = { "active": False, "discount": 0, "category": None }
-        LIVE_STORE["combo_deal"] = None
-        LIVE_STORE["loyalty_promo"] = None
-        LIVE_STORE["banner"] = None
-        add_activity("store", "Store reset to defaults", "info")
+        tenant.store["products"] = default_products()
+        tenant.store["flash_sale"] = { "active": False, "discount": 0, "category": None }
+        tenant.store["combo_deal"] = None
+        tenant.store["loyalty_promo"] = None
+        tenant.store["banner"] = None
+        add_activity(tenant, "store", "Store reset to defaults", "info")
     
     return {
         "success": True,
         "message": f"Store updated: {request.action}",
-        "store": LIVE_STORE
+        "store": tenant.store
     }
 
 # ============ ORDER ENDPOINTS ============
 
 @app.post("/api/orders/create")
-async def create_order(request: CreateOrderRequest):
-    """Create a new order"""
-    global LIVE_ORDERS, LIVE_INVENTORY
-    
-    order_id = len(LIVE_ORDERS) + 1000 + random.randint(1, 100)
+async def create_order(
+    request: CreateOrderRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    tenant: TenantState = Depends(get_tenant)
+):
+    """Create a new order. Retries with the same Idempotency-Key replay the original response."""
+    async with tenant.lock:
+        fingerprint = None
+        if idempotency_key:
+            fingerprint = request_fingerprint(request.dict())
+            previous = tenant.order_idempotency.get(idempotency_key)
+            if previous:
+                previous_fingerprint, previous_response = previous
+                if previous_fingerprint != fingerprint:
+                    raise HTTPException(
+                        status_code=422,
+                        detail="Idempotency-Key was already used with a different request body"
+                    )
+                response.headers["Idempotent-Replayed"] = "true"
+                return copy.deepcopy(previous_response)
+        
+        result = place_order(tenant, request)
+        
+        if idempotency_key:
+            tenant.order_idempotency.put(idempotency_key, fingerprint, result)
+        
+        return result
+
+def place_order(tenant: TenantState, request: CreateOrderRequest) -> dict:
+    """Record an order and update sales counters and inventory"""
+    order_id = next(tenant.order_ids)
     
     order = {
         "order_id": order_id,
@@ -786,11 +1524,16 @@ async def create_order(request: CreateOrderRequest):
         "status": "completed"
     }
     
-    LIVE_ORDERS.append(order)
+    tenant.add_order(order)
+    tenant.sales_window.record(
+        datetime.now(),
+        request.total,
+        [(item.name, item.quantity) for item in request.items]
+    )
     
     # Update inventory
     for item in request.items:
-        for inv_item in LIVE_INVENTORY:
+        for inv_item in tenant.inventory:
             if "Burger" in item.name and "Burger" in inv_item["item_name"]:
                 inv_item["stock_level"] = max(0, inv_item["stock_level"] - item.quantity)
             elif "Wing" in item.name and "Wing" in inv_item["item_name"]:
@@ -798,12 +1541,12 @@ async def create_order(request: CreateOrderRequest):
             elif "Fries" in item.name and "Fries" in inv_item["item_name"]:
                 inv_item["stock_level"] = max(0, inv_item["stock_level"] - item.quantity * 0.2)
     
-    add_activity("order", f"New order #{order_id}: ${request.total:.2f}", "info")
+    add_activity(tenant, "order", f"New order #{order_id}: ${request.total:.2f}", "info")
     
     # Check for low inventory alerts
-    for inv_item in LIVE_INVENTORY:
+    for inv_item in tenant.inventory:
         if inv_item["stock_level"] <= inv_item["reorder_point"]:
-            add_activity("inventory", f"Low stock alert: {inv_item['item_name']}", "warning")
+            add_activity(tenant, "inventory", f"Low stock alert: {inv_item['item_name']}", "warning")
     
     return {
         "success": True,
@@ -812,57 +1555,36 @@ async def create_order(request: CreateOrderRequest):
     }
 
 @app.get("/api/data/orders")
-async def get_orders():
+async def get_orders(tenant: TenantState = Depends(get_tenant)):
     """Get all live orders"""
     return {
         "success": True,
-        "data": LIVE_ORDERS,
-        "count": len(LIVE_ORDERS)
+        "data": tenant.orders,
+        "count": len(tenant.orders)
     }
 
 # ============ ANALYTICS ENDPOINTS ============
 
 @app.get("/api/data/analytics")
-async def get_analytics():
-    """Get live analytics"""
-    total_orders = len(LIVE_ORDERS)
-    total_revenue = sum(order.get("total_amount", 0) for order in LIVE_ORDERS)
-    profit_margin = 29 if total_revenue > 0 else 0
-    
-    return {
-        "success": True,
-        "revenue": f"${total_revenue:,.2f}",
-        "revenue_raw": total_revenue,
-        "orders": total_orders,
-        "profit_margin": f"{profit_margin}%",
-        "active_staff": len([s for s in LIVE_STAFF if s["status"] == "active"]),
-        "avg_order_value": f"${total_revenue / total_orders:.2f}" if total_orders > 0 else "$0.00",
-        "compliance_score": COMPLIANCE_DATA["score"]
-    }
+async def get_analytics(window: Optional[str] = None, tenant: TenantState = Depends(get_tenant)):
+    """Get live analytics, optionally for a recent window (15m, 1h, today)"""
+    return analytics_panel(tenant, shared_metrics(tenant), window)
 
 @app.get("/api/data/inventory")
-async def get_inventory():
+async def get_inventory(tenant: TenantState = Depends(get_tenant)):
     """Get live inventory"""
-    return {
-        "success": True,
-        "data": LIVE_INVENTORY,
-        "count": len(LIVE_INVENTORY)
-    }
+    return inventory_panel(tenant, shared_metrics(tenant))
 
 @app.get("/api/data/staff")
-async def get_staff():
+async def get_staff(tenant: TenantState = Depends(get_tenant)):
     """Get staff data"""
-    return {
-        "success": True,
-        "data": LIVE_STAFF,
-        "count": len(LIVE_STAFF)
-    }
+    return staff_panel(tenant, shared_metrics(tenant))
 
 @app.get("/api/data/reviews")
-async def get_reviews():
+async def get_reviews(tenant: TenantState = Depends(get_tenant)):
     """Get customer reviews"""
     reviews = []
-    for i, order in enumerate(LIVE_ORDERS[-5:]):
+    for i, order in enumerate(tenant.orders[-5:]):
         reviews.append({
             "id": i + 1,
             "customer": order.get("customer_name", "Customer"),
@@ -884,41 +1606,30 @@ async def get_reviews():
     }
 
 @app.get("/api/data/activity")
-async def get_activity():
+async def get_activity(tenant: TenantState = Depends(get_tenant)):
     """Get activity feed"""
-    return {
-        "success": True,
-        "data": ACTIVITY_FEED[:20],
-        "count": len(ACTIVITY_FEED)
-    }
+    return activity_panel(tenant, shared_metrics(tenant))
 
 # ============ COMPLIANCE ENDPOINTS ============
 
 @app.get("/api/compliance")
-async def get_compliance():
+async def get_compliance(tenant: TenantState = Depends(get_tenant)):
     """Get compliance data and reports"""
-    return {
-        "success": True,
-        "score": COMPLIANCE_DATA["score"],
-        "reports": COMPLIANCE_DATA["reports"][:20],
-        "incidents": COMPLIANCE_DATA["incidents"][:10],
-        "last_updated": COMPLIANCE_DATA["last_updated"]
-    }
+    return compliance_panel(tenant, shared_metrics(tenant))
 
 @app.get("/api/compliance/score")
-async def get_compliance_score():
+async def get_compliance_score(tenant: TenantState = Depends(get_tenant)):
     """Get just the compliance score"""
     return {
         "success": True,
-        "score": COMPLIANCE_DATA["score"]
+        "score": tenant.compliance["score"]
     }
 
 # ============ CRISIS ENDPOINTS ============
 
 @app.post("/api/crisis/check-emails")
-async def check_emails():
+async def check_emails(tenant: TenantState = Depends(get_tenant)):
     """Check for UNREAD crisis emails - only processes new emails"""
-    global PROCESSED_EMAIL_IDS
     
     print("\n" + "="*50)
     print("[EMAIL CHECK] Starting email scan...")
@@ -1028,7 +1739,7 @@ async def check_emails():
             
             msg_id = msg.get("id", msg.get("messageId", msg.get("message_id", ""))) if isinstance(msg, dict) else ""
             
-            if msg_id in PROCESSED_EMAIL_IDS:
+            if msg_id in tenant.processed_email_ids:
                 print(f"[EMAIL CHECK] Skipping already processed: {msg_id}")
                 continue
                 
@@ -1089,7 +1800,7 @@ async def check_emails():
                 crisis["message_id"] = msg_id
                 crises_found.append(crisis)
             
-            PROCESSED_EMAIL_IDS.add(msg_id)
+            tenant.mark_email_processed(msg_id)
         
         if crises_found:
             crises_found.sort(
@@ -1106,7 +1817,7 @@ async def check_emails():
             except:
                 pass
             
-            add_activity("crisis", f"🚨 Crisis detected: {crisis['type']}", "error")
+            add_activity(tenant, "crisis", f"🚨 Crisis detected: {crisis['type']}", "error")
             
             return {
                 "success": True,
@@ -1142,14 +1853,13 @@ async def check_emails():
 
 @app.post("/api/crisis/reset-processed")
 @app.post("/api/crisis/reset-emails")
-async def reset_processed_emails():
+async def reset_processed_emails(tenant: TenantState = Depends(get_tenant)):
     """Reset processed email cache"""
-    global PROCESSED_EMAIL_IDS
-    PROCESSED_EMAIL_IDS = set()
+    tenant.processed_email_ids.clear()
     return {"success": True, "message": "Processed email cache cleared"}
 
 @app.post("/api/crisis/respond-email")
-async def respond_to_email(request: EmailCrisisRequest):
+async def respond_to_email(request: EmailCrisisRequest, tenant: TenantState = Depends(get_tenant)):
     """Send response email"""
     try:
         response_content = request.email_content or "Thank you for your message. We are addressing this matter."
@@ -1162,8 +1872,8 @@ async def respond_to_email(request: EmailCrisisRequest):
             "body": response_content
         })
         
-        if result:
-            add_activity("email", f"Response sent to {recipient}", "info")
+        if result and not result.get("error"):
+            add_activity(tenant, "email", f"Response sent to {recipient}", "info")
             return {
                 "success": True,
                 "message": "Response email sent",
@@ -1171,18 +1881,16 @@ async def respond_to_email(request: EmailCrisisRequest):
                 "subject": subject
             }
         else:
-            return {"success": False, "error": "Failed to send email"}
+            return {"success": False, "error": str((result or {}).get("error", "Failed to send email"))}
                 
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post("/api/crisis/process-full")
-async def process_full_crisis():
-    """Full crisis workflow with interconnected actions"""
-    global AUTOMATION_LOG
-    
+async def process_full_crisis(tenant: TenantState = Depends(get_tenant)):
+    """Detect a crisis and queue its automations and reply email as a background job"""
     try:
-        email_check = await check_emails()
+        email_check = await check_emails(tenant)
         
         if not email_check.get("success"):
             return email_check
@@ -1196,52 +1904,16 @@ async def process_full_crisis():
             }
         
         crisis = email_check.get("crisis")
-        automations_to_run = crisis.get("automations", [])
-        store_actions = crisis.get("store_actions", [])
-        compliance_impact = crisis.get("compliance_impact", 0)
-        
-        automation_results = []
-        for automation_name in automations_to_run:
-            result = await execute_single_automation(automation_name, crisis)
-            automation_results.append(result)
-            
-            AUTOMATION_LOG.append({
-                "crisis_type": crisis.get("type"),
-                "automation": automation_name,
-                "result": result,
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        store_results = []
-        for action in store_actions:
-            store_result = execute_store_action(action, crisis)
-            if store_result:
-                store_results.append(store_result)
-        
-        update_compliance_score(compliance_impact, f"Crisis: {crisis.get('type')}")
-        
-        incident = add_compliance_incident(crisis, [a["name"] for a in automation_results])
-        
-        response_content = generate_crisis_response(crisis, automation_results)
-        
-        email_response = await respond_to_email(EmailCrisisRequest(
-            email_content=response_content,
-            sender=crisis.get("email_sender"),
-            subject=crisis.get("email_subject")
-        ))
-        
-        add_activity("crisis", f"✅ Crisis resolved: {crisis.get('type')}", "success")
+        job_id = await JOB_QUEUE.enqueue("crisis_automations", {"tenant_id": tenant.tenant_id, "crisis": crisis})
+        add_activity(tenant, "crisis", f"⏳ Crisis response queued: {crisis.get('type')}", "info")
         
         return {
             "success": True,
+            "crisis_detected": True,
             "crisis": crisis,
-            "automations_executed": len(automation_results),
-            "automation_results": automation_results,
-            "store_actions_executed": store_results,
-            "compliance_impact": compliance_impact,
-            "new_compliance_score": COMPLIANCE_DATA["score"],
-            "incident_id": incident["id"],
-            "email_sent": email_response.get("success", False),
+            "job_id": job_id,
+            "job_status": "queued",
+            "status_url": f"/api/jobs/{job_id}",
             "timestamp": datetime.now().isoformat()
         }
         
@@ -1253,41 +1925,122 @@ async def process_full_crisis():
             "traceback": traceback.format_exc()
         }
 
+@JOB_QUEUE.handler("crisis_automations")
+async def run_crisis_automations_job(payload: dict, job_id: str) -> dict:
+    """Run every automation for a crisis, apply store/compliance changes, then queue the reply
+
+    Safe to retry: nothing is written to the tenant until every step has
+    succeeded, and the job id is recorded with the changes, so a retry after
+    a failure applies them exactly once and a retry after success only
+    re-queues a reply that was never queued.
+    """
+    with TENANTS.pinned(payload.get("tenant_id", DEFAULT_TENANT_ID)) as tenant:
+        crisis = payload["crisis"]
+        
+        # The automations only read the tenant, so they run without its lock and
+        # the location keeps taking orders while they call out
+        if job_id not in tenant.completed_jobs:
+            automation_results = [
+                await execute_single_automation(tenant, name, crisis)
+                for name in crisis.get("automations", [])
+            ]
+        
+        async with tenant.lock:
+            outcome = tenant.completed_jobs.get(job_id)  # Another run of this job may have finished meanwhile
+            if outcome is None:
+                # From here to commit() nothing awaits, so the staged copy cannot miss other writes
+                staged = tenant.staged()
+                log_crisis_automations(staged, crisis, automation_results)
+                
+                store_results = []
+                for action in crisis.get("store_actions", []):
+                    store_result = execute_store_action(staged, action, crisis)
+                    if store_result:
+                        store_results.append(store_result)
+                
+                compliance_impact = crisis.get("compliance_impact", 0)
+                update_compliance_score(staged, compliance_impact, f"Crisis: {crisis.get('type')}")
+                
+                incident = add_compliance_incident(staged, crisis, [a["name"] for a in automation_results])
+                
+                add_activity(staged, "crisis", f"✅ Crisis resolved: {crisis.get('type')}", "success")
+                
+                outcome = {
+                    "tenant_id": tenant.tenant_id,
+                    "crisis_type": crisis.get("type"),
+                    "automations_executed": len(automation_results),
+                    "automation_results": automation_results,
+                    "store_actions_executed": store_results,
+                    "compliance_impact": compliance_impact,
+                    "new_compliance_score": staged.compliance["score"],
+                    "incident_id": incident["id"]
+                }
+                tenant.commit(staged, job_id, outcome)
+            
+            # The reply goes through its own job so a slow or failing email API
+            # retries on its own without re-running the automations
+            if "reply_job_id" not in outcome:
+                outcome["reply_job_id"] = await JOB_QUEUE.enqueue("crisis_reply_email", {
+                    "tenant_id": tenant.tenant_id,
+                    "email_content": generate_crisis_response(crisis, outcome["automation_results"]),
+                    "sender": crisis.get("email_sender"),
+                    "subject": crisis.get("email_subject")
+                })
+            
+            return dict(outcome)
+
+@JOB_QUEUE.handler("crisis_reply_email")
+async def send_crisis_reply_job(payload: dict, job_id: str) -> dict:
+    """Send the crisis reply email; raising makes the queue retry with backoff"""
+    payload = dict(payload)
+    with TENANTS.pinned(payload.pop("tenant_id", DEFAULT_TENANT_ID)) as tenant:
+        email_response = await respond_to_email(EmailCrisisRequest(**payload), tenant)
+    if not email_response.get("success"):
+        raise RuntimeError(email_response.get("error", "Failed to send email"))
+    return email_response
+
 @app.post("/api/crisis/execute")
-async def execute_crisis(request: CrisisRequest):
+async def execute_crisis(request: CrisisRequest, tenant: TenantState = Depends(get_tenant)):
     """Execute automations for a manual crisis"""
-    global AUTOMATION_LOG
-    
     crisis = request.crisis
-    results = []
     
-    for automation_name in crisis.get("automations", []):
-        result = await execute_single_automation(automation_name, crisis)
-        results.append(result)
+    async with tenant.lock:
+        results = await run_crisis_automations(tenant, crisis)
         
-        AUTOMATION_LOG.append({
-            "crisis_type": crisis.get("type"),
-            "automation": automation_name,
-            "result": result,
-            "timestamp": datetime.now().isoformat()
-        })
-    
-    compliance_impact = crisis.get("compliance_impact", -5)
-    update_compliance_score(compliance_impact, f"Crisis: {crisis.get('type')}")
-    
-    add_activity("crisis", f"Crisis handled: {crisis.get('type')}", "warning")
+        compliance_impact = crisis.get("compliance_impact", -5)
+        update_compliance_score(tenant, compliance_impact, f"Crisis: {crisis.get('type')}")
+        
+        add_activity(tenant, "crisis", f"Crisis handled: {crisis.get('type')}", "warning")
     
     return {
         "success": True,
         "crisis": crisis,
         "automations_executed": len(results),
         "results": results,
-        "compliance_score": COMPLIANCE_DATA["score"]
+        "compliance_score": tenant.compliance["score"]
     }
 
-async def execute_single_automation(automation_name: str, crisis: dict) -> dict:
+async def run_crisis_automations(tenant: TenantState, crisis: dict) -> list:
+    """Execute and log each automation listed on a crisis"""
+    results = []
+    for automation_name in crisis.get("automations", []):
+        result = await execute_single_automation(tenant, automation_name, crisis)
+        results.append(result)
+    log_crisis_automations(tenant, crisis, results)
+    return results
+
+def log_crisis_automations(tenant: TenantState, crisis: dict, results: list):
+    """Record each executed automation in the tenant's automation log"""
+    for result in results:
+        tenant.log_automation({
+            "crisis_type": crisis.get("type"),
+            "automation": result["name"],
+            "result": result,
+            "timestamp": datetime.now().isoformat()
+        })
+
+async def execute_single_automation(tenant: TenantState, automation_name: str, crisis: dict) -> dict:
     """Execute a single automation"""
-    global LIVE_STAFF, LIVE_STORE
     
     result = {
         "name": automation_name,
@@ -1308,7 +2061,7 @@ async def execute_single_automation(automation_name: str, crisis: dict) -> dict:
         },
         "staff_alert": {
             "action": "All staff notified via SMS/Email",
-            "recipients": len(LIVE_STAFF)
+            "recipients": len(tenant.staff)
         },
         "manager_notification": {
             "action": "Manager notified immediately",
@@ -1348,7 +2101,7 @@ async def execute_single_automation(automation_name: str, crisis: dict) -> dict:
         },
         "staff_briefing": {
             "action": "Staff briefing scheduled",
-            "attendees": len(LIVE_STAFF)
+            "attendees": len(tenant.staff)
         },
         "customer_response": {
             "action": "Customer response drafted",
@@ -1382,83 +2135,56 @@ async def execute_single_automation(automation_name: str, crisis: dict) -> dict:
 # ============ INSIGHTS ENDPOINTS ============
 
 @app.get("/api/insights")
-async def get_insights():
+async def get_insights(tenant: TenantState = Depends(get_tenant)):
     """Get AI-generated insights based on all data"""
-    insights = []
-    
-    active_staff = len([s for s in LIVE_STAFF if s["status"] == "active"])
-    if active_staff < 6:
-        insights.append({
-            "type": "staffing",
-            "severity": "warning",
-            "message": f"Staff shortage detected. Only {active_staff} active staff. Consider posting job openings.",
-            "action": "Post job opening on website",
-            "action_type": "post_job"
-        })
-    
-    low_stock = [i for i in LIVE_INVENTORY if i["stock_level"] <= i["reorder_point"]]
-    for item in low_stock:
-        insights.append({
-            "type": "inventory",
-            "severity": "warning",
-            "message": f"{item['item_name']} is low ({item['stock_level']} {item['unit']})",
-            "action": "Order more supplies",
-            "action_type": "emergency_order"
-        })
-    
-    total_orders = len(LIVE_ORDERS)
-    total_revenue = sum(o.get("total_amount", 0) for o in LIVE_ORDERS)
-    
-    if total_orders > 0:
-        avg_order = total_revenue / total_orders
-        if avg_order < 15:
-            insights.append({
-                "type": "sales",
-                "severity": "info",
-                "message": f"Average order value is ${avg_order:.2f}. Consider upselling strategies.",
-                "action": "Create combo deals",
-                "action_type": "promotion"
-            })
+    return insights_panel(tenant, shared_metrics(tenant))
+
+# ============ DASHBOARD ENDPOINT ============
+
+@app.get("/api/dashboard")
+async def get_dashboard(
+    request: Request,
+    include: Optional[str] = None,
+    window: Optional[str] = None,
+    tenant: TenantState = Depends(get_tenant)
+):
+    """All dashboard panels from one state snapshot, e.g. ?include=analytics,activity"""
+    names = [n.strip() for n in include.split(",") if n.strip()] if include else list(DASHBOARD_PANELS)
+    unknown = [n for n in names if n not in DASHBOARD_PANELS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown panel(s): {', '.join(unknown)}. Available: {', '.join(DASHBOARD_PANELS)}"
+        )
     
-    if COMPLIANCE_DATA["score"] < 80:
-        insights.append({
-            "type": "compliance",
-            "severity": "error",
-            "message": f"Compliance score is {COMPLIANCE_DATA['score']}%. Immediate attention needed.",
-            "action": "Review compliance reports",
-            "action_type": "compliance_review"
-        })
+    # Holding the lock keeps a half-applied crisis job out of the snapshot
+    async with tenant.lock:
+        metrics = shared_metrics(tenant)
+        panels = {}
+        for name in names:
+            if name == "analytics":
+                panels[name] = analytics_panel(tenant, metrics, window)
+            else:
+                panels[name] = DASHBOARD_PANELS[name](tenant, metrics)
+        body = json.dumps({"success": True, "tenant_id": tenant.tenant_id, "panels": panels}, default=str)
     
-    if LIVE_STORE.get("job_postings"):
-        insights.append({
-            "type": "staffing",
-            "severity": "info",
-            "message": f"{len(LIVE_STORE['job_postings'])} active job posting(s) on website",
-            "action": "View applications",
-            "action_type": "view_jobs"
-            })
-        
-        return {
-            "success": True,
-        "insights": insights,
-        "summary": {
-            "total_insights": len(insights),
-            "warnings": len([i for i in insights if i["severity"] == "warning"]),
-            "errors": len([i for i in insights if i["severity"] == "error"])
-        }
-    }
+    etag = '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 # ============ GEMINI CHAT ENDPOINT ============
 
 @app.post("/api/chat")
-async def chat_with_gemini(request: ChatRequest):
+async def chat_with_gemini(request: ChatRequest, tenant: TenantState = Depends(get_tenant)):
     """Chat with Gemini AI using live restaurant data"""
     global gemini_model
     
-    total_orders = len(LIVE_ORDERS)
-    total_revenue = sum(o.get("total_amount", 0) for o in LIVE_ORDERS)
-    active_staff = len([s for s in LIVE_STAFF if s["status"] == "active"])
-    low_stock = [i for i in LIVE_INVENTORY if i["stock_level"] <= i["reorder_point"]]
+    metrics = shared_metrics(tenant)
+    total_orders = metrics["total_orders"]
+    total_revenue = metrics["total_revenue"]
+    active_staff = metrics["active_staff"]
+    low_stock = metrics["low_stock"]
     
     context = f"""
 You are Brew AI, an intelligent restaurant management assistant. You have access to the following LIVE data:
@@ -1467,14 +2193,14 @@ CURRENT STATUS:
 - Total Orders Today: {total_orders}
 - Total Revenue: ${total_revenue:.2f}
 - Active Staff: {active_staff}
-- Compliance Score: {COMPLIANCE_DATA['score']}%
+- Compliance Score: {tenant.compliance['score']}%
 - Low Stock Items: {', '.join([i['item_name'] for i in low_stock]) if low_stock else 'None'}
 
 RECENT ACTIVITY:
-{chr(10).join([f"- {a.get('message', '')}" for a in ACTIVITY_FEED[:5]])}
+{chr(10).join([f"- {a.get('message', '')}" for a in tenant.activity_feed[:5]])}
 
 JOB POSTINGS:
-{len(LIVE_STORE.get('job_postings', []))} active job postings
+{len(tenant.store.get('job_postings', []))} active job postings
 
 Based on this live data, answer the user's question helpfully. Be specific with numbers and recommendations.
 If they ask about actions you can take, mention: flash sales, price changes, featuring items, happy hour, combo deals, seasonal menus, loyalty promos, and banners.
@@ -1492,7 +2218,7 @@ User's message: {request.message}
                     "orders": total_orders,
                     "revenue": total_revenue,
                     "staff": active_staff,
-                    "compliance": COMPLIANCE_DATA["score"]
+                    "compliance": tenant.compliance["score"]
                 }
             }
         except Exception as e:
@@ -1500,74 +2226,70 @@ User's message: {request.message}
                 "success": False,
                 "error": str(e),
                 "fallback": True,
-                "response": generate_fallback_response(request.message)
+                "response": generate_fallback_response(tenant, request.message)
             }
     else:
         return {
             "success": True,
-            "response": generate_fallback_response(request.message),
+            "response": generate_fallback_response(tenant, request.message),
             "gemini_configured": False,
             "live_data": {
                 "orders": total_orders,
                 "revenue": total_revenue,
                 "staff": active_staff,
-                "compliance": COMPLIANCE_DATA["score"]
+                "compliance": tenant.compliance["score"]
             }
         }
 
-def generate_fallback_response(message: str) -> str:
+def generate_fallback_response(tenant: TenantState, message: str) -> str:
     """Generate response without Gemini API"""
     msg_lower = message.lower()
-    total_orders = len(LIVE_ORDERS)
-    total_revenue = sum(o.get("total_amount", 0) for o in LIVE_ORDERS)
-    active_staff = len([s for s in LIVE_STAFF if s["status"] == "active"])
+    metrics = shared_metrics(tenant)
+    total_orders = metrics["total_orders"]
+    total_revenue = metrics["total_revenue"]
+    active_staff = metrics["active_staff"]
     
     if 'sales' in msg_lower or 'revenue' in msg_lower:
         return f"📊 Live Stats: ${total_revenue:.2f} revenue from {total_orders} orders today. Profit margin is around 29%. I recommend featuring top sellers or running a flash sale to boost numbers!"
     
     if 'inventory' in msg_lower or 'stock' in msg_lower:
-        low_stock = [i for i in LIVE_INVENTORY if i["stock_level"] <= i["reorder_point"]]
+        low_stock = metrics["low_stock"]
         if low_stock:
             return f"⚠️ Inventory Alert: {len(low_stock)} items low on stock: {', '.join([i['item_name'] for i in low_stock])}. I recommend placing an emergency order."
-        return f"✅ Inventory levels healthy! {len(LIVE_INVENTORY)} items tracked, all above reorder points."
+        return f"✅ Inventory levels healthy! {len(tenant.inventory)} items tracked, all above reorder points."
     
     if 'staff' in msg_lower:
         return f"👥 Staff Status: {active_staff} staff members active. {'Adequate for current volume.' if active_staff >= 6 else 'Consider hiring - we are understaffed!'}"
     
     if 'compliance' in msg_lower:
-        return f"📋 Compliance Score: {COMPLIANCE_DATA['score']}%. {'Excellent standing!' if COMPLIANCE_DATA['score'] >= 80 else 'Needs improvement - review recent incidents.'}"
+        return f"📋 Compliance Score: {tenant.compliance['score']}%. {'Excellent standing!' if tenant.compliance['score'] >= 80 else 'Needs improvement - review recent incidents.'}"
     
-    return f"📊 Current Status: {total_orders} orders (${total_revenue:.2f}), {active_staff} staff, {COMPLIANCE_DATA['score']}% compliance. What would you like to know more about?"
+    return f"📊 Current Status: {total_orders} orders (${total_revenue:.2f}), {active_staff} staff, {tenant.compliance['score']}% compliance. What would you like to know more about?"
 
 # ============ AGENT MODE ENDPOINTS ============
 
 @app.get("/api/agent/status")
-async def get_agent_status():
+async def get_agent_status(tenant: TenantState = Depends(get_tenant)):
     """Get current agent mode status"""
-    return {
-        "success": True,
-        "agent_mode": AGENT_MODE,
-        "email_monitoring": AUTO_EMAIL_MONITORING
-    }
+    return agent_panel(tenant, shared_metrics(tenant))
 
 @app.post("/api/agent/mode")
-async def set_agent_mode(request: AgentModeRequest):
+async def set_agent_mode(request: AgentModeRequest, tenant: TenantState = Depends(get_tenant)):
     """Enable/disable agent mode"""
-    global AGENT_MODE
-    AGENT_MODE["enabled"] = request.enabled
-    AGENT_MODE["auto_apply_insights"] = request.auto_apply_insights
+    tenant.agent_mode["enabled"] = request.enabled
+    tenant.agent_mode["auto_apply_insights"] = request.auto_apply_insights
     
-    add_activity("system", f"Agent mode {'enabled' if request.enabled else 'disabled'}", "info")
+    add_activity(tenant, "system", f"Agent mode {'enabled' if request.enabled else 'disabled'}", "info")
     
     return {
         "success": True,
-        "agent_mode": AGENT_MODE
+        "agent_mode": tenant.agent_mode
     }
 
 @app.post("/api/agent/auto-apply")
-async def auto_apply_insight(request: StoreActionRequest):
+async def auto_apply_insight(request: StoreActionRequest, tenant: TenantState = Depends(get_tenant)):
     """Auto-apply an insight recommendation to the store"""
-    if not AGENT_MODE.get("enabled"):
+    if not tenant.agent_mode.get("enabled"):
         return {
             "success": False,
             "error": "Agent mode is not enabled",
@@ -1582,9 +2304,9 @@ async def auto_apply_insight(request: StoreActionRequest):
         amount=request.params.get("amount") if request.params else None
     )
     
-    result = await update_store(store_update)
+    result = await update_store(store_update, tenant)
     
-    add_activity("agent", f"🤖 Auto-applied: {request.action}", "info")
+    add_activity(tenant, "agent", f"🤖 Auto-applied: {request.action}", "info")
     
     return {
         "success": True,
@@ -1634,34 +2356,191 @@ async def scrape_url(request: ScrapeRequest):
         
         return response.json()
 
+# ============ FORECAST ENDPOINTS ============
+
+# One warm LSTM worker process shared by every request; concurrent forecasts are batched
+FORECAST_SERVER = ForecastServer(workdir=str(PROJECT_ROOT))
+FORECAST_TIMEOUT = float(os.getenv("FORECAST_TIMEOUT", "10"))
+FORECAST_MAX_HOURS = 168
+
+@app.get("/api/forecast")
+async def get_forecast(hours: int = 24):
+    """Hourly order forecast from the forecast server (served from the forecast store when current)"""
+    if not 1 <= hours <= FORECAST_MAX_HOURS:
+        raise HTTPException(status_code=400, detail=f"hours must be between 1 and {FORECAST_MAX_HOURS}")
+    try:
+        forecast = await FORECAST_SERVER.forecast("data/orders_realtime.csv", hours, timeout=FORECAST_TIMEOUT)
+    except ForecastTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=502, detail=f"Forecast failed: {e}")
+    return {
+        "success": True,
+        "data": forecast
+    }
+
+@app.get("/api/forecast/server")
+async def get_forecast_server():
+    """Forecast server stats: requests, batches, mean batch size, timeouts"""
+    return {
+        "success": True,
+        "data": FORECAST_SERVER.summary()
+    }
+
+@app.on_event("shutdown")
+async def stop_forecast_server():
+    await asyncio.get_running_loop().run_in_executor(None, FORECAST_SERVER.close)
+
+# ============ TRAINING ENDPOINTS ============
+
+# Training runs in its own process per job; status and logs persist under models/training_jobs
+TRAINING_JOBS = TrainingJobRunner(workdir=str(PROJECT_ROOT))
+
+@app.post("/api/training/jobs")
+async def start_training_job(request: TrainingJobRequest):
+    """Start a background training job (one running job per model)"""
+    params = {k: v for k, v in {"epochs": request.epochs, "batch_size": request.batch_size}.items() if v}
+    try:
+        job = TRAINING_JOBS.start(request.kind, params, budget_seconds=request.budget_seconds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "success": True,
+        "job": job
+    }
+
+@app.get("/api/training/jobs")
+async def list_training_jobs(model: Optional[str] = None, limit: int = 20):
+    """Recent training jobs, newest first"""
+    jobs = TRAINING_JOBS.list(model=model, limit=limit)
+    return {
+        "success": True,
+        "data": jobs,
+        "count": len(jobs)
+    }
+
+@app.get("/api/training/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    """Status, per-epoch progress and result of a training job"""
+    job = TRAINING_JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return {
+        "success": True,
+        "job": job
+    }
+
+@app.get("/api/training/jobs/{job_id}/log")
+async def get_training_log(job_id: str, offset: int = 0):
+    """Training log from a byte offset; poll with the returned offset to follow it"""
+    if not TRAINING_JOBS.get(job_id):
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    return {
+        "success": True,
+        **TRAINING_JOBS.log(job_id, offset)
+    }
+
+@app.post("/api/training/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    """Stop a running training job; a cancelled model is never registered or promoted"""
+    if not TRAINING_JOBS.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Training job {job_id} is not running")
+    return {
+        "success": True,
+        "job": TRAINING_JOBS.get(job_id)
+    }
+
+# ============ JOB ENDPOINTS ============
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Re-queue interrupted jobs and start the background workers"""
+    recovered = await JOB_QUEUE.recover()
+    if recovered:
+        print(f"[JOBS] Re-queued {recovered} interrupted job(s)")
+    for _ in range(JOB_WORKERS):
+        JOB_WORKER_TASKS.append(asyncio.create_task(JOB_QUEUE.worker()))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in JOB_WORKER_TASKS:
+        task.cancel()
+    JOB_WORKER_TASKS.clear()
+
+@app.get("/api/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """List recent background jobs, e.g. ?status=dead for the dead-letter queue"""
+    jobs = await JOB_QUEUE.list(status=status, limit=limit)
+    return {
+        "success": True,
+        "data": jobs,
+        "count": len(jobs)
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status, attempts and result of a background job"""
+    job = await JOB_QUEUE.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {
+        "success": True,
+        "job": job
+    }
+
+@app.post("/api/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """Re-queue a dead-lettered job"""
+    if not await JOB_QUEUE.retry(job_id):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is not in the dead-letter queue")
+    return {
+        "success": True,
+        "job": await JOB_QUEUE.get(job_id)
+    }
+
 # ============ AUTOMATION LOG ============
 
 @app.get("/api/automations/log")
-async def get_automation_log():
+async def get_automation_log(tenant: TenantState = Depends(get_tenant)):
     """Get automation log"""
     return {
         "success": True,
-        "data": AUTOMATION_LOG,
-        "count": len(AUTOMATION_LOG)
+        "data": tenant.automation_log,
+        "count": len(tenant.automation_log)
     }
 
 # ============ HEALTH CHECK ============
 
 @app.get("/")
-async def root():
+async def root(tenant: TenantState = Depends(get_tenant)):
+    summary = tenant.summary()
     return {
         "app": "Brew.AI v4 API",
         "status": "running",
+        "tenant_id": tenant.tenant_id,
         "live_data": {
-            "orders": len(LIVE_ORDERS),
-            "products": len(LIVE_STORE["products"]),
-            "inventory_items": len(LIVE_INVENTORY),
-            "staff": len(LIVE_STAFF),
-            "compliance_score": COMPLIANCE_DATA["score"],
-            "automation_executions": len(AUTOMATION_LOG)
+            "orders": summary["orders"],
+            "products": summary["products"],
+            "inventory_items": summary["inventory_items"],
+            "staff": summary["staff"],
+            "compliance_score": summary["compliance_score"],
+            "automation_executions": summary["automation_executions"]
         }
     }
 
+@app.get("/api/tenants")
+async def list_tenants():
+    """List tenants currently loaded in memory (least recently used first)"""
+    return {
+        "success": True,
+        "data": [tenant.summary() for tenant in TENANTS.tenants.values()],
+        "count": len(TENANTS.tenants),
+        "max_tenants": TENANTS.max_tenants,
+        "limits": TENANT_LIMITS
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,64 @@
+"""
+Backtest All Forecasters
+Rolling-origin evaluation with accuracy, training time, latency and peak memory per model
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.backtest import run_backtest, compare_to_previous, BACKTEST_DIR
+from services.forecast_models import FORECAST_MODELS
+
+
+def main():
+    """Run the backtest, print the results table and flag regressions against the last run."""
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the forecast models")
+    parser.add_argument("--csv", default="data/orders_realtime.csv")
+    parser.add_argument("--models", nargs="+", default=list(FORECAST_MODELS), choices=list(FORECAST_MODELS))
+    parser.add_argument("--horizon", type=int, default=24)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--step", type=int, default=None, help="Hours between origins (default: horizon)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--epochs", type=int, default=40, help="Epochs for the LSTM models")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="MAE increase flagged as a regression")
+    parser.add_argument("--output-dir", default=BACKTEST_DIR)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FORECAST MODEL BACKTEST")
+    print("=" * 60)
+    print()
+
+    lstm_params = {"epochs": args.epochs}
+    result = run_backtest(
+        args.csv, args.models, horizon=args.horizon, folds=args.folds, step=args.step,
+        workers=args.workers, output_dir=args.output_dir,
+        model_params={"agent_lstm": lstm_params, "lstm": lstm_params, "lstm_direct": lstm_params}
+    )
+    if not result['success']:
+        print(f"[ERROR] Backtest failed: {result.get('error')}")
+        return 1
+
+    print()
+    columns = ['model', 'folds', 'mae', 'rmse', 'mape', 'train_seconds', 'latency_ms', 'peak_memory_mb']
+    print(result['summary'][columns].to_string(index=False))
+    print()
+
+    failed = result['folds'][~result['folds']['success']]
+    for _, row in failed.iterrows():
+        print(f"[WARN] {row['model']} fold {row['fold']} failed: {row['error']}")
+
+    regressions = compare_to_previous(result['summary'], args.output_dir, args.tolerance)
+    for model, change in regressions.items():
+        print(f"[REGRESSION] {model}: MAE up {change:.1%} from the previous run")
+
+    print()
+    print(f"Results: {', '.join(result['files'])} ({result['seconds']}s)")
+    print("=" * 60)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark Iterative vs Direct LSTM Forecasting
+Compares latency and accuracy of the 24-step loop and the multi-horizon head
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.lstm_forecaster import LSTMForecaster, TENSORFLOW_AVAILABLE
+
+BENCHMARK_DIR = "models/benchmark"
+
+
+def time_predict(forecaster: LSTMForecaster, history, hours_ahead: int, mode: str, runs: int):
+    """Median latency (ms) and the last result of forecaster.predict."""
+    forecaster.predict(history, hours_ahead=hours_ahead, mode=mode)  # warm-up
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = forecaster.predict(history, hours_ahead=hours_ahead, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies)), result
+
+
+def main():
+    """Train both variants on the same history and compare them on the held-out hours."""
+    parser = argparse.ArgumentParser(description="Benchmark iterative vs direct LSTM forecasts")
+    parser.add_argument("--csv", default="data/orders_realtime.csv")
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--epochs", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LSTM FORECAST BENCHMARK: ITERATIVE vs DIRECT")
+    print("=" * 60)
+    print()
+
+    if not TENSORFLOW_AVAILABLE:
+        print("[ERROR] TensorFlow not available")
+        return 1
+
+    # Fresh models in their own directory so the benchmark never overwrites production ones
+    forecaster = LSTMForecaster(horizon=args.hours)
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    forecaster.model = forecaster._build_model()
+    forecaster.direct_model, forecaster.direct_scaler = None, None
+    forecaster.horizon = args.hours
+    forecaster.model_path = os.path.join(BENCHMARK_DIR, "lstm_iterative.h5")
+    forecaster.scaler_path = os.path.join(BENCHMARK_DIR, "scaler_iterative.pkl")
+    forecaster.direct_model_path = os.path.join(BENCHMARK_DIR, "lstm_direct.h5")
+    forecaster.direct_scaler_path = os.path.join(BENCHMARK_DIR, "scaler_direct.pkl")
+    forecaster.numpy_path = os.path.join(BENCHMARK_DIR, "lstm_iterative.npz")
+    forecaster.direct_numpy_path = os.path.join(BENCHMARK_DIR, "lstm_direct.npz")
+
+    data = forecaster.prepare_data_from_csv(args.csv)
+
+    # Hold out the last `hours` for scoring
+    history, actual = data.iloc[:-args.hours], data.iloc[-args.hours:]
+    print(f"[1/3] {len(history)} hourly records for training, {len(actual)} held out")
+    print()
+
+    print("[2/3] Training both variants...")
+    for mode in ("iterative", "direct"):
+        result = forecaster.train(history.copy(), epochs=args.epochs, mode=mode)
+        if not result['success']:
+            print(f"[ERROR] {mode} training failed: {result.get('error')}")
+            return 1
+        print(f"      {mode:<10} val MAE {result['mae']:.4f}, {result['epochs_run']} epochs")
+    print()
+
+    print(f"[3/3] Forecasting {args.hours} hours ({args.runs} runs each)...")
+    print()
+    print(f"      {'mode':<10} {'latency (ms)':>14} {'MAE':>10} {'RMSE':>10}")
+    for mode, scaler in (("iterative", forecaster.scaler), ("direct", forecaster.direct_scaler)):
+        latency, result = time_predict(forecaster, history, args.hours, mode, args.runs)
+
+        # Predictions are in scaled units, so score against the scaled actuals
+        truth = scaler.transform(actual[forecaster.feature_columns].values)[:, 0]
+        errors = truth - np.array(result['future_predictions'])
+        mae = np.mean(np.abs(errors))
+        rmse = np.sqrt(np.mean(errors ** 2))
+        print(f"      {mode:<10} {latency:>14.1f} {mae:>10.4f} {rmse:>10.4f}")
+
+    print()
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Benchmark the Micro-Batching Forecast Server
+Throughput and latency as the number of concurrent callers grows, against per-caller predict()
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.forecast_server import ForecastServer
+
+
+def run_baseline(csv: str, hours: int, requests: int):
+    """Requests/s and median latency (ms) of prepare + predict in this process, one request at a time."""
+    from services.lstm_forecaster import get_lstm_forecaster
+
+    forecaster = get_lstm_forecaster()
+    forecaster.predict(forecaster.prepare_data_from_csv(csv), hours_ahead=hours)  # warm-up
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        t = time.perf_counter()
+        forecaster.predict(forecaster.prepare_data_from_csv(csv), hours_ahead=hours)
+        latencies.append((time.perf_counter() - t) * 1000)
+    return requests / (time.perf_counter() - start), float(np.median(latencies))
+
+
+async def run_level(server: ForecastServer, csv: str, hours: int, requests: int, concurrency: int):
+    """Requests/s and latency percentiles (ms) with `concurrency` callers sharing `requests` forecasts."""
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def caller():
+        for _ in remaining:
+            t = time.perf_counter()
+            await server.forecast(csv, hours, use_store=False)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+async def run_server(args) -> list:
+    server = ForecastServer(window_ms=args.window_ms)
+    await server.forecast(args.csv, args.hours, use_store=False)  # Start the worker and warm the model
+
+    rows = []
+    for concurrency in args.concurrency:
+        before = server.summary()
+        throughput, p50, p95 = await run_level(server, args.csv, args.hours, args.requests, concurrency)
+        after = server.summary()
+        batches = after["batches"] - before["batches"]
+        mean_batch = (after["answered"] - before["answered"]) / batches if batches else 0.0
+        rows.append((concurrency, throughput, p50, p95, mean_batch))
+        print(f"  {concurrency:>11} {throughput:>9.1f} {p50:>8.1f} {p95:>8.1f} {mean_batch:>10.1f}")
+    server.close()
+    return rows
+
+
+def main():
+    """Compare per-caller predict() with the batched server at increasing concurrency."""
+    parser = argparse.ArgumentParser(description="Benchmark the micro-batching forecast server")
+    parser.add_argument("--csv", default="data/orders_realtime.csv")
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--requests", type=int, default=64, help="Forecasts per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--window-ms", type=float, default=10.0, help="Micro-batch collection window")
+    parser.add_argument("--skip-baseline", action="store_true")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FORECAST SERVER BENCHMARK")
+    print("=" * 60)
+    print()
+    print(f"{args.hours}h forecasts of {args.csv}, {args.requests} per level, {args.window_ms:g} ms window")
+    print()
+
+    if not args.skip_baseline:
+        throughput, p50 = run_baseline(args.csv, args.hours, min(args.requests, 16))
+        print(f"Baseline (predict per caller, sequential): {throughput:.1f} req/s, p50 {p50:.1f} ms")
+        print()
+
+    print(f"  {'concurrency':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>10}")
+    rows = asyncio.run(run_server(args))
+    print()
+
+    speedup = rows[-1][1] / rows[0][1] if rows and rows[0][1] else 0.0
+    print(f"Throughput at {rows[-1][0]} callers is {speedup:.1f}x that of 1 caller")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
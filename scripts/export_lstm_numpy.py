@@ -0,0 +1,53 @@
+"""
+Export Trained LSTM Models to NumPy Weights
+Lets forecasting run without TensorFlow (see services/lstm_numpy.py)
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.lstm_forecaster import TENSORFLOW_AVAILABLE
+from services.lstm_numpy import export_lstm_model
+
+MODELS = [
+    ("iterative", "models/lstm_sales_model.h5", "models/scaler.pkl", "models/lstm_sales_model.npz"),
+    ("direct", "models/lstm_sales_model_direct.h5", "models/scaler_direct.pkl", "models/lstm_sales_model_direct.npz"),
+]
+
+
+def main():
+    """Export every trained model found in models/."""
+    print("=" * 60)
+    print("LSTM NUMPY EXPORT")
+    print("=" * 60)
+    print()
+
+    if not TENSORFLOW_AVAILABLE:
+        print("[ERROR] TensorFlow is needed to read the .h5 models")
+        return 1
+
+    exported = 0
+    for name, model_path, scaler_path, out_path in MODELS:
+        if not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+            print(f"[SKIP] {name}: {model_path} not trained yet")
+            continue
+        export_lstm_model(model_path, scaler_path, out_path)
+        size_kb = os.path.getsize(out_path) / 1024
+        print(f"[OK] {name}: {model_path} -> {out_path} ({size_kb:.0f} KB)")
+        exported += 1
+
+    print()
+    if exported == 0:
+        print("[ERROR] No trained models found. Run scripts/train_lstm_model.py first.")
+        return 1
+
+    print("=" * 60)
+    print(f"[SUCCESS] {exported} model(s) exported")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Precompute LSTM Forecasts into the Forecast Store
+Run once (e.g. from cron) or with --interval to refresh on a schedule
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.forecast_store import get_forecast_store
+
+
+def precompute(csv: str, horizons: list) -> int:
+    """Fill the store for every horizon; returns the number of fresh computations."""
+    store = get_forecast_store()
+    computed = 0
+    for hours in horizons:
+        start = time.perf_counter()
+        if store.lookup(csv, hours) is not None:
+            print(f"  [CACHED] {hours}h forecast is current")
+            continue
+        forecast = store.compute(csv, hours)
+        elapsed = time.perf_counter() - start
+        mode = forecast.get('mode', 'fallback')
+        print(f"  [OK] {hours}h forecast computed in {elapsed:.2f}s ({mode})")
+        computed += 1
+    return computed
+
+
+def main():
+    """Precompute forecasts for the configured horizons."""
+    parser = argparse.ArgumentParser(description="Precompute LSTM forecasts")
+    parser.add_argument("--csv", default="data/orders_realtime.csv")
+    parser.add_argument("--hours", type=int, nargs="+", default=[24, 168],
+                        help="Forecast horizons in hours (default: next day and next 7 days)")
+    parser.add_argument("--interval", type=int, default=0,
+                        help="Seconds between refreshes; 0 runs once (e.g. 3600 for hourly)")
+    args = parser.parse_args()
+
+    while True:
+        print(f"[FORECAST] Precompute at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        try:
+            precompute(args.csv, args.hours)
+        except Exception as e:
+            print(f"[FORECAST] Precompute failed: {e}")
+            if not args.interval:
+                return 1
+
+        if not args.interval:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Incremental LSTM Retraining
+Nightly job: fine-tunes on hours added since the last run (full refit only on scaler drift)
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.lstm_retrainer import IncrementalRetrainer, FINE_TUNE_EPOCHS, FULL_REFIT_EPOCHS
+
+
+def main():
+    """Run one incremental retraining pass."""
+    parser = argparse.ArgumentParser(description="Incrementally retrain the LSTM forecaster")
+    parser.add_argument("--csv", default="data/orders_realtime.csv")
+    parser.add_argument("--epochs", type=int, default=FINE_TUNE_EPOCHS, help="Fine-tune epochs")
+    parser.add_argument("--full-epochs", type=int, default=FULL_REFIT_EPOCHS, help="Epochs for a full refit")
+    parser.add_argument("--full", action="store_true", help="Force a full refit")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LSTM INCREMENTAL RETRAINING")
+    print("=" * 60)
+    print()
+
+    result = IncrementalRetrainer().run(args.csv, epochs=args.epochs,
+                                        full_epochs=args.full_epochs, force_full=args.full)
+
+    if not result['success']:
+        print(f"[ERROR] Retraining failed: {result.get('error')}")
+        return 1
+
+    if result['action'] == 'skipped':
+        print(f"[SUCCESS] Model version {result['version']} is already current")
+        return 0
+
+    print()
+    for name, details in result['results'].items():
+        print(f"      {name}: {details}")
+    print()
+    print("=" * 60)
+    print(f"[SUCCESS] Model version {result['version']} ({result['action']}, {result['seconds']}s)")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,7 +7,8 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.lstm_forecaster import get_lstm_forecaster
+from services.lstm_forecaster import get_lstm_forecaster, register_lstm_version
+from services.forecast_store import get_forecast_store
 
 
 def main():
@@ -30,14 +31,16 @@ def main():
     
     # Train model
     print("[2/3] Training LSTM model...")
+    hp = forecaster.hparams  # Notebook defaults or the best searched config
     print("      Architecture:")
-    print("        - LSTM(64) + Dropout(0.3)")
-    print("        - LSTM(32)")
-    print("        - Dense(16, relu)")
+    print(f"        - LSTM({hp['units_1']}) + Dropout({hp['dropout']})")
+    print(f"        - LSTM({hp['units_2']})")
+    print(f"        - Dense({hp['dense_units']}, relu)")
     print("        - Dense(1)")
+    print(f"        - lookback {forecaster.lookback}h, learning rate {hp['learning_rate']}")
     print()
     
-    result = forecaster.train(data, epochs=40, batch_size=32)
+    result = forecaster.train(data, epochs=int(hp.get('epochs', 40)), batch_size=int(hp.get('batch_size', 32)))
     
     if result['success']:
         print()
@@ -46,11 +49,13 @@ def main():
         print(f"      RMSE: {result['rmse']:.3f}")
         print(f"      Epochs: {result['epochs_run']}")
         print(f"      Samples: {result['samples_trained']}")
+        version = register_lstm_version(forecaster, result, data)
+        print(f"      Registered and promoted as lstm v{version}")
         print()
         
-        # Test prediction
+        # Test prediction (also warms the forecast store for the new model)
         print("[3/3] Testing predictions...")
-        pred_result = forecaster.predict(data, hours_ahead=24)
+        pred_result = get_forecast_store().get("data/orders_realtime.csv", hours_ahead=24, forecaster=forecaster)
         
         if pred_result['success']:
             future_preds = pred_result['future_predictions']
@@ -0,0 +1,114 @@
+"""
+Background Training Jobs
+Start and follow a training job (Ctrl+C cancels it); inspect, cancel and list jobs
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.training_jobs import (
+    DEFAULT_BUDGET_SECONDS, FINISHED, TRAINERS, JobConflict, get_training_runner
+)
+
+
+def follow(job_id: str, cancel_on_interrupt: bool = False) -> int:
+    """Print the job's log as it grows until the job finishes; exit code 0 on success."""
+    runner = get_training_runner()
+    offset = 0
+    while True:
+        try:
+            chunk = runner.log(job_id, offset)
+            offset = chunk["offset"]
+            if chunk["text"]:
+                print(chunk["text"], end="")
+            status = runner.get(job_id)
+            if status is None or status["status"] in FINISHED:
+                break
+            time.sleep(1.0)
+        except KeyboardInterrupt:
+            if not cancel_on_interrupt:
+                return 1
+            print("\nCancelling...")
+            runner.cancel(job_id)
+            cancel_on_interrupt = False  # A second Ctrl+C stops waiting
+
+    print()
+    print(f"Job {job_id}: {status['status'] if status else 'not found'}")
+    if status and status.get("error"):
+        print(f"      {status['error']}")
+    return 0 if status and status["status"] == "succeeded" else 1
+
+
+def show(status: dict):
+    progress = status.get("progress") or {}
+    epoch = f"epoch {progress.get('epoch')}/{progress.get('epochs')}" if progress.get("epochs") else progress.get("phase", "")
+    print(f"  {status['job_id']}  {status['kind']:<12} {status['status']:<10} {epoch:<14} "
+          f"{progress.get('elapsed_seconds', 0):>7}s")
+
+
+def main():
+    """Manage background training jobs."""
+    parser = argparse.ArgumentParser(description="Background model training jobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    start = sub.add_parser("start", help="Start a training job")
+    start.add_argument("kind", choices=sorted(TRAINERS), nargs="?", default="lstm")
+    start.add_argument("--epochs", type=int)
+    start.add_argument("--batch-size", type=int)
+    start.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="Wall-clock budget in seconds")
+
+    status = sub.add_parser("status", help="Show a job")
+    status.add_argument("job_id")
+    logs = sub.add_parser("follow", help="Stream the log of a job started elsewhere (e.g. the backend)")
+    logs.add_argument("job_id")
+    cancel = sub.add_parser("cancel", help="Cancel a running job")
+    cancel.add_argument("job_id")
+    sub.add_parser("list", help="List recent jobs")
+    args = parser.parse_args()
+
+    runner = get_training_runner()
+
+    if args.command == "start":
+        params = {k: v for k, v in {"epochs": args.epochs, "batch_size": args.batch_size}.items() if v}
+        try:
+            job = runner.start(args.kind, params, budget_seconds=args.budget)
+        except JobConflict as e:
+            print(f"[ERROR] {e}")
+            return 1
+        print(f"Started {args.kind} job {job['job_id']} (Ctrl+C cancels)")
+        return follow(job["job_id"], cancel_on_interrupt=True)
+
+    if args.command == "follow":
+        return follow(args.job_id)
+
+    if args.command == "cancel":
+        if not runner.cancel(args.job_id):
+            print(f"[ERROR] Job {args.job_id} is not running")
+            return 1
+        print(f"Cancel requested for {args.job_id}")
+        return 0
+
+    if args.command == "status":
+        job = runner.get(args.job_id)
+        if not job:
+            print(f"[ERROR] Job {args.job_id} not found")
+            return 1
+        show(job)
+        if job.get("result"):
+            print(f"      Result: {job['result']}")
+        if job.get("error"):
+            print(f"      Error: {job['error']}")
+        return 0
+
+    jobs = runner.list()
+    print(f"{len(jobs)} recent job(s)")
+    for job in jobs:
+        show(job)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
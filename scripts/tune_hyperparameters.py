@@ -0,0 +1,52 @@
+"""
+Hyperparameter Search for the Forecasters
+Successive halving over LSTM or XGBoost configs; the winner becomes the training default
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.hparam_search import HyperparameterSearch, SEARCH_SPACES
+
+
+def main():
+    """Run one search and print the top of the leaderboard."""
+    parser = argparse.ArgumentParser(description="Search forecaster hyperparameters")
+    parser.add_argument("model", choices=list(SEARCH_SPACES))
+    parser.add_argument("--csv", default="data/orders_realtime.csv")
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of the trials per rung")
+    parser.add_argument("--rungs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--memory-limit-mb", type=float, default=4096, help="Per-trial memory limit")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"HYPERPARAMETER SEARCH: {args.model.upper()}")
+    print("=" * 60)
+    print()
+
+    search = HyperparameterSearch(args.model, args.csv, n_trials=args.trials, eta=args.eta, rungs=args.rungs,
+                                  workers=args.workers, memory_limit_mb=args.memory_limit_mb, seed=args.seed)
+    result = search.run()
+    if not result['success']:
+        print(f"[ERROR] Search failed: {result.get('error')}")
+        return 1
+
+    print()
+    board = result['leaderboard']
+    top = board[board['status'] == 'ok'].sort_values(['rung', 'val_mae'], ascending=[False, True]).head(10)
+    print(top[['trial', 'rung', 'budget', 'val_mae', 'seconds', 'peak_memory_mb', 'config']].to_string(index=False))
+    print()
+    print(f"Best config (val MAE {result['best_val_mae']:.3f}): {result['best_config']}")
+    print(f"Best model registered as {args.model} v{result['registry_version']} (not promoted)")
+    print(f"{result['trials_run']} trials in {result['seconds']}s, leaderboard: {search.leaderboard_path}")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
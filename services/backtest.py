@@ -0,0 +1,232 @@
+"""
+Rolling-Origin Backtesting
+Scores every forecast model on the same expanding-window folds, one process per fold
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Peak RSS per fold process (Unix only)
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+BACKTEST_DIR = "models/backtests"
+HISTORY_FILE = "history.csv"  # One summary row per model per run, for regression tracking
+
+
+def rolling_origins(n_rows: int, horizon: int, folds: int, step: Optional[int] = None,
+                    min_train: int = 0) -> List[int]:
+    """
+    Forecast origins (row positions) for expanding-window folds.
+
+    Fold k trains on rows [:origin] and is scored on rows [origin:origin + horizon];
+    the last fold ends at the last row and earlier ones step back `step` rows each.
+    """
+    step = step or horizon
+    origins = [n_rows - horizon - k * step for k in range(folds)]
+    return sorted(o for o in origins if o >= max(min_train, 1))
+
+
+def forecast_errors(actual: np.ndarray, predicted: np.ndarray) -> Dict[str, float]:
+    """MAE, RMSE and MAPE (MAPE over hours with non-zero actuals)."""
+    actual = np.asarray(actual, dtype=np.float64)
+    errors = actual - np.asarray(predicted, dtype=np.float64)
+    nonzero = actual != 0
+    return {
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mape': float(np.mean(np.abs(errors[nonzero] / actual[nonzero])) * 100) if nonzero.any() else float('nan')
+    }
+
+
+def _peak_memory_mb() -> Optional[float]:
+    if not HAS_RESOURCE:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _run_fold(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Train and score one model on one fold. Runs in its own worker process.
+
+    Everything the model writes (weights, scaled sequence memmaps) goes to a
+    private temp directory, so folds never share or overwrite files.
+    """
+    import services.sequence_pipeline as sequence_pipeline
+    from services.forecast_models import create_model, load_hourly_series
+
+    workdir = tempfile.mkdtemp(prefix=f"backtest_{task['model']}_{task['fold']}_")
+    sequence_pipeline.SEQUENCE_CACHE_DIR = workdir
+    row = {'model': task['model'], 'fold': task['fold'], 'origin': None}
+
+    try:
+        data = load_hourly_series(task['csv'])
+        origin, horizon = task['origin'], task['horizon']
+        history, actual = data.iloc[:origin], data.iloc[origin:origin + horizon]
+        row['origin'] = history.index[-1].isoformat()
+
+        model = create_model(task['model'], workdir=workdir, horizon=horizon, **task['params'])
+
+        start = time.perf_counter()
+        fit_info = model.fit(history) or {}
+        row['train_seconds'] = round(time.perf_counter() - start, 3)
+        if fit_info.get('fallback'):
+            row['note'] = 'fallback (model dependency missing or too little data)'
+
+        # First call includes one-off setup (graph tracing); latency is the median of the rest
+        predicted = model.predict(history, actual.index)
+        latencies = []
+        for _ in range(task['runs']):
+            start = time.perf_counter()
+            model.predict(history, actual.index)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        row.update(forecast_errors(actual['orders'].values, predicted))
+        row['latency_ms'] = round(float(np.median(latencies)), 3) if latencies else None
+        row['success'] = True
+    except Exception as e:
+        row['success'] = False
+        row['error'] = str(e)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    row['peak_memory_mb'] = _peak_memory_mb()
+    return row
+
+
+def summarize(folds: pd.DataFrame) -> pd.DataFrame:
+    """Mean metrics per model over its successful folds."""
+    ok = folds[folds['success']] if 'success' in folds else folds
+    if ok.empty:
+        return pd.DataFrame(columns=['model', 'folds', 'mae', 'rmse', 'mape',
+                                     'train_seconds', 'latency_ms', 'peak_memory_mb'])
+    summary = ok.groupby('model').agg(
+        folds=('fold', 'count'),
+        mae=('mae', 'mean'),
+        rmse=('rmse', 'mean'),
+        mape=('mape', 'mean'),
+        train_seconds=('train_seconds', 'mean'),
+        latency_ms=('latency_ms', 'mean'),
+        peak_memory_mb=('peak_memory_mb', 'max'),
+    ).reset_index()
+    return summary.sort_values('mae').round(4)
+
+
+def run_backtest(csv_path: str, models: List[str], horizon: int = 24, folds: int = 5,
+                 step: Optional[int] = None, min_train: int = 24 * 7, workers: Optional[int] = None,
+                 runs: int = 5, model_params: Optional[Dict[str, Dict[str, Any]]] = None,
+                 output_dir: str = BACKTEST_DIR) -> Dict[str, Any]:
+    """
+    Rolling-origin evaluation of several forecast models on one history CSV.
+
+    Every (model, fold) pair runs in a fresh spawned process (one task per
+    process), so peak memory is measured per fold and TensorFlow state never
+    leaks between models.
+
+    Args:
+        csv_path: orders_realtime.csv or orders.csv layout
+        models: Names from services.forecast_models.FORECAST_MODELS
+        horizon: Hours forecast from each origin
+        folds: Number of origins
+        step: Hours between origins (default: horizon)
+        min_train: Minimum history rows before the first origin
+        workers: Parallel processes (default: CPU count)
+        runs: Timed predict calls per fold for the latency figure
+        model_params: Per-model constructor params, e.g. {"lstm": {"epochs": 10}}
+
+    Returns:
+        {'success', 'run_id', 'summary', 'folds', 'files'}
+    """
+    from services.forecast_models import FORECAST_MODELS, load_hourly_series
+
+    unknown = [m for m in models if m not in FORECAST_MODELS]
+    if unknown:
+        return {'success': False, 'error': f"Unknown models: {', '.join(unknown)}"}
+
+    n_rows = len(load_hourly_series(csv_path))
+    origins = rolling_origins(n_rows, horizon, folds, step, min_train)
+    if not origins:
+        return {'success': False, 'error': f'{n_rows} hours is too short for {horizon}-hour folds'}
+
+    model_params = model_params or {}
+    tasks = [
+        {'model': model, 'fold': fold, 'origin': origin, 'horizon': horizon,
+         'csv': csv_path, 'runs': runs, 'params': model_params.get(model, {})}
+        for model in models
+        for fold, origin in enumerate(origins)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    print(f"[BACKTEST] {len(models)} models x {len(origins)} folds on {workers} workers")
+
+    started = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes=workers, maxtasksperchild=1) as pool:
+        rows = []
+        for row in pool.imap_unordered(_run_fold, tasks):
+            status = f"MAE {row['mae']:.3f}" if row['success'] else f"failed: {row['error']}"
+            print(f"[BACKTEST] {row['model']} fold {row['fold']}: {status}")
+            rows.append(row)
+
+    fold_table = pd.DataFrame(rows).sort_values(['model', 'fold']).reset_index(drop=True)
+    summary = summarize(fold_table)
+
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    summary.insert(0, 'run_id', run_id)
+    summary.insert(1, 'dataset', os.path.basename(csv_path))
+    summary.insert(2, 'rows', n_rows)
+    summary.insert(3, 'horizon', horizon)
+
+    os.makedirs(output_dir, exist_ok=True)
+    folds_path = os.path.join(output_dir, f"{run_id}_folds.csv")
+    fold_table.to_csv(folds_path, index=False)
+    history_path = os.path.join(output_dir, HISTORY_FILE)
+    summary.to_csv(history_path, mode='a', index=False, header=not os.path.exists(history_path))
+
+    return {
+        'success': True,
+        'run_id': run_id,
+        'summary': summary,
+        'folds': fold_table,
+        'seconds': round(time.perf_counter() - started, 1),
+        'files': [folds_path, history_path]
+    }
+
+
+def compare_to_previous(summary: pd.DataFrame, output_dir: str = BACKTEST_DIR,
+                        tolerance: float = 0.05) -> Dict[str, float]:
+    """
+    Models whose MAE rose more than `tolerance` (fraction) over the previous run
+    on the same dataset and horizon.
+
+    Returns:
+        {model: relative MAE change}, empty when nothing regressed
+    """
+    history_path = os.path.join(output_dir, HISTORY_FILE)
+    if summary.empty or not os.path.exists(history_path):
+        return {}
+    history = pd.read_csv(history_path)
+    current = summary.iloc[0]
+    previous = history[(history['dataset'] == current['dataset'])
+                       & (history['horizon'] == current['horizon'])
+                       & (history['run_id'].astype(str) < str(current['run_id']))]
+    if previous.empty:
+        return {}
+    baseline = previous[previous['run_id'] == previous['run_id'].max()].set_index('model')['mae']
+
+    regressions = {}
+    for _, row in summary.iterrows():
+        if row['model'] in baseline and baseline[row['model']] > 0:
+            change = row['mae'] / baseline[row['model']] - 1
+            if change > tolerance:
+                regressions[row['model']] = round(float(change), 4)
+    return regressions
@@ -0,0 +1,144 @@
+"""
+Embedding Cache
+Persistent text-embedding vectors keyed by a hash of the embedding model and the text
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence
+
+EMBEDDING_CACHE_PATH = os.path.join("artifacts", "embedding_cache.sqlite3")
+
+# Texts per embed_documents call, and calls in flight at once
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "100"))
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "4"))
+
+LOOKUP_CHUNK = 500  # Keys per SELECT, below SQLite's bound-parameter limit
+
+
+def embedding_key(model: str, text: str) -> str:
+    """SHA-256 of the model name and the exact text."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Document embeddings already paid for, in a local SQLite file.
+
+    Vectors are stored as float64 arrays so a cached embedding is bit-for-bit
+    the one the API returned. The model name is part of the key: switching
+    embedding models never serves vectors from the old one.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL
+            )
+        """)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """{key: vector} for the keys that are cached."""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array('d', blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: Dict[str, Sequence[float]]):
+        """Store {key: vector} computed with `model` in one transaction."""
+        rows = [(key, model, len(vector), array('d', vector).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+            )
+            self.conn.execute("COMMIT")
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            if model is None:
+                return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()[0]
+
+
+def embed_texts(embeddings: Any, texts: Sequence[str], model: str, cache: Optional[EmbeddingCache] = None,
+                batch_size: int = EMBED_BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Document embeddings for `texts`, calling the API only for uncached text.
+
+    Identical texts are embedded once. The rest go to embeddings.embed_documents
+    in batches of `batch_size`, with up to `concurrency` batches in flight;
+    each finished batch is written to the cache straight away, so an
+    interrupted ingestion keeps what it already paid for.
+
+    Returns:
+        {"vectors": one vector per text, in order, "cached": texts served from
+        the cache, "embedded": texts sent to the API, "calls": API calls made}
+    """
+    keys = [embedding_key(model, text) for text in texts]
+    vectors = cache.get_many(keys) if cache is not None else {}
+    cached = sum(1 for key in keys if key in vectors)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors:
+            missing.setdefault(key, text)
+    pending = list(missing.items())
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), max(1, batch_size))]
+
+    def embed_batch(batch):
+        return batch, embeddings.embed_documents([text for _, text in batch])
+
+    error = None
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches)))) as pool:
+            for future in as_completed([pool.submit(embed_batch, batch) for batch in batches]):
+                try:
+                    batch, result = future.result()
+                except Exception as e:
+                    error = error or e  # Keep caching the batches that did succeed
+                    continue
+                computed = {key: list(vector) for (key, _), vector in zip(batch, result)}
+                if cache is not None:
+                    cache.put_many(model, computed)
+                vectors.update(computed)
+    if error is not None:
+        raise error
+
+    return {
+        "vectors": [vectors[key] for key in keys],
+        "cached": cached,
+        "embedded": len(pending),
+        "calls": len(batches),
+    }
+
+
+# Singleton instance
+_embedding_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get or create embedding cache singleton."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
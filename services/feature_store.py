@@ -0,0 +1,343 @@
+"""
+Hourly Feature Store
+Materializes calendar, rolling, weather and event features into versioned Parquet parts
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Optional columnar storage; without it features are computed in memory each time
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+FEATURE_STORE_DIR = "data/feature_store"
+EVENTS_CSV = "data/events_calendar.csv"
+WEATHER_CSV = "artifacts/weather_features.csv"
+
+# Row-based windows over open hours (13 per day, 10:00-22:00)
+ROLLING_WINDOWS = {"rolling_24h_avg": 13, "rolling_7d_avg": 7 * 13}
+WEATHER_COLUMNS = ["precip_prob", "is_rain", "temp"]
+WEATHER_TOLERANCE = pd.Timedelta(hours=3)  # Older observations are treated as missing
+
+CALENDAR_COLUMNS = ["hour_of_day", "day_of_week", "is_weekend", "is_lunch", "is_dinner",
+                    "hour_sin", "hour_cos", "dow_sin", "dow_cos"]
+EVENT_COLUMNS = ["traffic_factor", "has_event"]
+FEATURE_COLUMNS = CALENDAR_COLUMNS + list(ROLLING_WINDOWS) + WEATHER_COLUMNS + EVENT_COLUMNS
+
+# Bump when a feature definition changes; the version hash starts a fresh directory
+FEATURE_DEFINITION = {
+    "revision": 1,
+    "columns": FEATURE_COLUMNS,
+    "rolling": ROLLING_WINDOWS,
+    "weather_tolerance_hours": WEATHER_TOLERANCE.total_seconds() / 3600,
+}
+FEATURE_VERSION = hashlib.sha1(json.dumps(FEATURE_DEFINITION, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def calendar_features(timestamps: pd.Series) -> pd.DataFrame:
+    """Calendar and cyclical features for any set of hours."""
+    ts = pd.to_datetime(timestamps)
+    hour = ts.dt.hour
+    dow = ts.dt.dayofweek
+    return pd.DataFrame({
+        "hour_of_day": hour,
+        "day_of_week": dow,
+        "is_weekend": (dow >= 5).astype(int),
+        "is_lunch": ((hour >= 12) & (hour <= 14)).astype(int),
+        "is_dinner": ((hour >= 18) & (hour <= 20)).astype(int),
+        "hour_sin": np.sin(2 * np.pi * hour / 24),
+        "hour_cos": np.cos(2 * np.pi * hour / 24),
+        "dow_sin": np.sin(2 * np.pi * dow / 7),
+        "dow_cos": np.cos(2 * np.pi * dow / 7),
+    }, index=timestamps.index)
+
+
+def weather_asof(timestamps: pd.Series, df_weather: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Latest weather observation at or before each hour (point-in-time join).
+
+    Replaces the old merge on hour-of-day, which duplicated rows once orders
+    spanned more than one day.
+    """
+    left = pd.DataFrame({"timestamp": pd.to_datetime(timestamps).values, "_row": np.arange(len(timestamps))})
+    if df_weather is None or df_weather.empty:
+        result = pd.DataFrame(0.0, index=range(len(left)), columns=WEATHER_COLUMNS)
+    else:
+        weather = df_weather.copy()
+        weather["time"] = pd.to_datetime(weather["time"])
+        for col in WEATHER_COLUMNS:
+            if col not in weather.columns:
+                weather[col] = 0.0
+        merged = pd.merge_asof(
+            left.sort_values("timestamp"),
+            weather[["time"] + WEATHER_COLUMNS].sort_values("time"),
+            left_on="timestamp", right_on="time",
+            direction="backward", tolerance=WEATHER_TOLERANCE
+        ).sort_values("_row")
+        result = merged[WEATHER_COLUMNS].fillna(0.0).reset_index(drop=True)
+    result.index = timestamps.index
+    return result
+
+
+def event_features(timestamps: pd.Series, df_events: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Traffic factor and event flag for each hour's date."""
+    dates = pd.to_datetime(timestamps).dt.normalize()
+    if df_events is None or df_events.empty:
+        return pd.DataFrame({"traffic_factor": 1.0, "has_event": 0}, index=timestamps.index)
+
+    events = df_events.copy()
+    events["date"] = pd.to_datetime(events["date"]).dt.normalize()
+    events["has_event"] = (events["event_type"].fillna("None") != "None").astype(int)
+    events = events.drop_duplicates("date", keep="last").set_index("date")
+    return pd.DataFrame({
+        "traffic_factor": dates.map(events["traffic_factor"]).fillna(1.0).values,
+        "has_event": dates.map(events["has_event"]).fillna(0).astype(int).values,
+    }, index=timestamps.index)
+
+
+def _row_hashes(hourly: pd.DataFrame) -> np.ndarray:
+    """One hash per (hour, orders) row, independent of the orders dtype."""
+    rows = pd.DataFrame({
+        "timestamp": pd.to_datetime(hourly["timestamp"]).values.astype("datetime64[ns]"),
+        "orders": hourly["orders"].astype(np.float64).values,
+    })
+    return pd.util.hash_pandas_object(rows, index=False).values
+
+
+def _digest(hashes: np.ndarray) -> str:
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+def _default_sources(df_weather: Optional[pd.DataFrame], df_events: Optional[pd.DataFrame]):
+    """Fill in the shared weather and events files so every caller materializes the same rows."""
+    if df_weather is None and os.path.exists(WEATHER_CSV):
+        df_weather = pd.read_csv(WEATHER_CSV)
+    if df_events is None and os.path.exists(EVENTS_CSV):
+        df_events = pd.read_csv(EVENTS_CSV)
+    return df_weather, df_events
+
+
+class FeatureStore:
+    """
+    Versioned, append-only store of hourly features.
+
+    With root=None (or without pyarrow) nothing is written: every call computes
+    the features in memory, e.g. for backtests on arbitrary history slices.
+
+    Layout: {root}/{name}/v{FEATURE_VERSION}/part-*.parquet plus manifest.json.
+    Each update computes features only for hours after the last materialized
+    one (with enough earlier rows for the rolling windows) and writes them as
+    a new part. Rolling features use orders strictly before each hour, so the
+    stored rows are point-in-time correct for training.
+
+    The manifest keeps a content hash of the hourly orders behind the stored
+    rows. When corrected or back-filled orders change it, stored rows are
+    compared hour by hour and only parts from the first differing hour on
+    are rebuilt.
+    """
+
+    def __init__(self, name: str = "orders_hourly", root: Optional[str] = FEATURE_STORE_DIR):
+        self.name = name
+        self.persist = HAS_PYARROW and root is not None
+        self.version_dir = os.path.join(root or "", name, f"v{FEATURE_VERSION}")
+        self.manifest_path = os.path.join(self.version_dir, "manifest.json")
+
+    @staticmethod
+    def _empty_manifest() -> Dict[str, Any]:
+        return {"version": FEATURE_VERSION, "parts": [], "first_timestamp": None,
+                "last_timestamp": None, "rows": 0}
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self.manifest_path):
+            return self._empty_manifest()
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = f"{self.manifest_path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _hourly_orders(self, df_orders: pd.DataFrame) -> pd.DataFrame:
+        """One row per hour with an `orders` total."""
+        df = df_orders[["timestamp", "orders"]].copy()
+        df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.floor("h")
+        return df.groupby("timestamp", as_index=False)["orders"].sum()
+
+    def _build(self, hourly: pd.DataFrame, df_weather, df_events, start: int) -> pd.DataFrame:
+        """Features for hourly.iloc[start:], using earlier rows only as rolling context."""
+        context = max(ROLLING_WINDOWS.values())
+        frame = hourly.iloc[max(0, start - context):].reset_index(drop=True)
+
+        # shift(1): each hour only sees orders that happened before it
+        previous = frame["orders"].shift(1)
+        rolling = pd.DataFrame({
+            name: previous.rolling(window=window, min_periods=1).mean()
+            for name, window in ROLLING_WINDOWS.items()
+        })
+        rolling = rolling.fillna(frame["orders"].iloc[0] if len(frame) else 0)
+
+        features = pd.concat([
+            frame[["timestamp", "orders"]],
+            calendar_features(frame["timestamp"]),
+            rolling,
+            weather_asof(frame["timestamp"], df_weather),
+            event_features(frame["timestamp"], df_events),
+        ], axis=1)
+        return features.iloc[min(start, context):].reset_index(drop=True)
+
+    def _reconcile(self, manifest: Dict[str, Any], hashes: np.ndarray) -> int:
+        """
+        Number of leading hours whose stored features are still valid.
+
+        `hashes` are the current hourly rows' hashes. Parts that include or
+        follow the first hour whose orders differ from what was stored are
+        deleted, and the manifest is trimmed to match.
+        """
+        stored_rows = manifest["rows"]
+        if len(hashes) >= stored_rows and manifest.get("source_hash") == _digest(hashes[:stored_rows]):
+            return stored_rows
+
+        stored, sizes = [], []
+        for part in manifest["parts"]:
+            rows = pd.read_parquet(os.path.join(self.version_dir, part), columns=["timestamp", "orders"])
+            stored.append(rows)
+            sizes.append(len(rows))
+        stored = pd.concat(stored, ignore_index=True) if stored else pd.DataFrame(columns=["timestamp", "orders"])
+        stored_hashes = _row_hashes(stored)
+        n = min(len(stored_hashes), len(hashes))
+        differing = np.flatnonzero(stored_hashes[:n] != hashes[:n])
+        valid = int(differing[0]) if len(differing) else n
+
+        kept, rows = 0, 0
+        while kept < len(sizes) and rows + sizes[kept] <= valid:
+            rows += sizes[kept]
+            kept += 1
+        if kept < len(manifest["parts"]):
+            changed_at = stored["timestamp"].iloc[valid] if valid < len(stored) else manifest["last_timestamp"]
+            print(f"[FEATURES] Orders changed at {changed_at}, rebuilding {self.name} v{FEATURE_VERSION} from there")
+            for part in manifest["parts"][kept:]:
+                try:
+                    os.remove(os.path.join(self.version_dir, part))
+                except OSError:
+                    pass
+
+        manifest["parts"] = manifest["parts"][:kept]
+        manifest["rows"] = rows
+        manifest["last_timestamp"] = pd.Timestamp(stored["timestamp"].iloc[rows - 1]).isoformat() if rows else None
+        manifest["first_timestamp"] = manifest["first_timestamp"] if rows else None
+        manifest["source_hash"] = _digest(hashes[:rows])
+        self._save_manifest(manifest)
+        return rows
+
+    def update(self, df_orders: pd.DataFrame, df_weather: Optional[pd.DataFrame] = None,
+               df_events: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Materialize features for hours not yet in the store.
+
+        Orders that changed inside the stored range (corrections, back-fills)
+        trigger a rebuild from the first changed hour. When not persisting, all
+        features are computed and returned.
+
+        Returns:
+            The newly materialized rows
+        """
+        df_weather, df_events = _default_sources(df_weather, df_events)
+        hourly = self._hourly_orders(df_orders)
+
+        if not self.persist:
+            return self._build(hourly, df_weather, df_events, 0)
+
+        os.makedirs(self.version_dir, exist_ok=True)
+        manifest = self._load_manifest()
+
+        hashes = _row_hashes(hourly)
+        start = 0
+        if manifest["last_timestamp"] is not None:
+            start = self._reconcile(manifest, hashes)
+
+        if start >= len(hourly):
+            return hourly.iloc[0:0]
+
+        new_rows = self._build(hourly, df_weather, df_events, start)
+        first, last = new_rows["timestamp"].iloc[0], new_rows["timestamp"].iloc[-1]
+        part = f"part-{first:%Y%m%d%H}-{last:%Y%m%d%H}.parquet"
+        tmp_path = os.path.join(self.version_dir, f"{part}.tmp{os.getpid()}")
+        new_rows.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(self.version_dir, part))
+
+        manifest["parts"].append(part)
+        manifest["first_timestamp"] = manifest["first_timestamp"] or hourly["timestamp"].iloc[0].isoformat()
+        manifest["last_timestamp"] = last.isoformat()
+        manifest["rows"] = len(hourly)
+        manifest["source_hash"] = _digest(hashes)
+        manifest["updated_at"] = datetime.now().isoformat()
+        self._save_manifest(manifest)
+
+        print(f"[FEATURES] Appended {len(new_rows)} hours to {self.name} v{FEATURE_VERSION}")
+        return new_rows
+
+    def training_frame(self, df_orders: pd.DataFrame, df_weather: Optional[pd.DataFrame] = None,
+                       df_events: Optional[pd.DataFrame] = None,
+                       columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        All materialized hours (after an incremental update): timestamp, orders and features.
+
+        Only the parts listed in the manifest are read, so a part left behind by
+        an interrupted update or another writer never duplicates hours.
+        """
+        new_rows = self.update(df_orders, df_weather, df_events)
+        if not self.persist:
+            frame = new_rows
+        else:
+            parts = [os.path.join(self.version_dir, part) for part in self._load_manifest()["parts"]]
+            wanted = None if columns is None else ["timestamp", "orders"] + list(columns)
+            frame = pd.concat([pd.read_parquet(p, columns=wanted) for p in parts], ignore_index=True)
+        return frame if columns is None else frame[["timestamp", "orders"] + list(columns)]
+
+    def prediction_frame(self, pred_times: List[datetime], df_orders: pd.DataFrame,
+                         df_weather: Optional[pd.DataFrame] = None,
+                         df_events: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Feature rows for future hours, built in one pass.
+
+        Rolling features are those known now (from the latest orders), matching
+        what the stored training rows saw at their own time.
+        """
+        df_weather, df_events = _default_sources(df_weather, df_events)
+        hourly = self._hourly_orders(df_orders)
+        timestamps = pd.Series(pd.to_datetime(pred_times))
+
+        rolling = pd.DataFrame({
+            name: np.full(len(timestamps), hourly["orders"].tail(window).mean())
+            for name, window in ROLLING_WINDOWS.items()
+        })
+        return pd.concat([
+            timestamps.rename("timestamp").to_frame(),
+            calendar_features(timestamps),
+            rolling,
+            weather_asof(timestamps, df_weather),
+            event_features(timestamps, df_events),
+        ], axis=1)
+
+
+# Singleton instance
+_feature_store = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Get or create feature store singleton."""
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore()
+    return _feature_store
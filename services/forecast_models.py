@@ -0,0 +1,219 @@
+"""
+Forecast Model Interface
+Common fit/predict wrappers so every forecaster can be trained and scored on equal terms
+"""
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def load_hourly_series(csv_path: str) -> pd.DataFrame:
+    """
+    Hourly history in the shape every model below accepts.
+
+    Item-level logs (orders_realtime.csv layout) go through
+    LSTMForecaster.prepare_data_from_csv; hourly count files (orders.csv layout)
+    are summed per hour. Either way the result is indexed by hour with an
+    `orders` column, plus `sales` and the LSTM feature columns.
+    """
+    from services.lstm_forecaster import LSTMForecaster
+
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    if "quantity" in columns:
+        data = LSTMForecaster.prepare_data_from_csv(csv_path)
+        data["orders"] = data["sales"]
+    else:
+        raw = pd.read_csv(csv_path, usecols=["timestamp", "orders"])
+        raw["timestamp"] = pd.to_datetime(raw["timestamp"]).dt.floor("h")
+        data = raw.groupby("timestamp")[["orders"]].sum()
+        data["sales"] = data["orders"].astype(float)
+
+    for col in LSTMForecaster.FEATURE_COLUMNS:
+        if col not in data.columns:
+            data[col] = 0.0
+    data.index.name = "timestamp"
+    return data
+
+
+class ForecastModel:
+    """
+    Base interface: fit on an hourly history, then forecast given future hours.
+
+    history is a frame from load_hourly_series (hour index, `orders` column);
+    predict returns orders per hour aligned with future_index.
+    """
+
+    name = "base"
+
+    def __init__(self, workdir: Optional[str] = None, **params):
+        # Anything a model writes goes here, never over the production files
+        self.workdir = workdir or tempfile.mkdtemp(prefix=f"{self.name}_")
+        self.params = params
+
+    def _redirect_files(self, agent):
+        """Point every file an agent writes (its *_FILE attributes) into the work directory."""
+        for attr in dir(type(agent)):
+            path = getattr(agent, attr)
+            if attr.endswith("_FILE") and isinstance(path, str):
+                setattr(agent, attr, os.path.join(self.workdir, os.path.basename(path)))
+
+    def _scratch_registry(self, name: str, loader):
+        """A model registry inside the work directory, so fold models never reach production."""
+        from services.model_registry import ModelRegistry
+
+        registry = ModelRegistry(root=os.path.join(self.workdir, "registry"))
+        registry.register_loader(name, loader)
+        return registry
+
+    def fit(self, history: pd.DataFrame) -> Dict[str, Any]:
+        return {}
+
+    def predict(self, history: pd.DataFrame, future_index: pd.DatetimeIndex) -> np.ndarray:
+        raise NotImplementedError
+
+    @staticmethod
+    def _orders_frame(history: pd.DataFrame) -> pd.DataFrame:
+        """history as the (timestamp, orders) frame the agents read from orders.csv."""
+        return history[["orders"]].reset_index()
+
+
+class MovingAverageModel(ForecastModel):
+    """The mean of the last `window` hours, repeated (the naive floor every model should beat)."""
+
+    name = "moving_average"
+
+    def predict(self, history, future_index):
+        window = self.params.get("window", 24)
+        return np.full(len(future_index), float(history["orders"].tail(window).mean()))
+
+
+class HoltWintersModel(ForecastModel):
+    """Vectorized additive Holt-Winters with daily and weekly seasonality (the no-training default tier)."""
+
+    name = "holt_winters"
+
+    def fit(self, history):
+        from services.holt_winters import HoltWinters, seasonal_periods
+
+        self.model = HoltWinters(*seasonal_periods(history.index)).fit(history["orders"].values)
+        return {}
+
+    def predict(self, history, future_index):
+        return np.maximum(0, self.model.forecast(len(future_index))[0][0])
+
+
+class XGBoostModel(ForecastModel):
+    """ForecastAgent's XGBoost model on its feature-store features (rolling mean without xgboost)."""
+
+    name = "xgboost"
+
+    def __init__(self, workdir=None, **params):
+        super().__init__(workdir, **params)
+        from agents.forecast_agent import ForecastAgent, _load_registered_model
+        from services.feature_store import FeatureStore
+
+        self.agent = ForecastAgent(registry=self._scratch_registry(ForecastAgent.REGISTRY_NAME,
+                                                                   _load_registered_model))
+        self.agent.features = FeatureStore(root=None)  # Folds see only their own history
+        self._redirect_files(self.agent)
+
+    def fit(self, history):
+        features = self.agent._create_features(self._orders_frame(history))
+        self.agent._train_model(features)
+        self.baseline = float(features["orders"].mean())
+        return {"fallback": self.agent.model is None}
+
+    def predict(self, history, future_index):
+        if self.agent.model is None:
+            return np.full(len(future_index), self.baseline)
+        rows = self.agent._create_prediction_features(list(future_index), self._orders_frame(history))
+        return self.agent.model.predict(rows[self.agent.FEATURE_COLS].values)
+
+
+class AgentLSTMModel(ForecastModel):
+    """ForecastAgentLSTM's notebook LSTM (each hour predicted from the latest 23-hour context)."""
+
+    name = "agent_lstm"
+
+    def __init__(self, workdir=None, **params):
+        super().__init__(workdir, **params)
+        from agents.forecast_agent_lstm import ForecastAgentLSTM, HAS_TENSORFLOW, _load_registered_model
+        from services.feature_store import FeatureStore
+
+        if not HAS_TENSORFLOW:
+            raise ValueError("TensorFlow not available")
+        self.agent = ForecastAgentLSTM(registry=self._scratch_registry(ForecastAgentLSTM.REGISTRY_NAME,
+                                                                       _load_registered_model))
+        self.agent.features = FeatureStore(root=None)
+        self._redirect_files(self.agent)
+        if "epochs" in params:
+            self.agent.EPOCHS = params["epochs"]
+
+    def fit(self, history):
+        self.features = self.agent._create_lstm_features(self._orders_frame(history))
+        self.agent._train_lstm_model(self.features)
+        if self.agent.model is None:
+            raise ValueError("Not enough history to train the agent LSTM")
+        return {}
+
+    def predict(self, history, future_index):
+        features = self.agent._create_lstm_features(self._orders_frame(history))
+        return self.agent._predict_with_lstm(list(future_index), features)[0]
+
+
+class LSTMForecasterModel(ForecastModel):
+    """services.lstm_forecaster.LSTMForecaster trained from scratch in `mode` (iterative or direct)."""
+
+    name = "lstm"
+    mode = "iterative"
+
+    def __init__(self, workdir=None, horizon: int = 24, **params):
+        super().__init__(workdir, **params)
+        from services.lstm_forecaster import LSTMForecaster
+
+        # Fresh models in the work directory, as in scripts/benchmark_forecast_horizon.py
+        forecaster = LSTMForecaster(horizon=horizon)
+        if forecaster._ensure_tensorflow():
+            forecaster.model = forecaster._build_model()
+        forecaster.direct_model, forecaster.direct_scaler = None, None
+        forecaster.horizon = horizon
+        for attr in ("model_path", "scaler_path", "numpy_path",
+                     "direct_model_path", "direct_scaler_path", "direct_numpy_path"):
+            setattr(forecaster, attr, os.path.join(self.workdir, os.path.basename(getattr(forecaster, attr))))
+        self.forecaster = forecaster
+
+    def fit(self, history):
+        result = self.forecaster.train(history.copy(), epochs=self.params.get("epochs", 40), mode=self.mode)
+        if not result["success"]:
+            raise ValueError(result.get("error"))
+        return {"epochs_run": result["epochs_run"]}
+
+    def predict(self, history, future_index):
+        result = self.forecaster.predict(history, hours_ahead=len(future_index), mode=self.mode)
+        if "note" in result:
+            raise ValueError(result["note"])
+        return np.asarray(result["future_sales"], dtype=np.float64)
+
+
+class DirectLSTMForecasterModel(LSTMForecasterModel):
+    """LSTMForecaster's direct multi-horizon head (all hours in one forward pass)."""
+
+    name = "lstm_direct"
+    mode = "direct"
+
+
+FORECAST_MODELS = {
+    model.name: model
+    for model in (MovingAverageModel, HoltWintersModel, XGBoostModel, AgentLSTMModel,
+                  LSTMForecasterModel, DirectLSTMForecasterModel)
+}
+
+
+def create_model(name: str, **params) -> ForecastModel:
+    """Instantiate a registered forecast model by name."""
+    if name not in FORECAST_MODELS:
+        raise ValueError(f"Unknown forecast model: {name} (available: {', '.join(FORECAST_MODELS)})")
+    return FORECAST_MODELS[name](**params)
@@ -0,0 +1,331 @@
+"""
+Forecast Server
+Warm LSTM model in a worker process, answering concurrent forecast requests in micro-batches
+"""
+import asyncio
+import atexit
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional
+
+# Requests arriving within this window of the first one are predicted together
+BATCH_WINDOW_MS = float(os.getenv("FORECAST_BATCH_WINDOW_MS", "10"))
+MAX_BATCH_SIZE = 64
+REQUEST_TIMEOUT = 30.0  # Seconds a client waits before giving up on a forecast
+START_TIMEOUT = 120.0  # Seconds allowed for the worker to import TensorFlow and load the model
+SHUTDOWN_TIMEOUT = 10
+
+
+class ForecastTimeout(Exception):
+    """The forecast server did not answer within the request timeout."""
+
+
+def _collect_batch(requests, first, window: float, max_size: int) -> List[Any]:
+    """The first request plus whatever else arrives within `window` seconds (None ends the batch)."""
+    batch = [first]
+    deadline = time.monotonic() + window
+    while len(batch) < max_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            item = requests.get(timeout=remaining)
+        except queue.Empty:
+            break
+        batch.append(item)
+        if item is None:
+            break
+    return batch
+
+
+def _serve_batch(batch: List[tuple]) -> List[tuple]:
+    """
+    Answer one batch: forecast store hits first, then a single predict_many over the misses.
+
+    Each CSV is read once per batch, so identical concurrent requests share
+    data preparation and the in-sample pass as well as the batched rollout.
+    """
+    from services.forecast_store import get_forecast_store
+    from services.lstm_forecaster import get_lstm_forecaster
+
+    forecaster = get_lstm_forecaster()  # Promoted registry version, kept warm between batches
+    store = get_forecast_store()
+    replies, misses, frames = [], [], {}
+
+    for request_id, orders_csv, hours_ahead, use_store in batch:
+        try:
+            # Keyed on the promoted model's metadata, like every other store reader
+            cached = store.lookup(orders_csv, hours_ahead) if use_store else None
+            if cached is not None:
+                replies.append((request_id, cached, None))
+                continue
+            fingerprint = store.fingerprint(orders_csv, hours_ahead)
+            if orders_csv not in frames:
+                frames[orders_csv] = forecaster.prepare_data_from_csv(orders_csv)
+            misses.append((request_id, orders_csv, hours_ahead, use_store, fingerprint))
+        except Exception as e:
+            replies.append((request_id, None, f"{type(e).__name__}: {e}"))
+
+    if misses:
+        try:
+            forecasts = forecaster.predict_many([(frames[csv], hours) for _, csv, hours, _, _ in misses])
+            for (request_id, _, _, use_store, fingerprint), forecast in zip(misses, forecasts):
+                if use_store:
+                    forecast = store.save(fingerprint, forecast)
+                replies.append((request_id, forecast, None))
+        except Exception as e:
+            replies.extend((request_id, None, f"{type(e).__name__}: {e}") for request_id, *_ in misses)
+    return replies
+
+
+def _server_worker(requests, results, window: float, max_size: int, workdir: Optional[str]):
+    """Worker process loop: load the model once, then serve micro-batches until the None sentinel."""
+    if workdir:
+        os.chdir(workdir)  # models/ and data/ paths are relative to the project root
+    from services.lstm_forecaster import get_lstm_forecaster
+
+    try:
+        get_lstm_forecaster()
+        results.put(("ready", None, None))
+    except Exception as e:
+        results.put(("ready", None, f"{type(e).__name__}: {e}"))
+        return
+
+    for batch_no in itertools.count(1):
+        first = requests.get()
+        if first is None:
+            break
+        batch = _collect_batch(requests, first, window, max_size)
+        stop = batch[-1] is None
+        batch = [item for item in batch if item is not None]
+        for reply in _serve_batch(batch):
+            results.put(reply + (batch_no, len(batch)))
+        if stop:
+            break
+
+
+class ForecastServer:
+    """
+    Client side of the forecast worker.
+
+    A spawned worker process imports TensorFlow, loads the promoted LSTM once
+    and keeps it warm. Requests are queued to it; the worker waits up to
+    BATCH_WINDOW_MS after the first request of a batch, then answers everything
+    it collected with one predict_many (see LSTMForecaster.predict_many). The
+    caller's process never imports TensorFlow, and forecast() never blocks the
+    event loop.
+    """
+
+    def __init__(self, window_ms: float = BATCH_WINDOW_MS, max_batch_size: int = MAX_BATCH_SIZE,
+                 workdir: Optional[str] = None):
+        """
+        Args:
+            workdir: Directory the worker runs in (the project root), when the
+                     caller's working directory is elsewhere
+        """
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.workdir = workdir
+        self._lock = threading.Lock()
+        self._pending: Dict[int, tuple] = {}  # request id -> (future, worker process)
+        self._ids = itertools.count(1)
+        self._process = None
+        self._requests = None
+        self._results = None
+        self._ready = None
+        self._collector = None
+        self._close_registered = False
+        self.stats = {"requests": 0, "answered": 0, "batches": 0, "max_batch": 0,
+                      "failed": 0, "timeouts": 0}
+
+    def submit(self, orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24,
+               use_store: bool = True) -> Future:
+        """
+        Queue a forecast request.
+
+        Args:
+            use_store: Answer from (and write to) the forecast store; False always runs the model
+
+        Returns:
+            A concurrent.futures.Future resolving to the predict() result dict
+        """
+        future = Future()
+        with self._lock:
+            self.stats["requests"] += 1
+            self._ensure_worker()
+            future.request_id = next(self._ids)
+            self._pending[future.request_id] = (future, self._process)
+            self._requests.put((future.request_id, orders_csv, hours_ahead, use_store))
+        return future
+
+    def forecast_sync(self, orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24,
+                      timeout: float = REQUEST_TIMEOUT, use_store: bool = True) -> Dict[str, Any]:
+        """Blocking forecast for scripts; raises ForecastTimeout."""
+        future = self.submit(orders_csv, hours_ahead, use_store)
+        if not self._ready.wait(START_TIMEOUT):
+            self._abandon(future)
+            raise ForecastTimeout("Forecast worker did not start")
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            self._abandon(future)
+            raise ForecastTimeout(f"No forecast within {timeout}s")
+
+    async def forecast(self, orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24,
+                       timeout: float = REQUEST_TIMEOUT, use_store: bool = True) -> Dict[str, Any]:
+        """
+        Forecast without blocking the event loop.
+
+        The timeout starts once the worker has loaded the model (a cold start
+        is bounded by START_TIMEOUT instead).
+
+        Raises:
+            ForecastTimeout: no answer within `timeout` seconds
+            RuntimeError: the worker failed the request
+        """
+        future = self.submit(orders_csv, hours_ahead, use_store)
+        ready = self._ready
+        try:
+            if not ready.is_set() and not await asyncio.get_running_loop().run_in_executor(
+                    None, ready.wait, START_TIMEOUT):
+                self._abandon(future)
+                raise ForecastTimeout("Forecast worker did not start")
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(future)
+            raise ForecastTimeout(f"No forecast within {timeout}s")
+        except asyncio.CancelledError:
+            self._abandon(future, timeout=False)  # Caller went away; the answer is dropped
+            raise
+
+    def _abandon(self, future: Future, timeout: bool = True):
+        """Forget a timed-out or cancelled request; a late answer is then dropped."""
+        with self._lock:
+            if timeout:
+                self.stats["timeouts"] += 1
+            self._pending.pop(future.request_id, None)
+
+    def _ensure_worker(self):
+        """Start (or restart) the worker process and result collector; caller holds the lock."""
+        if self._process is not None and self._process.is_alive():
+            return
+        context = multiprocessing.get_context("spawn")
+        self._requests, self._results = context.Queue(), context.Queue()
+        self._ready = threading.Event()
+        process = context.Process(target=_server_worker,
+                                  args=(self._requests, self._results, self.window,
+                                        self.max_batch_size, self.workdir),
+                                  name="forecast-server", daemon=True)
+        process.start()
+        self._process = process
+        self._collector = threading.Thread(target=self._collect, args=(self._process, self._results, self._ready),
+                                           name="forecast-collector", daemon=True)
+        self._collector.start()
+        if not self._close_registered:
+            # Registered after multiprocessing's own exit hook, so it runs first
+            atexit.register(self.close)
+            self._close_registered = True
+        print(f"[FORECAST] Started forecast server (pid {self._process.pid})")
+
+    def _collect(self, process, results, ready: threading.Event):
+        """
+        Resolve futures as answers arrive; fail everything pending if the worker dies.
+
+        A caller may cancel or abandon its future at any moment, so answers for
+        futures that are already done are dropped; one bad reply never stops
+        the collector.
+        """
+        last_batch = None
+        while True:
+            try:
+                request_id, forecast, error, *batch = results.get(timeout=1.0)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                self._fail_pending(process, "forecast worker exited")
+                ready.set()
+                return
+            except (EOFError, OSError):
+                return
+
+            if request_id == "ready":
+                if error:
+                    print(f"[FORECAST] Worker failed to load the model: {error}")
+                ready.set()
+                continue
+
+            batch_no, batch_size = batch
+            with self._lock:
+                future, _ = self._pending.pop(request_id, (None, None))
+                self.stats["answered"] += 1
+                if batch_no != last_batch:
+                    self.stats["batches"] += 1
+                    self.stats["max_batch"] = max(self.stats["max_batch"], batch_size)
+                    last_batch = batch_no
+                if error:
+                    self.stats["failed"] += 1
+            if future is None or future.done():
+                continue
+            try:
+                if error:
+                    future.set_exception(RuntimeError(error))
+                else:
+                    future.set_result(forecast)
+            except Exception as e:  # Cancelled between the check and the set
+                print(f"[FORECAST] Dropped answer for request {request_id}: {type(e).__name__}")
+
+    def _fail_pending(self, process, reason: str):
+        """Fail every request that was sent to `process`."""
+        with self._lock:
+            lost = [rid for rid, (_, owner) in self._pending.items() if owner is process]
+            futures = [self._pending.pop(rid)[0] for rid in lost]
+            self.stats["failed"] += len(futures)
+        for future in futures:
+            if not future.done():
+                try:
+                    future.set_exception(RuntimeError(reason))
+                except Exception:
+                    pass
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats plus the mean number of requests answered per batch."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._pending)
+            stats["running"] = self._process is not None and self._process.is_alive()
+        stats["mean_batch"] = round(stats["answered"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["window_ms"] = self.window * 1000
+        return stats
+
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Answer what is queued, then stop the worker."""
+        process, collector = self._process, self._collector
+        if process is None:
+            return
+        try:
+            self._requests.put(None)
+            process.join(timeout)
+        except Exception:
+            pass
+        if process.is_alive():
+            process.terminate()
+        collector.join(5)  # Delivers the last answers, then fails whatever is left
+        self._fail_pending(process, "forecast server closed")
+        self._process = None
+
+
+# Singleton instance
+_forecast_server = None
+
+
+def get_forecast_server() -> ForecastServer:
+    """Get or create forecast server singleton."""
+    global _forecast_server
+    if _forecast_server is None:
+        _forecast_server = ForecastServer()
+    return _forecast_server
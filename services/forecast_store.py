@@ -0,0 +1,177 @@
+"""
+Forecast Store
+Caches LSTM forecasts keyed by input data, feature config and model version
+"""
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from services.model_registry import get_model_registry
+
+
+FORECAST_DIR = "models/forecasts"
+MODEL_ARTIFACT_PATTERNS = ["models/lstm_sales_model*.h5", "models/lstm_sales_model*.npz", "models/scaler*.pkl"]
+MAX_STORED_FORECASTS = 50
+
+
+def _file_signature(path: str) -> Optional[List[int]]:
+    """(size, mtime_ns) of a file, or None when it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def model_version() -> Dict[str, Any]:
+    """Signature of every trained model artifact and promoted registry version; retraining, exporting or promoting changes it."""
+    paths = sorted(p for pattern in MODEL_ARTIFACT_PATTERNS for p in glob.glob(pattern))
+    signature = {p: _file_signature(p) for p in paths}
+    signature["registry"] = get_model_registry().current_versions()
+    return signature
+
+
+class ForecastStore:
+    """
+    File-backed forecast cache shared by every forecast consumer.
+
+    The key fingerprints everything predict() depends on: the orders, weather
+    and events CSVs (size + mtime), the feature config, the inference backend
+    and the model artifacts. A hit is a stat of those files plus one JSON read;
+    the model is only loaded on a miss.
+    """
+
+    def __init__(self, cache_dir: str = FORECAST_DIR, max_entries: int = MAX_STORED_FORECASTS):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _resolve(forecaster=None):
+        """The forecaster that would serve the request (default: the promoted model)."""
+        from services.lstm_forecaster import get_lstm_forecaster
+
+        return forecaster or get_lstm_forecaster()
+
+    @staticmethod
+    def _served_config(forecaster=None) -> Dict[str, Any]:
+        """
+        Input files, features and lookback of `forecaster`.
+
+        Without one, they describe the promoted model and are read from its
+        registry metadata (or the hparams config before anything is
+        registered), so building a key never loads TensorFlow or the model.
+        """
+        from services.lstm_forecaster import LSTMForecaster
+        from services.hparam_search import load_best_config
+
+        if forecaster is not None:
+            return {"csvs": [forecaster.WEATHER_CSV, forecaster.EVENTS_CSV],
+                    "features": list(forecaster.feature_columns), "lookback": forecaster.lookback}
+        try:
+            meta = get_model_registry().current("lstm")
+        except (OSError, ValueError):
+            meta = None
+        lookback = (meta or {}).get("params", {}).get("lookback") or \
+            {**LSTMForecaster.DEFAULT_HPARAMS, **load_best_config("lstm")}["lookback"]
+        return {"csvs": [LSTMForecaster.WEATHER_CSV, LSTMForecaster.EVENTS_CSV],
+                "features": list(LSTMForecaster.FEATURE_COLUMNS), "lookback": int(lookback)}
+
+    def fingerprint(self, orders_csv: str, hours_ahead: int, forecaster=None) -> Dict[str, Any]:
+        """
+        Everything the forecast depends on, as a JSON-serializable dict.
+
+        Pass the same `forecaster` argument to lookups and saves so both hash
+        the same key; None (the promoted model) is cheap, see _served_config().
+        """
+        from services.lstm_forecaster import LSTM_BACKEND
+
+        config = self._served_config(forecaster)
+        inputs = [orders_csv] + config["csvs"]
+        return {
+            "inputs": {path: _file_signature(path) for path in inputs},
+            "features": config["features"],
+            "lookback": config["lookback"],
+            "hours_ahead": hours_ahead,
+            "backend": LSTM_BACKEND,
+            "model": model_version(),
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def key(self, fingerprint: Dict[str, Any]) -> str:
+        return hashlib.sha1(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()
+
+    def lookup(self, orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24,
+               forecaster=None) -> Optional[Dict[str, Any]]:
+        """Cached forecast for the current inputs and model, or None."""
+        path = self._path(self.key(self.fingerprint(orders_csv, hours_ahead, forecaster)))
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        forecast = entry["forecast"]
+        forecast["cached"] = True
+        forecast["computed_at"] = entry["computed_at"]
+        return forecast
+
+    def compute(self, orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24,
+                forecaster=None) -> Dict[str, Any]:
+        """Run prepare_data_from_csv + predict and store the result."""
+        served = self._resolve(forecaster)
+        # Fingerprint after loading the model and before reading, so a promotion or a
+        # file changing mid-run yields a miss next time
+        fingerprint = self.fingerprint(orders_csv, hours_ahead, forecaster)
+        data = served.prepare_data_from_csv(orders_csv)
+        return self.save(fingerprint, served.predict(data, hours_ahead=hours_ahead))
+
+    def save(self, fingerprint: Dict[str, Any], forecast: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a forecast computed for `fingerprint` (taken before its inputs were read)."""
+        entry = {
+            "fingerprint": fingerprint,
+            "computed_at": datetime.now().isoformat(),
+            "forecast": forecast,
+        }
+        path = self._path(self.key(fingerprint))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, default=float)
+        os.replace(tmp_path, path)
+        self._prune()
+
+        forecast = dict(forecast, cached=False, computed_at=entry["computed_at"])
+        return forecast
+
+    def get(self, orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24,
+            forecaster=None) -> Dict[str, Any]:
+        """Cached forecast if the inputs and model are unchanged, otherwise compute and store it."""
+        cached = self.lookup(orders_csv, hours_ahead, forecaster)
+        if cached is not None:
+            return cached
+        return self.compute(orders_csv, hours_ahead, forecaster)
+
+    def _prune(self):
+        """Keep only the newest max_entries forecasts."""
+        entries = sorted(glob.glob(os.path.join(self.cache_dir, "*.json")), key=os.path.getmtime, reverse=True)
+        for path in entries[self.max_entries:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# Singleton instance
+_forecast_store = None
+
+
+def get_forecast_store() -> ForecastStore:
+    """Get or create forecast store singleton."""
+    global _forecast_store
+    if _forecast_store is None:
+        _forecast_store = ForecastStore()
+    return _forecast_store
@@ -0,0 +1,295 @@
+"""
+Global Multi-Store LSTM Forecaster
+One model for every location: a store embedding conditions a shared LSTM
+"""
+import glob
+import os
+import pickle
+import tempfile
+import weakref
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+from services.lstm_forecaster import LSTMForecaster, save_model_atomic, save_pickle_atomic
+from services.sequence_pipeline import (
+    SEQUENCE_CACHE_DIR, TENSORFLOW_AVAILABLE, _remove_quietly, split_indices, window_dataset
+)
+
+
+STORES_DIR = "data/stores"
+MAX_STORES = 1024  # Embedding capacity; index 0 is reserved for unseen stores
+UNKNOWN_STORE = 0
+UNKNOWN_STORE_DROPOUT = 0.1  # Training windows shown as UNKNOWN_STORE, so its embedding is learned
+
+
+def load_store_frames(stores_dir: str = STORES_DIR) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (store_id, hourly features) one store at a time from {stores_dir}/{store_id}.csv.
+
+    Each CSV has the orders_realtime.csv layout; only one store is in memory at once.
+    """
+    for path in sorted(glob.glob(os.path.join(stores_dir, "*.csv"))):
+        store_id = os.path.splitext(os.path.basename(path))[0]
+        yield store_id, LSTMForecaster.prepare_data_from_csv(path)
+
+
+class GlobalLSTMForecaster:
+    """
+    Shared LSTM trained across many stores' hourly series.
+
+    Every store gets its own MinMaxScaler (a few floats each), so stores of very
+    different volume share one model. A learned store embedding is repeated
+    along the window and concatenated to the features, and a Dense(horizon) head
+    emits all forecast hours at once. forecast_all() predicts every store's next
+    `horizon` hours in one batched call.
+    """
+
+    def __init__(self, lookback: int = 24, horizon: int = 24, embedding_dim: int = 8):
+        self.lookback = lookback
+        self.horizon = horizon
+        self.embedding_dim = embedding_dim
+        self.feature_columns = list(LSTMForecaster.FEATURE_COLUMNS)
+        self.model = None
+        self.store_index: Dict[str, int] = {}
+        self.store_scalers: Dict[str, MinMaxScaler] = {}
+        self.model_path = "models/global_lstm_model.h5"
+        self.stores_path = "models/global_store_scalers.pkl"
+
+        os.makedirs("models", exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Load the trained global model and store table if present."""
+        if not (os.path.exists(self.model_path) and os.path.exists(self.stores_path)):
+            return
+        try:
+            with open(self.stores_path, 'rb') as f:
+                stores = pickle.load(f)
+            self.store_index, self.store_scalers = stores["index"], stores["scalers"]
+            self.lookback, self.horizon = stores["lookback"], stores["horizon"]
+            if TENSORFLOW_AVAILABLE:
+                from tensorflow.keras.models import load_model
+                self.model = load_model(self.model_path, compile=False)
+                self.model.compile(optimizer='adam', loss='mse')
+            print(f"[GLOBAL] Loaded global model for {len(self.store_index)} stores")
+        except Exception as e:
+            print(f"[GLOBAL] Failed to load global model: {e}")
+
+    def _build_model(self):
+        """Notebook LSTM stack with a store embedding input and a Dense(horizon) head."""
+        from tensorflow.keras import Model
+        from tensorflow.keras.layers import (
+            Concatenate, Dense, Dropout, Embedding, Input, LSTM, RepeatVector
+        )
+
+        window = Input(shape=(self.lookback, len(self.feature_columns)), name="window")
+        store = Input(shape=(), dtype="int32", name="store")
+
+        store_vec = Embedding(MAX_STORES + 1, self.embedding_dim)(store)
+        x = Concatenate()([window, RepeatVector(self.lookback)(store_vec)])
+        x = LSTM(64, return_sequences=True)(x)
+        x = Dropout(0.3)(x)
+        x = LSTM(32)(x)
+        x = Concatenate()([x, store_vec])
+        x = Dense(16, activation='relu')(x)
+        output = Dense(self.horizon)(x)
+
+        model = Model(inputs=[window, store], outputs=output)
+        model.compile(optimizer='adam', loss='mse')
+        return model
+
+    def _store_id(self, store: str, register: bool = False) -> int:
+        if store not in self.store_index and register:
+            if len(self.store_index) >= MAX_STORES:
+                raise ValueError(f"Global model holds at most {MAX_STORES} stores")
+            self.store_index[store] = len(self.store_index) + 1
+        return self.store_index.get(store, UNKNOWN_STORE)
+
+    def _features(self, frame: pd.DataFrame) -> np.ndarray:
+        for col in self.feature_columns:
+            if col not in frame.columns:
+                frame[col] = 0
+        return frame[self.feature_columns].values
+
+    def _stream_to_memmap(self, store_frames: Iterable[Tuple[str, pd.DataFrame]]):
+        """
+        Scale each store's series with its own scaler and append it to one on-disk row file.
+
+        Both files are private to this call and removed once mapped, as in
+        sequence_pipeline.scale_to_memmap, so concurrent trainings never share
+        them and nothing is left behind.
+
+        Returns:
+            (rows memmap, per-row store ids memmap, [(row_offset, n_rows), ...] per store)
+        """
+        os.makedirs(SEQUENCE_CACHE_DIR, exist_ok=True)
+        rows_fd, rows_path = tempfile.mkstemp(prefix="global_rows.", suffix=".f32", dir=SEQUENCE_CACHE_DIR)
+        ids_fd, ids_path = tempfile.mkstemp(prefix="global_row_stores.", suffix=".i32", dir=SEQUENCE_CACHE_DIR)
+
+        spans, total = [], 0
+        try:
+            with os.fdopen(rows_fd, 'wb') as rows_file, os.fdopen(ids_fd, 'wb') as ids_file:
+                for store, frame in store_frames:
+                    values = self._features(frame)
+                    if len(values) < self.lookback + self.horizon:
+                        print(f"[GLOBAL] Skipping {store}: only {len(values)} hours")
+                        continue
+                    scaler = MinMaxScaler().fit(values)
+                    self.store_scalers[store] = scaler
+                    store_id = self._store_id(store, register=True)
+
+                    rows_file.write(scaler.transform(values).astype(np.float32).tobytes())
+                    ids_file.write(np.full(len(values), store_id, dtype=np.int32).tobytes())
+                    spans.append((total, len(values)))
+                    total += len(values)
+
+            if total == 0:
+                rows, row_stores = None, None
+            else:
+                rows = np.memmap(rows_path, dtype=np.float32, mode='r', shape=(total, len(self.feature_columns)))
+                row_stores = np.memmap(ids_path, dtype=np.int32, mode='r', shape=(total,))
+        except BaseException:
+            _remove_quietly(rows_path)
+            _remove_quietly(ids_path)
+            raise
+
+        if os.name == "posix" or total == 0:
+            _remove_quietly(rows_path)
+            _remove_quietly(ids_path)
+        else:
+            weakref.finalize(rows, _remove_quietly, rows_path)  # Mapped files cannot be deleted on Windows
+            weakref.finalize(row_stores, _remove_quietly, ids_path)
+        return rows, row_stores, spans
+
+    def train(self, store_frames: Optional[Iterable[Tuple[str, pd.DataFrame]]] = None,
+              epochs: int = 40, batch_size: int = 256, callbacks: list = None) -> Dict[str, Any]:
+        """
+        Train on every store's history, streamed one store at a time.
+
+        Args:
+            store_frames: (store_id, prepared hourly frame) pairs; defaults to load_store_frames()
+            epochs: Number of training epochs
+            batch_size: Batch size for training
+            callbacks: Extra Keras callbacks (e.g. progress reporting from services.training_jobs)
+
+        Returns:
+            Training results dictionary
+        """
+        if not TENSORFLOW_AVAILABLE:
+            return {'success': False, 'error': 'TensorFlow not available'}
+
+        try:
+            from tensorflow.keras.callbacks import EarlyStopping
+
+            rows, row_stores, spans = self._stream_to_memmap(store_frames or load_store_frames())
+            if not spans:
+                return {'success': False, 'error': 'No store has enough data for training'}
+
+            # Chronological split inside each store; windows never cross store boundaries
+            splits = [[], [], []]
+            for offset, n_rows in spans:
+                for part, idx in zip(splits, split_indices(n_rows - self.lookback - self.horizon + 1)):
+                    part.append(idx + offset)
+            train_idx, val_idx, test_idx = (np.concatenate(part) for part in splits)
+
+            def dataset(indices, shuffle, id_dropout=0.0):
+                return window_dataset(rows, indices, self.lookback, batch_size, shuffle=shuffle,
+                                      horizon=self.horizon, row_ids=row_stores, id_dropout=id_dropout)
+
+            if self.model is None:
+                self.model = self._build_model()
+
+            early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
+            history = self.model.fit(
+                dataset(train_idx, True, UNKNOWN_STORE_DROPOUT),
+                validation_data=dataset(val_idx, False),
+                epochs=epochs,
+                callbacks=[early_stop] + list(callbacks or []),
+                verbose=0
+            )
+
+            predictions = self.model.predict(dataset(test_idx, False), verbose=0)
+            y_test = np.asarray(rows[(test_idx + self.lookback)[:, None] + np.arange(self.horizon), 0])
+            mae = np.mean(np.abs(y_test - predictions))
+            rmse = np.sqrt(np.mean((y_test - predictions) ** 2))
+
+            save_model_atomic(self.model, self.model_path)
+            save_pickle_atomic({
+                "index": self.store_index,
+                "scalers": self.store_scalers,
+                "lookback": self.lookback,
+                "horizon": self.horizon,
+            }, self.stores_path)
+
+            print(f"[GLOBAL] Trained on {len(spans)} stores. MAE: {mae:.3f}, RMSE: {rmse:.3f}")
+
+            return {
+                'success': True,
+                'stores': len(spans),
+                'mae': float(mae),
+                'rmse': float(rmse),
+                'epochs_run': len(history.history['loss']),
+                'samples_trained': len(train_idx)
+            }
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def forecast_all(self, store_frames: Iterable[Tuple[str, pd.DataFrame]],
+                     hours_ahead: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Forecast the next hours for every store in one batched model call.
+
+        Stores the model has not seen use the shared "unknown" embedding and a
+        scaler fitted on their own history.
+
+        Returns:
+            {'success', 'forecasts': {store_id: [orders per hour]}, 'hours_ahead'}
+        """
+        hours_ahead = min(hours_ahead or self.horizon, self.horizon)
+        if self.model is None:
+            return {'success': False, 'error': 'Global model not trained'}
+
+        stores, windows, ids, scalers = [], [], [], []
+        for store, frame in store_frames:
+            values = self._features(frame)
+            if len(values) < self.lookback:
+                continue
+            scaler = self.store_scalers.get(store) or MinMaxScaler().fit(values)
+            stores.append(store)
+            windows.append(scaler.transform(values[-self.lookback:]))
+            ids.append(self._store_id(store))
+            scalers.append(scaler)
+
+        if not stores:
+            return {'success': False, 'error': 'No store has enough history'}
+
+        X = np.stack(windows).astype(np.float32)
+        predictions = self.model.predict([X, np.array(ids, dtype=np.int32)], verbose=0)[:, :hours_ahead]
+
+        # Undo each store's sales scaling (first feature column)
+        mins = np.array([s.min_[0] for s in scalers])[:, None]
+        scales = np.array([s.scale_[0] for s in scalers])[:, None]
+        orders = np.maximum(0, (predictions - mins) / scales)
+
+        return {
+            'success': True,
+            'forecasts': {store: row.tolist() for store, row in zip(stores, orders)},
+            'hours_ahead': hours_ahead,
+            'stores': len(stores)
+        }
+
+
+# Singleton instance
+_global_forecaster = None
+
+
+def get_global_forecaster() -> GlobalLSTMForecaster:
+    """Get or create global forecaster singleton."""
+    global _global_forecaster
+    if _global_forecaster is None:
+        _global_forecaster = GlobalLSTMForecaster()
+    return _global_forecaster
@@ -0,0 +1,233 @@
+"""
+Hourly Aggregate Cache
+Columnar per-hour order totals behind LSTMForecaster.prepare_data_from_csv
+"""
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Optional columnar storage; without it the aggregates are kept in memory only
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+HOURLY_CACHE_DIR = "data/hourly_cache"
+ORDER_COLUMNS = ["timestamp", "quantity", "price"]
+READ_CHUNK_ROWS = 1_000_000
+TAIL_CHECK_BYTES = 4096  # Bytes before the cached offset that must be unchanged to append
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _hour_stats(orders: pd.DataFrame) -> pd.DataFrame:
+    """
+    Additive per-hour statistics of raw order lines.
+
+    Sums and counts (not means) so stats from appended rows merge with the
+    cached ones by plain addition, including a partially filled last hour.
+    """
+    orders = orders.dropna(subset=["timestamp"])
+    hours = pd.to_datetime(orders["timestamp"]).dt.floor("h")
+    grouped = pd.DataFrame({
+        "hour": hours,
+        "sales": orders["quantity"],
+        "price_sum": orders["price"],
+        "price_count": orders["price"].notna().astype(np.int64),
+        "rows": np.ones(len(orders), dtype=np.int64),
+    }).groupby("hour").sum(min_count=0)
+    return grouped
+
+
+def _merge_stats(cached: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    if cached.empty:
+        return new
+    return pd.concat([cached, new]).groupby(level=0).sum(min_count=0)
+
+
+def _date_factor(csv_path: str, column: str) -> Optional[pd.Series]:
+    """Per-date factor (mean over duplicate dates) from the weather or events CSV."""
+    if not os.path.exists(csv_path):
+        return None
+    frame = pd.read_csv(csv_path, usecols=["date", column])
+    frame["date"] = pd.to_datetime(frame["date"]).dt.normalize()
+    return frame.groupby("date")[column].mean()
+
+
+def assemble_hourly(stats: pd.DataFrame, weather_csv: str, events_csv: str) -> pd.DataFrame:
+    """
+    The prepare_data_from_csv table from hourly stats.
+
+    Matches the original row-level merge + groupby(1H) + ffill: every hour from
+    the first to the last order is present, sales of empty hours are 0, and
+    empty hours carry the previous hour's price, weather, traffic and calendar
+    features forward.
+    """
+    columns = ['price', 'sales', 'weather', 'traffic', 'is_weekend',
+               'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
+    if stats.empty:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='timestamp'))
+
+    index = pd.date_range(stats.index.min(), stats.index.max(), freq='h', name='timestamp')
+    stats = stats.reindex(index)
+    filled = stats["rows"].fillna(0).values > 0
+    dates = index.normalize()
+
+    def per_hour(values) -> np.ndarray:
+        # Empty hours are NaN, as a mean over no rows, and get forward-filled below
+        return np.where(filled, np.asarray(values, dtype=np.float64), np.nan)
+
+    def date_factor(csv_path: str, column: str) -> np.ndarray:
+        factor = _date_factor(csv_path, column)
+        if factor is None:
+            return np.ones(len(index))
+        return dates.map(factor).to_numpy(dtype=np.float64, na_value=1.0)
+
+    sales = stats["sales"].fillna(0)
+    agg = pd.DataFrame({
+        'price': stats["price_sum"] / stats["price_count"].replace(0, np.nan),
+        'sales': sales.astype(np.int64) if np.allclose(sales, sales.round()) else sales,
+        'weather': per_hour(date_factor(weather_csv, 'weather_factor')),
+        'traffic': per_hour(date_factor(events_csv, 'traffic_factor')),
+        'is_weekend': per_hour(index.dayofweek >= 5),
+        'hour_sin': per_hour(np.sin(2 * np.pi * index.hour / 24)),
+        'hour_cos': per_hour(np.cos(2 * np.pi * index.hour / 24)),
+        'dow_sin': per_hour(np.sin(2 * np.pi * index.dayofweek / 7)),
+        'dow_cos': per_hour(np.cos(2 * np.pi * index.dayofweek / 7)),
+    }, index=index)
+
+    return agg.ffill().fillna(0)
+
+
+class HourlyAggregateCache:
+    """
+    Per-hour order statistics of each order log, cached as Parquet.
+
+    The cache remembers the log's size, mtime and how many bytes it has
+    aggregated. An unchanged log is a stat plus (in-process) a dict lookup; a
+    log that only grew is read from the cached byte offset, so only appended
+    rows are parsed; anything else triggers a full rebuild. Weather and events
+    factors are joined per hour at assembly time (those files are tiny).
+    """
+
+    def __init__(self, cache_dir: str = HOURLY_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._memory: Dict[str, Tuple[Any, pd.DataFrame]] = {}  # path -> (signatures, assembled table)
+
+    def _paths(self, orders_csv: str) -> Tuple[str, str]:
+        key = hashlib.sha1(os.path.abspath(orders_csv).encode()).hexdigest()[:12]
+        return (os.path.join(self.cache_dir, f"{key}.parquet"),
+                os.path.join(self.cache_dir, f"{key}.json"))
+
+    def _load(self, orders_csv: str) -> Tuple[Optional[Dict[str, Any]], pd.DataFrame]:
+        stats_path, meta_path = self._paths(orders_csv)
+        if not (HAS_PYARROW and os.path.exists(meta_path) and os.path.exists(stats_path)):
+            return None, pd.DataFrame()
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            return meta, pd.read_parquet(stats_path)
+        except Exception as e:
+            print(f"[HOURLY] Ignoring unreadable cache for {orders_csv}: {e}")
+            return None, pd.DataFrame()
+
+    def _save(self, orders_csv: str, stats: pd.DataFrame, meta: Dict[str, Any]):
+        if not HAS_PYARROW:
+            return
+        stats_path, meta_path = self._paths(orders_csv)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_stats = f"{stats_path}.tmp{os.getpid()}"
+        stats.to_parquet(tmp_stats)
+        os.replace(tmp_stats, stats_path)
+        tmp_meta = f"{meta_path}.tmp{os.getpid()}"
+        with open(tmp_meta, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    @staticmethod
+    def _tail_hash(orders_csv: str, offset: int) -> str:
+        with open(orders_csv, 'rb') as f:
+            f.seek(max(0, offset - TAIL_CHECK_BYTES))
+            return hashlib.sha1(f.read(min(offset, TAIL_CHECK_BYTES))).hexdigest()
+
+    def _full_build(self, orders_csv: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        size, mtime_ns = _signature(orders_csv)
+        header = list(pd.read_csv(orders_csv, nrows=0).columns)
+        stats = pd.DataFrame()
+        for chunk in pd.read_csv(orders_csv, usecols=ORDER_COLUMNS, chunksize=READ_CHUNK_ROWS):
+            stats = _merge_stats(stats, _hour_stats(chunk))
+        meta = {"size": size, "mtime_ns": mtime_ns, "offset": size, "header": header,
+                "tail_hash": self._tail_hash(orders_csv, size), "built_at": datetime.now().isoformat()}
+        if _signature(orders_csv) != (size, mtime_ns):
+            meta = None  # Written to while reading: use the result but do not cache it
+        print(f"[HOURLY] Aggregated {orders_csv} into {len(stats)} hours")
+        return stats, meta
+
+    def _append(self, orders_csv: str, stats: pd.DataFrame, meta: Dict[str, Any]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Aggregate only the bytes after the cached offset (complete lines only)."""
+        size, mtime_ns = _signature(orders_csv)
+        with open(orders_csv, 'rb') as f:
+            f.seek(meta["offset"])
+            tail = f.read(size - meta["offset"])
+        tail = tail[:tail.rfind(b"\n") + 1]  # A half-written last line waits for the next call
+        if tail.strip():
+            new_rows = pd.read_csv(io.BytesIO(tail), names=meta["header"], usecols=ORDER_COLUMNS)
+            stats = _merge_stats(stats, _hour_stats(new_rows))
+            print(f"[HOURLY] Appended {len(new_rows)} order rows from {orders_csv}")
+        offset = meta["offset"] + len(tail)
+        meta = {**meta, "size": size, "mtime_ns": mtime_ns, "offset": offset,
+                "tail_hash": self._tail_hash(orders_csv, offset)}
+        return stats, meta
+
+    def hour_stats(self, orders_csv: str) -> pd.DataFrame:
+        """Up-to-date per-hour stats for an order log, updating the cache as needed."""
+        meta, stats = self._load(orders_csv)
+        size, mtime_ns = _signature(orders_csv)
+
+        if meta is not None and (meta["size"], meta["mtime_ns"]) == (size, mtime_ns):
+            return stats
+        if (meta is not None and size > meta["offset"]
+                and self._tail_hash(orders_csv, meta["offset"]) == meta["tail_hash"]):
+            stats, meta = self._append(orders_csv, stats, meta)
+        else:
+            stats, meta = self._full_build(orders_csv)
+        if meta is not None:
+            self._save(orders_csv, stats, meta)
+        return stats
+
+    def prepare(self, orders_csv: str, weather_csv: str, events_csv: str) -> pd.DataFrame:
+        """The hourly LSTM feature table for an order log (a fresh copy each call)."""
+        signatures = tuple(_signature(p) for p in (orders_csv, weather_csv, events_csv))
+        cached = self._memory.get(orders_csv)
+        if cached is not None and cached[0] == signatures:
+            return cached[1].copy()
+
+        table = assemble_hourly(self.hour_stats(orders_csv), weather_csv, events_csv)
+        self._memory[orders_csv] = (signatures, table)
+        return table.copy()
+
+
+# Singleton instance
+_hourly_cache = None
+
+
+def get_hourly_cache() -> HourlyAggregateCache:
+    """Get or create hourly aggregate cache singleton."""
+    global _hourly_cache
+    if _hourly_cache is None:
+        _hourly_cache = HourlyAggregateCache()
+    return _hourly_cache
@@ -0,0 +1,400 @@
+"""
+Hyperparameter Search
+Successive-halving search for the LSTM and XGBoost forecasters across a process pool
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import shutil
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+HPARAMS_DIR = "models/hparams"
+SEARCH_DIR = "models/hparam_search"
+
+# Discrete spaces; each trial samples one value per key
+SEARCH_SPACES = {
+    "lstm": {
+        "lookback": [12, 24, 48],
+        "units_1": [32, 64, 128],
+        "units_2": [16, 32, 64],
+        "dense_units": [8, 16, 32],
+        "dropout": [0.1, 0.2, 0.3],
+        "learning_rate": [0.0005, 0.001, 0.003],
+        "batch_size": [32, 64],
+    },
+    "xgboost": {
+        "max_depth": [3, 5, 7],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.7, 1.0],
+        "min_child_weight": [1, 3, 5],
+    },
+}
+
+# The resource successive halving grows per rung: (parameter, budget of the first rung)
+BUDGETS = {"lstm": ("epochs", 5), "xgboost": ("n_estimators", 50)}
+
+# Files each trial leaves in its artifact directory, by model registry role
+TRIAL_FILES = {
+    "lstm": {"model": "lstm_sales_model.h5", "scaler": "scaler.pkl", "numpy": "lstm_sales_model.npz"},
+    "xgboost": {"model": "xgboost_model.json"},
+}
+
+
+def load_best_config(model: str) -> Dict[str, Any]:
+    """Best searched hyperparameters for a model ({} when no search has run)."""
+    path = os.path.join(HPARAMS_DIR, f"{model}.json")
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)["config"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_best_config(model: str, config: Dict[str, Any], details: Dict[str, Any]) -> str:
+    """Write the winning config (with its score and data fingerprint) atomically."""
+    os.makedirs(HPARAMS_DIR, exist_ok=True)
+    path = os.path.join(HPARAMS_DIR, f"{model}.json")
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump({"config": config, **details, "saved_at": datetime.now().isoformat()}, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def sample_configs(space: Dict[str, List[Any]], n_trials: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Up to n_trials distinct configurations drawn from the grid."""
+    rng = random.Random(seed)
+    grid_size = int(np.prod([len(values) for values in space.values()]))
+    configs, seen = [], set()
+    while len(configs) < min(n_trials, grid_size):
+        config = {key: rng.choice(values) for key, values in space.items()}
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def current_memory_mb() -> float:
+    """Resident memory of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class TrialMemoryExceeded(Exception):
+    """A trial grew past its memory limit and was stopped."""
+
+
+def prepare_dataset(model: str, csv_path: str, cache_dir: str = SEARCH_DIR) -> Dict[str, Any]:
+    """
+    Build the arrays every trial trains on, once, as .npy files trials memory-map.
+
+    lstm: the MinMax-scaled LSTMForecaster feature table (windows for any
+    lookback are strided views over it). xgboost: ForecastAgent's feature
+    matrix and targets. Files are keyed by the source CSV's size and mtime, so
+    reruns on unchanged data reuse them and all trial processes share the same
+    page cache. The LSTM scaler is pickled alongside, so a trial's model can be
+    registered and served.
+    """
+    stat = os.stat(csv_path)
+    key = hashlib.sha1(f"{model}:{os.path.abspath(csv_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+    data_dir = os.path.join(cache_dir, "data", key)
+    meta_path = os.path.join(data_dir, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if model != "lstm" or "scaler" in meta:  # Older LSTM datasets lack the scaler; rebuild
+            return meta
+
+    from services.forecast_models import load_hourly_series
+
+    os.makedirs(data_dir, exist_ok=True)
+    history = load_hourly_series(csv_path)
+    meta = {"model": model, "csv": csv_path, "fingerprint": key, "rows": len(history)}
+
+    if model == "lstm":
+        from sklearn.preprocessing import MinMaxScaler
+        from services.lstm_forecaster import LSTMForecaster
+
+        scaler = MinMaxScaler()
+        scaled = scaler.fit_transform(history[LSTMForecaster.FEATURE_COLUMNS].values).astype(np.float32)
+        np.save(os.path.join(data_dir, "scaled.npy"), scaled)
+        with open(os.path.join(data_dir, "scaler.pkl"), 'wb') as f:
+            pickle.dump(scaler, f)
+        meta.update({"scaled": os.path.join(data_dir, "scaled.npy"), "scaler": os.path.join(data_dir, "scaler.pkl"),
+                     "target_min": float(scaler.min_[0]), "target_scale": float(scaler.scale_[0])})
+    else:
+        from agents.forecast_agent import ForecastAgent
+        from services.feature_store import FeatureStore
+
+        frame = FeatureStore(root=None).training_frame(history[["orders"]].reset_index())
+        frame = frame.dropna(subset=ForecastAgent.FEATURE_COLS + ["orders"])
+        np.save(os.path.join(data_dir, "X.npy"), frame[ForecastAgent.FEATURE_COLS].values.astype(np.float32))
+        np.save(os.path.join(data_dir, "y.npy"), frame["orders"].values.astype(np.float32))
+        meta.update({"X": os.path.join(data_dir, "X.npy"), "y": os.path.join(data_dir, "y.npy")})
+
+    tmp_path = f"{meta_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    return meta
+
+
+def _train_lstm_trial(task: Dict[str, Any]) -> float:
+    """Validation MAE (orders) of one LSTM config trained for task['budget'] epochs; the model goes to task['artifact_dir']."""
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import Callback, EarlyStopping
+    from services.lstm_forecaster import LSTMForecaster, build_lstm_model, save_model_atomic
+    from services.lstm_numpy import export_keras_model
+    from services.sequence_pipeline import window_dataset
+
+    config, meta, limit = task["config"], task["dataset"], task["memory_limit_mb"]
+    tf.config.threading.set_intra_op_parallelism_threads(task["threads"])
+    scaled = np.load(meta["scaled"], mmap_mode='r')
+    lookback, batch_size = int(config["lookback"]), int(config["batch_size"])
+    n_samples = len(scaled) - lookback
+    if n_samples < 20:
+        raise ValueError(f"Only {n_samples} windows for lookback {lookback}")
+    # Validate on the same target hours (the last 20%) whatever the lookback
+    cutoff = int(len(scaled) * 0.8)
+    samples = np.arange(n_samples)
+    train_idx, val_idx = samples[samples + lookback < cutoff], samples[samples + lookback >= cutoff]
+
+    class MemoryGuard(Callback):
+        def on_train_batch_end(self, batch, logs=None):
+            if limit and current_memory_mb() > limit:
+                self.model.stop_training = True
+                self.exceeded = True
+
+    model = build_lstm_model(lookback, scaled.shape[1], {**LSTMForecaster.DEFAULT_HPARAMS, **config})
+
+    guard = MemoryGuard()
+    guard.exceeded = False
+    model.fit(
+        window_dataset(scaled, train_idx, lookback, batch_size, seed=task["seed"]),
+        validation_data=window_dataset(scaled, val_idx, lookback, batch_size, shuffle=False),
+        epochs=task["budget"],
+        callbacks=[EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True), guard],
+        verbose=0
+    )
+    if guard.exceeded:
+        raise TrialMemoryExceeded(f"over {limit} MB")
+
+    predictions = model.predict(window_dataset(scaled, val_idx, lookback, 256, shuffle=False), verbose=0)[:, 0]
+    actual = np.asarray(scaled[val_idx + lookback, 0])
+    mae = float(np.mean(np.abs(predictions - actual)) / meta["target_scale"])
+
+    # Same file roles as LSTMForecaster, so the winner can be registered as an "lstm" version
+    out_dir = task["artifact_dir"]
+    os.makedirs(out_dir, exist_ok=True)
+    save_model_atomic(model, os.path.join(out_dir, "lstm_sales_model.h5"))
+    shutil.copy(meta["scaler"], os.path.join(out_dir, "scaler.pkl"))
+    with open(meta["scaler"], 'rb') as f:
+        export_keras_model(model, pickle.load(f), os.path.join(out_dir, "lstm_sales_model.npz"))
+    return mae
+
+
+def _train_xgboost_trial(task: Dict[str, Any]) -> float:
+    """Validation MAE (orders) of one XGBoost config with task['budget'] trees; the model goes to task['artifact_dir']."""
+    from xgboost import XGBRegressor
+    from xgboost.callback import TrainingCallback
+    from agents.forecast_agent import ForecastAgent
+
+    meta, limit = task["dataset"], task["memory_limit_mb"]
+    X, y = np.load(meta["X"], mmap_mode='r'), np.load(meta["y"], mmap_mode='r')
+    split = int(len(X) * 0.8)
+
+    class MemoryGuard(TrainingCallback):
+        exceeded = False
+
+        def after_iteration(self, model, epoch, evals_log):
+            if limit and current_memory_mb() > limit:
+                MemoryGuard.exceeded = True
+                return True  # Stop boosting
+            return False
+
+    params = {**ForecastAgent.XGB_PARAMS, **task["config"], "n_estimators": task["budget"],
+              "n_jobs": task["threads"]}
+    model = XGBRegressor(**params, callbacks=[MemoryGuard()])
+    model.fit(np.asarray(X[:split]), np.asarray(y[:split]))
+    if MemoryGuard.exceeded:
+        raise TrialMemoryExceeded(f"over {limit} MB")
+    mae = float(np.mean(np.abs(model.predict(np.asarray(X[split:])) - y[split:])))
+
+    os.makedirs(task["artifact_dir"], exist_ok=True)
+    model.save_model(os.path.join(task["artifact_dir"], "xgboost_model.json"))
+    return mae
+
+
+def _run_trial(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Train and score one config at one budget. Runs in its own worker process."""
+    row = {"trial": task["trial"], "rung": task["rung"], "budget": task["budget"],
+           "config": json.dumps(task["config"], sort_keys=True)}
+    start = time.perf_counter()
+    try:
+        if task["dataset"]["model"] == "lstm":
+            row["val_mae"] = _train_lstm_trial(task)
+        else:
+            row["val_mae"] = _train_xgboost_trial(task)
+        row["status"] = "ok"
+    except TrialMemoryExceeded as e:
+        row["status"] = "memory_limit"
+        row["error"] = str(e)
+    except Exception as e:
+        row["status"] = "failed"
+        row["error"] = str(e)
+    row["seconds"] = round(time.perf_counter() - start, 2)
+    row["peak_memory_mb"] = round(current_memory_mb(), 1)
+    return row
+
+
+class HyperparameterSearch:
+    """
+    Successive halving over sampled configs of one forecaster.
+
+    Rung 0 trains every config with a small budget (epochs or trees); each
+    following rung keeps the best 1/eta by validation MAE and multiplies the
+    budget by eta, so poor configs stop early. Every trial runs in a fresh
+    spawned process and is stopped if it grows past memory_limit_mb. All
+    trials go to a leaderboard CSV; the winner goes to models/hparams/{model}.json,
+    which LSTMForecaster and ForecastAgent read as their defaults, and its
+    trained model is registered (not promoted) in the model registry.
+    """
+
+    def __init__(self, model: str, csv_path: str, n_trials: int = 27, eta: int = 3, rungs: int = 3,
+                 workers: Optional[int] = None, memory_limit_mb: Optional[float] = 4096,
+                 seed: Optional[int] = 42, output_dir: str = SEARCH_DIR):
+        if model not in SEARCH_SPACES:
+            raise ValueError(f"No search space for {model} (available: {', '.join(SEARCH_SPACES)})")
+        self.model = model
+        self.csv_path = csv_path
+        self.n_trials = n_trials
+        self.eta = eta
+        self.rungs = rungs
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_limit_mb = memory_limit_mb
+        self.seed = seed
+        self.output_dir = output_dir
+        self.leaderboard_path = os.path.join(output_dir, f"leaderboard_{model}.csv")
+
+    def _artifact_dir(self, search_id: str, trial: int, rung: int) -> str:
+        return os.path.join(self.output_dir, "trials", search_id, f"trial{trial}_rung{rung}")
+
+    def _run_rung(self, pool, search_id: str, rung: int, budget: int, trials: Dict[int, Dict[str, Any]],
+                  dataset: Dict[str, Any]) -> List[Dict[str, Any]]:
+        tasks = [
+            {"trial": trial, "rung": rung, "budget": budget, "config": config, "dataset": dataset,
+             "artifact_dir": self._artifact_dir(search_id, trial, rung),
+             "memory_limit_mb": self.memory_limit_mb, "seed": self.seed,
+             "threads": max(1, (os.cpu_count() or 1) // self.workers)}  # No oversubscription
+            for trial, config in trials.items()
+        ]
+        rows = []
+        for row in pool.imap_unordered(_run_trial, tasks):
+            score = f"MAE {row['val_mae']:.3f}" if row["status"] == "ok" else row["status"]
+            print(f"[HPARAM] rung {rung} trial {row['trial']} ({budget} {BUDGETS[self.model][0]}): {score}")
+            rows.append(row)
+        return rows
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the search and save the best config.
+
+        Returns:
+            {'success', 'search_id', 'best_config', 'best_val_mae', 'leaderboard', 'trials_run'}
+        """
+        started = time.perf_counter()
+        search_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        budget_name, budget = BUDGETS[self.model]
+
+        dataset = prepare_dataset(self.model, self.csv_path, self.output_dir)
+        trials = dict(enumerate(sample_configs(SEARCH_SPACES[self.model], self.n_trials, self.seed)))
+        print(f"[HPARAM] {self.model}: {len(trials)} configs, {self.rungs} rungs, {self.workers} workers")
+
+        rows = []
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=min(self.workers, len(trials)), maxtasksperchild=1) as pool:
+            for rung in range(self.rungs):
+                results = self._run_rung(pool, search_id, rung, budget, trials, dataset)
+                rows.extend(results)
+                ranked = sorted((r for r in results if r["status"] == "ok"), key=lambda r: r["val_mae"])
+                keep = max(1, len(trials) // self.eta)
+                if rung == self.rungs - 1 or len(ranked) <= 1:
+                    break
+                trials = {r["trial"]: trials[r["trial"]] for r in ranked[:keep]}
+                budget *= self.eta
+
+        leaderboard = pd.DataFrame(rows)
+        leaderboard.insert(0, "search_id", search_id)
+        leaderboard.insert(1, "model", self.model)
+        leaderboard.insert(2, "dataset", dataset["fingerprint"])
+        os.makedirs(self.output_dir, exist_ok=True)
+        leaderboard.to_csv(self.leaderboard_path, mode='a', index=False,
+                           header=not os.path.exists(self.leaderboard_path))
+
+        # Best of the highest rung that produced a score
+        scored = leaderboard[leaderboard["status"] == "ok"]
+        if scored.empty:
+            return {'success': False, 'error': 'Every trial failed', 'leaderboard': leaderboard}
+        top = scored[scored["rung"] == scored["rung"].max()].sort_values("val_mae").iloc[0]
+        best_config = {**json.loads(top["config"]), budget_name: int(top["budget"])}
+
+        details = {
+            "val_mae": float(top["val_mae"]),
+            "search_id": search_id,
+            "dataset": self.csv_path,
+            "data_fingerprint": dataset["fingerprint"],
+            "seed": self.seed,
+        }
+        try:
+            version = self._register_best(self._artifact_dir(search_id, int(top["trial"]), int(top["rung"])),
+                                          best_config, details)
+        finally:
+            shutil.rmtree(os.path.join(self.output_dir, "trials", search_id), ignore_errors=True)
+        save_best_config(self.model, best_config, {**details, "registry_version": version})
+        print(f"[HPARAM] Best {self.model} config (val MAE {top['val_mae']:.3f}): {best_config}")
+
+        return {
+            'success': True,
+            'search_id': search_id,
+            'best_config': best_config,
+            'best_val_mae': float(top["val_mae"]),
+            'registry_version': version,
+            'leaderboard': leaderboard,
+            'trials_run': len(leaderboard),
+            'seconds': round(time.perf_counter() - started, 1)
+        }
+
+    def _register_best(self, artifact_dir: str, best_config: Dict[str, Any], details: Dict[str, Any]) -> int:
+        """
+        Register the winning trial's model as a new, unpromoted version.
+
+        Params are the full set the model was built with (defaults plus the
+        searched config), as the forecaster's own training registers them.
+        """
+        from services.model_registry import get_model_registry
+
+        if self.model == "lstm":
+            from services.lstm_forecaster import LSTMForecaster
+            defaults = LSTMForecaster.DEFAULT_HPARAMS
+        else:
+            from agents.forecast_agent import ForecastAgent
+            defaults = ForecastAgent.XGB_PARAMS
+        files = {role: os.path.join(artifact_dir, name) for role, name in TRIAL_FILES[self.model].items()}
+        return get_model_registry().register(
+            self.model, files, metrics={**details, "source": "hparam_search"},
+            data_fingerprint=details["data_fingerprint"], params={**defaults, **best_config}, promote=False
+        )
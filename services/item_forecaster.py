@@ -0,0 +1,176 @@
+"""
+Item-Level Demand Forecaster
+Item x hour forecasts reconciled so items sum to the store total and hours sum to the day
+"""
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+RECENT_DAYS = 7  # Window for each item's daily-total forecast
+
+
+def reconcile_ols(base: np.ndarray, hour_totals: np.ndarray, item_totals: np.ndarray,
+                  grand_total: float) -> np.ndarray:
+    """
+    OLS reconciliation of an hours x items table with its margins.
+
+    Finds the coherent table X closest (least squares) to the base table, the
+    hourly totals, the per-item totals and the grand total all at once, i.e.
+    (S'S)^-1 S'y for the summing matrix S. S'S acts on the grand-mean, hour,
+    item and interaction components of a table as the scalars 1+H+I+HI, 1+I,
+    1+H and 1, so the solve is four means and four divisions.
+
+    Args:
+        base: (hours, items) base forecasts
+        hour_totals: (hours,) forecasts of each hour's total across items
+        item_totals: (items,) forecasts of each item's total across hours
+        grand_total: Forecast of the overall total
+
+    Returns:
+        Reconciled (hours, items) table; its sums are the reconciled margins
+    """
+    n_hours, n_items = base.shape
+    Z = base + hour_totals[:, None] + item_totals[None, :] + grand_total
+
+    grand = Z.mean()
+    hour_effect = Z.mean(axis=1, keepdims=True) - grand
+    item_effect = Z.mean(axis=0, keepdims=True) - grand
+    interaction = Z - grand - hour_effect - item_effect
+
+    return (interaction
+            + hour_effect / (1 + n_items)
+            + item_effect / (1 + n_hours)
+            + grand / (1 + n_hours + n_items + n_hours * n_items))
+
+
+def reconcile_proportional(base: np.ndarray, hour_totals: np.ndarray,
+                           item_totals: Optional[np.ndarray] = None,
+                           iterations: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """
+    Proportional (top-down) reconciliation.
+
+    With only hour_totals each hour's items are scaled to the hour total. With
+    item_totals as well (rescaled to the same grand total), rows and columns are
+    scaled alternately (iterative proportional fitting) until both margins match.
+    Zero base cells stay zero.
+    """
+    X = np.maximum(base, 0).astype(np.float64)
+    # Hours with no base demand fall back to an even split
+    empty = X.sum(axis=1) <= 0
+    X[empty] = 1.0
+
+    def scale_rows(X):
+        return X * (hour_totals / np.maximum(X.sum(axis=1), 1e-12))[:, None]
+
+    X = scale_rows(X)
+    if item_totals is None:
+        return X
+
+    targets = item_totals * (hour_totals.sum() / max(item_totals.sum(), 1e-12))
+    for _ in range(iterations):
+        X = X * (targets / np.maximum(X.sum(axis=0), 1e-12))[None, :]
+        X = scale_rows(X)
+        if np.abs(X.sum(axis=0) - targets).max() <= tol * max(targets.max(), 1.0):
+            break
+    return X
+
+
+class ItemForecaster:
+    """Item x hour demand forecasts from the `item` column of the orders CSV."""
+
+    def __init__(self, orders_csv: str = "data/orders_realtime.csv"):
+        self.orders_csv = orders_csv
+
+    def item_hour_matrix(self) -> pd.DataFrame:
+        """Quantity per item per hour (hours as rows, items as columns, empty hours as 0)."""
+        orders = pd.read_csv(self.orders_csv, usecols=['timestamp', 'item', 'quantity'])
+        orders['timestamp'] = pd.to_datetime(orders['timestamp']).dt.floor('h')
+        matrix = orders.pivot_table(index='timestamp', columns='item', values='quantity',
+                                    aggfunc='sum', fill_value=0)
+        full_range = pd.date_range(matrix.index.min(), matrix.index.max(), freq='h')
+        return matrix.reindex(full_range, fill_value=0)
+
+    def base_forecast(self, history: pd.DataFrame, future_hours: pd.DatetimeIndex):
+        """
+        Unreconciled forecasts for every item at once.
+
+        Returns:
+            (hours x items matrix from each item's hour-of-day profile,
+             per-item totals for the horizon from the last RECENT_DAYS of demand)
+        """
+        profile = history.groupby(history.index.hour).mean().reindex(range(24), fill_value=0)
+        base = profile.values[future_hours.hour]
+
+        recent = history[history.index > history.index[-1] - timedelta(days=RECENT_DAYS)]
+        hours_covered = max(len(recent), 1)
+        item_totals = recent.values.sum(axis=0) * (len(future_hours) / hours_covered)
+        return base, item_totals
+
+    def forecast(self, hours_ahead: int = 24, store_totals: Optional[np.ndarray] = None,
+                 method: str = "ols") -> Dict[str, Any]:
+        """
+        Forecast demand for every item and hour, reconciled to the store forecast.
+
+        Args:
+            hours_ahead: Number of hours to forecast
+            store_totals: Hourly store-level orders forecast, at least hours_ahead long;
+                          defaults to the LSTM forecast
+            method: "ols" (least-squares compromise of all levels) or "proportional"
+                    (store totals are exact, items split by their base shares)
+
+        Returns:
+            Item x hour forecast with item and hour totals
+        """
+        if method not in ("ols", "proportional"):
+            return {'success': False, 'error': f'Unknown reconciliation method: {method}'}
+        if hours_ahead < 1:
+            return {'success': False, 'error': f'hours_ahead must be at least 1, got {hours_ahead}'}
+        if store_totals is not None:
+            store_totals = np.asarray(store_totals, dtype=np.float64).ravel()
+            if len(store_totals) < hours_ahead:
+                return {'success': False,
+                        'error': f'store_totals covers {len(store_totals)} hours, {hours_ahead} requested'}
+
+        try:
+            history = self.item_hour_matrix()
+            future_hours = pd.date_range(history.index[-1] + timedelta(hours=1), periods=hours_ahead, freq='h')
+            base, item_totals = self.base_forecast(history, future_hours)
+
+            if store_totals is None:
+                store_totals = self._store_totals(hours_ahead, base)
+            store_totals = store_totals[:hours_ahead]
+
+            if method == "ols":
+                reconciled = np.maximum(0, reconcile_ols(base, store_totals, item_totals, store_totals.sum()))
+            else:
+                reconciled = reconcile_proportional(base, store_totals, item_totals)
+
+            items = list(history.columns)
+            return {
+                'success': True,
+                'method': method,
+                'items': items,
+                'hours': [h.isoformat() for h in future_hours],
+                'matrix': np.round(reconciled, 3).tolist(),
+                'item_totals': dict(zip(items, np.round(reconciled.sum(axis=0), 2).tolist())),
+                'hour_totals': np.round(reconciled.sum(axis=1), 2).tolist(),
+                'total': round(float(reconciled.sum()), 2)
+            }
+
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _store_totals(self, hours_ahead: int, base: np.ndarray) -> np.ndarray:
+        """Hourly store totals from the (cached) LSTM forecast, or the base forecast's own sums."""
+        try:
+            from services.lstm_forecaster import run_lstm_forecast
+            forecast = run_lstm_forecast(self.orders_csv, hours_ahead)
+            if len(forecast.get('future_sales') or []) >= hours_ahead:
+                return np.asarray(forecast['future_sales'], dtype=np.float64)
+            print(f"[ITEMS] Store forecast covers fewer than {hours_ahead} hours, using item base totals")
+        except Exception as e:
+            print(f"[ITEMS] Store forecast unavailable, using item base totals: {e}")
+        return base.sum(axis=1)
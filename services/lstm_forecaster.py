@@ -7,48 +7,213 @@ import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 from scipy import stats
 import os
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import pickle
 from datetime import datetime, timedelta
+from services.sequence_pipeline import sliding_windows, split_indices, scale_to_memmap, window_dataset, TENSORFLOW_AVAILABLE
+from services.lstm_numpy import export_keras_model, load_numpy_model, NumpyLSTMModel
+from services.forecast_store import model_version
+from services.model_registry import get_model_registry, data_fingerprint
+from services.hparam_search import load_best_config
+from services.hourly_cache import get_hourly_cache
+from services.holt_winters import forecast_series
 
-# TensorFlow imports
-try:
-    from tensorflow.keras.models import Sequential, load_model
+# Inference backend: "auto" serves exported NumPy weights when they are up to date
+# and TensorFlow otherwise; "tensorflow" or "numpy" force one. TensorFlow is only
+# imported when the Keras backend is actually used (always for training).
+LSTM_BACKEND = os.getenv("LSTM_BACKEND", "auto").lower()
+
+
+def scaler_drift(scaler, feature_data: np.ndarray, columns: list, tolerance: float = 0.05) -> Dict[str, float]:
+    """
+    Features whose values leave the scaler's fitted range by more than `tolerance` of that range.
+    
+    Returns:
+        {column: overflow as a fraction of the fitted range}, empty when nothing drifted
+    """
+    if len(feature_data) == 0 or not hasattr(scaler, "data_min_"):
+        return {}
+    span = np.where(scaler.data_range_ > 0, scaler.data_range_, 1.0)
+    overflow = np.maximum(scaler.data_min_ - feature_data.min(axis=0),
+                          feature_data.max(axis=0) - scaler.data_max_) / span
+    return {col: round(float(o), 4) for col, o in zip(columns, overflow) if o > tolerance}
+
+
+def save_model_atomic(model, path: str):
+    """Save a Keras model via a temp file so readers never see a half-written .h5."""
+    tmp_path = f"{path[:-3]}.tmp{os.getpid()}.h5"
+    model.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_pickle_atomic(obj, path: str):
+    """Pickle an object (e.g. a scaler) atomically."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def _numpy_export_current(npz_path: str, model_path: str) -> bool:
+    """True when the exported weights exist and are not older than the Keras model."""
+    if not os.path.exists(npz_path):
+        return False
+    return not os.path.exists(model_path) or os.path.getmtime(npz_path) >= os.path.getmtime(model_path)
+
+
+def build_lstm_model(lookback: int, n_features: int, hparams: Dict[str, Any], outputs: int = 1):
+    """Notebook LSTM stack sized by hparams (units_1, units_2, dense_units, dropout, learning_rate)."""
+    from tensorflow.keras.models import Sequential
     from tensorflow.keras.layers import LSTM, Dense, Dropout
-    from tensorflow.keras.callbacks import EarlyStopping
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
-    print("WARNING: TensorFlow not available. LSTM predictions will use fallback.")
+    from tensorflow.keras.optimizers import Adam
+    
+    model = Sequential([
+        LSTM(int(hparams['units_1']), return_sequences=True, input_shape=(lookback, n_features)),
+        Dropout(float(hparams['dropout'])),
+        LSTM(int(hparams['units_2']), return_sequences=False),
+        Dense(int(hparams['dense_units']), activation='relu'),
+        Dense(outputs)  # Fixed typo from Dense(1Let)
+    ])
+    model.compile(optimizer=Adam(learning_rate=float(hparams['learning_rate'])), loss='mse')
+    return model
 
 
 class LSTMForecaster:
     """LSTM Deep Learning Model for Restaurant Sales Forecasting."""
     
-    def __init__(self, lookback: int = 24):
-        """Initialize LSTM forecaster."""
-        self.lookback = lookback
+    FEATURE_COLUMNS = ['sales', 'price', 'weather', 'traffic', 'is_weekend', 
+                       'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
+    WEATHER_CSV = "data/weather_forecast.csv"
+    EVENTS_CSV = "data/events_calendar.csv"
+    
+    # Notebook architecture; models/hparams/lstm.json (written by the search) overrides these
+    DEFAULT_HPARAMS = {'lookback': 24, 'units_1': 64, 'units_2': 32, 'dense_units': 16,
+                       'dropout': 0.3, 'learning_rate': 0.001}
+    
+    # Model files by role; the registry stores a version under the same roles
+    FILE_ROLES = ("model", "scaler", "numpy", "direct_model", "direct_scaler", "direct_numpy")
+    
+    def __init__(self, lookback: int = None, horizon: int = 24, hparams: Dict[str, Any] = None,
+                 paths: Dict[str, str] = None):
+        """
+        Initialize LSTM forecaster.
+        
+        Args:
+            paths: {role: path} to load from instead of models/ (e.g. a registry
+                   version), now and when switching to TensorFlow for training;
+                   saves still go to the models/ working copy
+        """
+        self.hparams = {**self.DEFAULT_HPARAMS, **load_best_config("lstm"), **(hparams or {})}
+        self.lookback = lookback or int(self.hparams['lookback'])
+        self.horizon = horizon
         self.model = None
         self.scaler = MinMaxScaler()
-        self.feature_columns = ['sales', 'price', 'weather', 'traffic', 'is_weekend', 
-                                'hour_sin', 'hour_cos', 'dow_sin', 'dow_cos']
+        self.feature_columns = list(self.FEATURE_COLUMNS)
         self.model_path = "models/lstm_sales_model.h5"
         self.scaler_path = "models/scaler.pkl"
+        self.numpy_path = "models/lstm_sales_model.npz"
+        
+        # Direct multi-horizon variant: one forward pass emits all `horizon` hours
+        self.direct_model = None
+        self.direct_scaler = None
+        self.direct_model_path = "models/lstm_sales_model_direct.h5"
+        self.direct_scaler_path = "models/scaler_direct.pkl"
+        self.direct_numpy_path = "models/lstm_sales_model_direct.npz"
         
         # Create models directory
         os.makedirs("models", exist_ok=True)
+        self.load_paths = dict(paths or {})  # Roles not listed load from their save path
         
         # Load or create model
-        if TENSORFLOW_AVAILABLE:
-            self._load_or_create_model()
+        self.loaded_version = model_version()
+        self._from_load_paths(self._load_initial)
+    
+    def _paths(self) -> Dict[str, str]:
+        """{role: path} of the model files this forecaster saves to."""
+        return {role: getattr(self, f"{role}_path") for role in self.FILE_ROLES}
+    
+    def _from_load_paths(self, load):
+        """Run load() with the *_path attributes pointing at load_paths, then back at the save paths."""
+        save_paths = self._paths()
+        for role, path in self.load_paths.items():
+            setattr(self, f"{role}_path", path)
+        try:
+            load()
+        finally:
+            for role, path in save_paths.items():
+                setattr(self, f"{role}_path", path)
+    
+    def _load_initial(self):
+        self.backend = self._select_backend()
+        if self.backend == "numpy":
+            self._load_numpy_models()
+        elif self.backend == "tensorflow":
+            self._load_keras_models()
+        else:
+            print("WARNING: TensorFlow not available. LSTM predictions will use fallback.")
+    
+    def _load_keras_models(self):
+        self._load_or_create_model()
+        self._load_direct_model()
+    
+    def _select_backend(self):
+        """Pick the inference backend from LSTM_BACKEND and what is on disk."""
+        if LSTM_BACKEND != "tensorflow" and _numpy_export_current(self.numpy_path, self.model_path):
+            return "numpy"
+        if TENSORFLOW_AVAILABLE and LSTM_BACKEND != "numpy":
+            return "tensorflow"
+        if os.path.exists(self.numpy_path):
+            return "numpy"  # Stale export beats no model at all
+        return None
+    
+    def _load_numpy_models(self):
+        """Load exported NumPy weights for TensorFlow-free inference."""
+        self.model, self.scaler = load_numpy_model(self.numpy_path)
+        self.lookback = self.model.input_shape[1] or self.lookback
+        print(f"[LSTM] Loaded NumPy model from {self.numpy_path}")
+        if _numpy_export_current(self.direct_numpy_path, self.direct_model_path) or (
+            os.path.exists(self.direct_numpy_path) and not TENSORFLOW_AVAILABLE
+        ):
+            self.direct_model, self.direct_scaler = load_numpy_model(self.direct_numpy_path)
+            self.horizon = int(self.direct_model.output_shape[-1])
+            print(f"[LSTM] Loaded direct {self.horizon}-hour NumPy model from {self.direct_numpy_path}")
+    
+    def _ensure_tensorflow(self) -> bool:
+        """Switch to the Keras backend (needed for training); False if TensorFlow is missing."""
+        if self.backend == "tensorflow":
+            return True
+        if not TENSORFLOW_AVAILABLE:
+            return False
+        # Same files the NumPy weights came from (the registry version), not models/
+        self.model, self.direct_model, self.direct_scaler = None, None, None
+        self._from_load_paths(self._load_keras_models)
+        self.backend = "tensorflow"
+        return True
+    
+    def _save_model(self, model, path: str):
+        save_model_atomic(model, path)
+    
+    def _save_scaler(self, scaler, path: str):
+        save_pickle_atomic(scaler, path)
+    
+    def _export_numpy(self, model, scaler, npz_path: str):
+        """Refresh the NumPy export after the Keras model changes."""
+        try:
+            export_keras_model(model, scaler, npz_path)
+            print(f"[LSTM] Exported NumPy weights to {npz_path}")
+        except Exception as e:
+            print(f"[LSTM] NumPy export failed: {e}")
     
     def _load_or_create_model(self):
         """Load existing model or create new one."""
         if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
             try:
-                self.model = load_model(self.model_path)
+                from tensorflow.keras.models import load_model
+                self.model = load_model(self.model_path, compile=False)
+                self.model.compile(optimizer='adam', loss='mse')
                 with open(self.scaler_path, 'rb') as f:
                     self.scaler = pickle.load(f)
+                self.lookback = self.model.input_shape[1] or self.lookback  # Trained window wins over config
                 print(f"[LSTM] Loaded existing model from {self.model_path}")
             except Exception as e:
                 print(f"[LSTM] Failed to load model: {e}. Creating new model.")
@@ -56,115 +221,86 @@ class LSTMForecaster:
         else:
             self._create_model()
     
+    def _load_direct_model(self):
+        """Load the direct multi-horizon model if one has been trained."""
+        if not (os.path.exists(self.direct_model_path) and os.path.exists(self.direct_scaler_path)):
+            return
+        try:
+            from tensorflow.keras.models import load_model
+            model = load_model(self.direct_model_path, compile=False)
+            model.compile(optimizer='adam', loss='mse')
+            with open(self.direct_scaler_path, 'rb') as f:
+                scaler = pickle.load(f)
+            self.direct_model, self.direct_scaler = model, scaler
+            self.horizon = int(model.output_shape[-1])
+            print(f"[LSTM] Loaded direct {self.horizon}-hour model from {self.direct_model_path}")
+        except Exception as e:
+            print(f"[LSTM] Failed to load direct model: {e}. Using iterative forecasts.")
+    
+    def _build_model(self, outputs: int = 1):
+        """Build the notebook LSTM architecture with `outputs` forecast steps."""
+        return build_lstm_model(self.lookback, len(self.feature_columns), self.hparams, outputs)
+    
+    def _matches_hparams(self, model, lookback: int) -> bool:
+        """True when a (possibly loaded) model has this lookback and the configured layer sizes."""
+        if model is None:
+            return True
+        units = [layer.units for layer in model.layers if type(layer).__name__ == "LSTM"]
+        return model.input_shape[1] == lookback and units == [int(self.hparams['units_1']), int(self.hparams['units_2'])]
+    
+    def _apply_hparams(self):
+        """
+        Start from fresh models sized by self.hparams (e.g. after a hyperparameter search).
+        
+        The direct model shares the lookback, so it is dropped too and retrained on demand.
+        """
+        print(f"[LSTM] Rebuilding models for hyperparameters {self.hparams}")
+        self.lookback = int(self.hparams['lookback'])
+        self.model = self._build_model()
+        self.scaler = MinMaxScaler()
+        self.direct_model, self.direct_scaler = None, None
+    
     def _create_model(self):
         """Create new LSTM model architecture."""
         if not TENSORFLOW_AVAILABLE:
             return
         
         # Model architecture from LSTM Model.ipynb
-        self.model = Sequential([
-            LSTM(64, return_sequences=True, input_shape=(self.lookback, len(self.feature_columns))),
-            Dropout(0.3),
-            LSTM(32, return_sequences=False),
-            Dense(16, activation='relu'),
-            Dense(1)  # Fixed typo from Dense(1Let)
-        ])
-        self.model.compile(optimizer='adam', loss='mse')
+        self.model = self._build_model()
         print("[LSTM] Created new model with architecture from LSTM Model.ipynb")
     
-    def prepare_data_from_csv(self, orders_csv: str = "data/orders_realtime.csv") -> pd.DataFrame:
+    @classmethod
+    def prepare_data_from_csv(cls, orders_csv: str = "data/orders_realtime.csv") -> pd.DataFrame:
         """
         Load and prepare data from CSV for LSTM processing.
         
+        Hourly aggregation (from LSTM Model.ipynb) is served by the hourly cache:
+        only rows appended since the last call are parsed, and an unchanged log
+        costs a few stat calls.
+        
         Args:
             orders_csv: Path to orders CSV file
             
         Returns:
             Prepared dataframe with features
         """
-        # Load orders data
-        data = pd.read_csv(orders_csv)
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
-        
-        # Feature engineering (from LSTM Model.ipynb)
-        data['day_of_week'] = data['timestamp'].dt.dayofweek
-        data['hour'] = data['timestamp'].dt.hour
-        data['is_weekend'] = data['day_of_week'].isin([5, 6]).astype(int)
-        
-        # Cyclical encoding
-        data['hour_sin'] = np.sin(2 * np.pi * data['hour'] / 24)
-        data['hour_cos'] = np.cos(2 * np.pi * data['hour'] / 24)
-        data['dow_sin'] = np.sin(2 * np.pi * data['day_of_week'] / 7)
-        data['dow_cos'] = np.cos(2 * np.pi * data['day_of_week'] / 7)
-        
-        # Add weather and traffic (from weather CSV or defaults)
-        weather_file = "data/weather_forecast.csv"
-        if os.path.exists(weather_file):
-            weather_df = pd.read_csv(weather_file)
-            weather_df['date'] = pd.to_datetime(weather_df['date']).dt.date
-            data['date_only'] = data['timestamp'].dt.date
-            data = data.merge(
-                weather_df[['date', 'weather_factor']], 
-                left_on='date_only', 
-                right_on='date', 
-                how='left'
-            )
-            data['weather'] = data['weather_factor'].fillna(1.0)
-            data = data.drop(columns=['date', 'date_only', 'weather_factor'], errors='ignore')
-        else:
-            data['weather'] = 1.0
-        
-        # Traffic from events or defaults
-        events_file = "data/events_calendar.csv"
-        if os.path.exists(events_file):
-            events_df = pd.read_csv(events_file)
-            events_df['date'] = pd.to_datetime(events_df['date']).dt.date
-            data['date_only'] = data['timestamp'].dt.date
-            data = data.merge(
-                events_df[['date', 'traffic_factor']], 
-                left_on='date_only', 
-                right_on='date', 
-                how='left'
-            )
-            data['traffic'] = data['traffic_factor'].fillna(1.0)
-            data = data.drop(columns=['date', 'date_only', 'traffic_factor'], errors='ignore')
-        else:
-            data['traffic'] = 1.0
-        
-        # Aggregate to hourly (from LSTM Model.ipynb)
-        agg = data.groupby(pd.Grouper(key='timestamp', freq='1H')).agg({
-            'price': 'mean',
-            'quantity': 'sum',  # This is our 'sales'
-            'weather': 'mean',
-            'traffic': 'mean',
-            'is_weekend': 'max',
-            'hour_sin': 'mean',
-            'hour_cos': 'mean',
-            'dow_sin': 'mean',
-            'dow_cos': 'mean'
-        }).rename(columns={'quantity': 'sales'})
-        
-        agg = agg.fillna(method='ffill').fillna(0)
-        
-        return agg
+        return get_hourly_cache().prepare(orders_csv, cls.WEATHER_CSV, cls.EVENTS_CSV)
     
-    def create_sequences(self, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    def create_sequences(self, data: np.ndarray, horizon: int = 1) -> Tuple[np.ndarray, np.ndarray]:
         """
         Create sequences for LSTM training (from LSTM Model.ipynb).
         
         Args:
             data: Scaled feature array
+            horizon: Future sales steps per target (1 for the iterative model)
             
         Returns:
-            Tuple of (X, y) sequences
+            Tuple of (X, y) sequences as zero-copy views over data
         """
-        X, y = [], []
-        for i in range(self.lookback, len(data)):
-            X.append(data[i - self.lookback:i, :])
-            y.append(data[i, 0])  # Target: sales (first column)
-        return np.array(X), np.array(y)
+        return sliding_windows(data, self.lookback, horizon=horizon)  # Target: sales (first column)
     
-    def train(self, data: pd.DataFrame, epochs: int = 40, batch_size: int = 32) -> Dict[str, Any]:
+    def train(self, data: pd.DataFrame, epochs: int = 40, batch_size: int = 32,
+              mode: str = "iterative", callbacks: list = None) -> Dict[str, Any]:
         """
         Train LSTM model with data.
         
@@ -172,14 +308,27 @@ class LSTMForecaster:
             data: Prepared dataframe with features
             epochs: Number of training epochs
             batch_size: Batch size for training
+            mode: "iterative" (one-step model) or "direct" (all `horizon` hours at once)
+            callbacks: Extra Keras callbacks (e.g. progress reporting from services.training_jobs)
             
         Returns:
             Training results dictionary
         """
-        if not TENSORFLOW_AVAILABLE:
+        if not self._ensure_tensorflow():
             return {'success': False, 'error': 'TensorFlow not available'}
+        if mode not in ("iterative", "direct"):
+            return {'success': False, 'error': f'Unknown mode: {mode}'}
         
         try:
+            direct = mode == "direct"
+            horizon = self.horizon if direct else 1
+            if direct and not self._matches_hparams(self.direct_model, self.lookback):
+                self.direct_model, self.direct_scaler = None, None
+            elif not direct and not self._matches_hparams(self.model, int(self.hparams['lookback'])):
+                self._apply_hparams()
+            scaler = (self.direct_scaler or MinMaxScaler()) if direct else self.scaler
+            model = (self.direct_model or self._build_model(self.horizon)) if direct else self.model
+            
             # Ensure all required columns exist
             for col in self.feature_columns:
                 if col not in data.columns:
@@ -188,173 +337,311 @@ class LSTMForecaster:
             # Select and order features
             feature_data = data[self.feature_columns].values
             
-            # Normalize (from LSTM Model.ipynb)
-            scaled = self.scaler.fit_transform(feature_data)
+            # Normalize (from LSTM Model.ipynb) into a memmap the input pipeline streams from
+            scaled = scale_to_memmap(scaler, feature_data, f"train_{mode}")
             
             # Create sequences
-            X, y = self.create_sequences(scaled)
+            X, y = self.create_sequences(scaled, horizon)
             
             if len(X) < 10:
                 return {'success': False, 'error': 'Not enough data for training'}
             
-            # Train/test split (80/20)
-            split = int(0.8 * len(X))
-            X_train, X_test = X[:split], X[split:]
-            y_train, y_test = y[:split], y[split:]
+            # Train/test split (80/20), last 10% of train held out for validation
+            train_idx, val_idx, test_idx = split_indices(len(X))
+            y_test = np.asarray(y[test_idx])
             
             # Train model with early stopping
+            from tensorflow.keras.callbacks import EarlyStopping
             early_stop = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
-            history = self.model.fit(
-                X_train, y_train,
-                validation_split=0.1,
+            history = model.fit(
+                window_dataset(scaled, train_idx, self.lookback, batch_size, horizon=horizon),
+                validation_data=window_dataset(scaled, val_idx, self.lookback, batch_size,
+                                               shuffle=False, horizon=horizon),
                 epochs=epochs,
-                batch_size=batch_size,
-                callbacks=[early_stop],
+                callbacks=[early_stop] + list(callbacks or []),
                 verbose=0
             )
             
             # Evaluate
-            predictions = self.model.predict(X_test, verbose=0).flatten()
+            predictions = model.predict(
+                window_dataset(scaled, test_idx, self.lookback, batch_size, shuffle=False, horizon=horizon),
+                verbose=0
+            ).reshape(y_test.shape)
             mae = np.mean(np.abs(y_test - predictions))
             rmse = np.sqrt(np.mean((y_test - predictions) ** 2))
             
             # Save model and scaler
-            self.model.save(self.model_path)
-            with open(self.scaler_path, 'wb') as f:
-                pickle.dump(self.scaler, f)
+            model_path = self.direct_model_path if direct else self.model_path
+            scaler_path = self.direct_scaler_path if direct else self.scaler_path
+            self._save_model(model, model_path)
+            self._save_scaler(scaler, scaler_path)
+            if direct:
+                self.direct_model, self.direct_scaler = model, scaler
+            self._export_numpy(model, scaler, self.direct_numpy_path if direct else self.numpy_path)
             
-            print(f"[LSTM] Training complete. MAE: {mae:.3f}, RMSE: {rmse:.3f}")
-            print(f"[LSTM] Model saved to {self.model_path}")
+            print(f"[LSTM] Training complete ({mode}). MAE: {mae:.3f}, RMSE: {rmse:.3f}")
+            print(f"[LSTM] Model saved to {model_path}")
             
             return {
                 'success': True,
+                'mode': mode,
                 'mae': float(mae),
                 'rmse': float(rmse),
                 'epochs_run': len(history.history['loss']),
-                'samples_trained': len(X_train)
+                'samples_trained': len(train_idx)
             }
             
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def predict(self, data: pd.DataFrame, hours_ahead: int = 24) -> Dict[str, Any]:
+    def predict(self, data: pd.DataFrame, hours_ahead: int = 24, mode: str = None) -> Dict[str, Any]:
         """
         Make predictions using LSTM model.
         
         Args:
             data: Prepared dataframe with features
             hours_ahead: Number of hours to forecast
+            mode: "iterative" or "direct"; by default the direct model is used
+                  whenever it is trained and covers hours_ahead
             
         Returns:
             Prediction results with confidence intervals
         """
-        if not TENSORFLOW_AVAILABLE or self.model is None:
-            return self._fallback_prediction(data, hours_ahead)
+        return self.predict_many([(data, hours_ahead)], mode)[0]
+    
+    def predict_many(self, requests: List[Tuple[pd.DataFrame, int]], mode: str = None) -> List[Dict[str, Any]]:
+        """
+        Forecast several (data, hours_ahead) requests together.
         
-        try:
-            # Prepare data
-            feature_data = data[self.feature_columns].values
-            scaled = self.scaler.transform(feature_data)
-            
-            # Create sequences
-            X, y = self.create_sequences(scaled)
-            
-            if len(X) == 0:
-                return self._fallback_prediction(data, hours_ahead)
-            
-            # Predict
-            predictions = self.model.predict(X, verbose=0).flatten()
-            
-            # Calculate confidence intervals (from LSTM Model.ipynb)
-            residuals = y - predictions
-            mean_resid = np.mean(residuals)
-            se_resid = stats.sem(residuals)
-            n = len(residuals)
-            t_crit = stats.t.ppf(0.95, df=n - 1)  # 90% confidence
-            margin = t_crit * se_resid
-            
-            lower_bound = predictions - margin
-            upper_bound = predictions + margin
-            
-            # Forecast future hours
-            last_sequence = X[-1]
-            future_predictions = []
-            
-            for _ in range(hours_ahead):
-                next_pred = self.model.predict(last_sequence.reshape(1, self.lookback, -1), verbose=0)[0, 0]
-                future_predictions.append(next_pred)
-                
-                # Update sequence (rolling window)
-                new_row = last_sequence[-1].copy()
-                new_row[0] = next_pred  # Update sales prediction
-                last_sequence = np.vstack([last_sequence[1:], new_row])
-            
-            future_predictions = np.array(future_predictions)
-            future_lower = future_predictions - margin
-            future_upper = future_predictions + margin
+        Requests passing the same frame share its in-sample pass, and the
+        future hours of all requests are predicted as one batch: one model
+        call per step for the iterative model, one call in total for the
+        direct model. Results match predict() request by request.
+        """
+        results: List[Dict[str, Any]] = [None] * len(requests)
+        contexts = {}  # (id(data), mode) -> in-sample context, None when it failed
+        groups: Dict[str, list] = {}  # mode -> [(request index, context, hours_ahead)]
+        
+        for i, (data, hours_ahead) in enumerate(requests):
+            request_mode = mode
+            if request_mode is None:
+                use_direct = self.direct_model is not None and hours_ahead <= self.horizon
+                request_mode = "direct" if use_direct else "iterative"
+            model = self.direct_model if request_mode == "direct" else self.model
+            if model is None:
+                results[i] = self._fallback_prediction(data, hours_ahead)
+                continue
             
-            return {
-                'success': True,
-                'predictions': predictions.tolist(),
-                'lower_bound': lower_bound.tolist(),
-                'upper_bound': upper_bound.tolist(),
-                'future_predictions': future_predictions.tolist(),
-                'future_lower': future_lower.tolist(),
-                'future_upper': future_upper.tolist(),
-                'confidence_level': 0.90,
-                'hours_ahead': hours_ahead
-            }
+            key = (id(data), request_mode)
+            if key not in contexts:
+                try:
+                    contexts[key] = self._in_sample(data, request_mode)
+                except Exception as e:
+                    print(f"[LSTM] Prediction error: {e}")
+                    contexts[key] = None
+            if contexts[key] is None:
+                results[i] = self._fallback_prediction(data, hours_ahead)
+            else:
+                groups.setdefault(request_mode, []).append((i, contexts[key], hours_ahead))
+        
+        for request_mode, members in groups.items():
+            try:
+                windows = np.stack([context['last_window'] for _, context, _ in members])
+                if request_mode == "direct":
+                    future = self.direct_model.predict(windows.astype(np.float32), verbose=0)
+                else:
+                    future = self._rollout(windows, max(hours for *_, hours in members))
+                for row, (i, context, hours_ahead) in zip(future, members):
+                    results[i] = self._forecast_result(context, np.asarray(row)[:hours_ahead], hours_ahead)
+            except Exception as e:
+                print(f"[LSTM] Prediction error: {e}")
+                for i, _, hours_ahead in members:
+                    results[i] = self._fallback_prediction(requests[i][0], hours_ahead)
+        
+        return results
+    
+    def _in_sample(self, data: pd.DataFrame, mode: str) -> Optional[Dict[str, Any]]:
+        """In-sample predictions, confidence margins and the window the forecast starts from."""
+        direct = mode == "direct"
+        scaler = self.direct_scaler if direct else self.scaler
+        horizon = self.horizon if direct else 1
+        
+        # Prepare data
+        feature_data = data[self.feature_columns].values
+        scaled = scaler.transform(feature_data)
+        
+        # Create sequences
+        X, y = self.create_sequences(scaled, horizon)
+        
+        if len(X) == 0:
+            return None
+        
+        # In-sample predictions; the direct model gets an interval per horizon step
+        predictions = self._predict_windows(self.direct_model if direct else self.model,
+                                            scaled, X, horizon).reshape(np.shape(y))
+        
+        # Calculate confidence intervals (from LSTM Model.ipynb)
+        residuals = y - predictions
+        n = len(residuals)
+        t_crit = stats.t.ppf(0.95, df=n - 1)  # 90% confidence
+        margin = t_crit * stats.sem(residuals, axis=0)
+        
+        if direct:
+            # The latest lookback hours feed the forecast
+            return {'mode': mode, 'scaler': scaler, 'predictions': predictions[:, 0], 'margin': margin,
+                    'one_step_margin': margin[0], 'last_window': scaled[-self.lookback:]}
+        return {'mode': mode, 'scaler': scaler, 'predictions': predictions, 'margin': margin,
+                'one_step_margin': margin, 'last_window': np.array(X[-1])}
+    
+    def _rollout(self, windows: np.ndarray, steps: int) -> np.ndarray:
+        """Iterative forecast of `steps` hours for a batch of (lookback, features) windows."""
+        sequences = windows
+        future = []
+        
+        for _ in range(steps):
+            next_pred = np.asarray(self.model.predict(sequences, verbose=0))[:, 0]
+            future.append(next_pred)
             
-        except Exception as e:
-            print(f"[LSTM] Prediction error: {e}")
-            return self._fallback_prediction(data, hours_ahead)
+            # Update sequences (rolling window)
+            new_rows = sequences[:, -1].copy()
+            new_rows[:, 0] = next_pred  # Update sales prediction
+            sequences = np.concatenate([sequences[:, 1:], new_rows[:, np.newaxis]], axis=1)
+        
+        return np.stack(future, axis=1)
+    
+    def _forecast_result(self, context: Dict[str, Any], future_predictions: np.ndarray,
+                         hours_ahead: int) -> Dict[str, Any]:
+        """predict() result for one request from its in-sample context and future predictions."""
+        predictions = context['predictions']
+        margin = context['one_step_margin']
+        future_margin = context['margin'][:hours_ahead] if context['mode'] == "direct" else context['margin']
+        
+        return {
+            'success': True,
+            'mode': context['mode'],
+            'predictions': predictions.tolist(),
+            'lower_bound': (predictions - margin).tolist(),
+            'upper_bound': (predictions + margin).tolist(),
+            'future_predictions': future_predictions.tolist(),
+            'future_lower': (future_predictions - future_margin).tolist(),
+            'future_upper': (future_predictions + future_margin).tolist(),
+            'future_sales': self._unscale_sales(context['scaler'], future_predictions).tolist(),
+            'confidence_level': 0.90,
+            'hours_ahead': hours_ahead
+        }
+    
+    def _predict_windows(self, model, scaled: np.ndarray, X: np.ndarray, horizon: int = 1) -> np.ndarray:
+        """In-sample predictions for every window, streamed in batches on either backend."""
+        if isinstance(model, NumpyLSTMModel):
+            return model.predict(X)
+        return model.predict(
+            window_dataset(scaled, np.arange(len(X)), self.lookback, 256, shuffle=False, horizon=horizon),
+            verbose=0
+        )
+    
+    def _unscale_sales(self, scaler, values: np.ndarray) -> np.ndarray:
+        """Scaled sales predictions back to orders per hour (never negative)."""
+        return np.maximum(0, (np.asarray(values) - scaler.min_[0]) / scaler.scale_[0])
     
     def _fallback_prediction(self, data: pd.DataFrame, hours_ahead: int) -> Dict[str, Any]:
-        """Fallback prediction when LSTM is not available."""
-        # Simple moving average as fallback
-        if 'sales' in data.columns:
-            recent_sales = data['sales'].tail(24).mean()
+        """Holt-Winters forecast (daily + weekly seasonality) when no trained LSTM is available."""
+        if 'sales' in data.columns and len(data) > 0:
+            baseline = forecast_series(data['sales'], hours_ahead)
+            predictions = baseline['forecast'].tolist()
+            lower = baseline['lower'].tolist()
+            upper = baseline['upper'].tolist()
         else:
-            recent_sales = 15.0
-        
-        predictions = [recent_sales] * hours_ahead
-        lower = [p * 0.85 for p in predictions]
-        upper = [p * 1.15 for p in predictions]
+            predictions = [15.0] * hours_ahead
+            lower = [p * 0.85 for p in predictions]
+            upper = [p * 1.15 for p in predictions]
         
         return {
             'success': True,
+            'mode': 'holt_winters',
             'predictions': predictions,
             'lower_bound': lower,
             'upper_bound': upper,
             'future_predictions': predictions,
             'future_lower': lower,
             'future_upper': upper,
+            'future_sales': predictions,
             'confidence_level': 0.90,
             'hours_ahead': hours_ahead,
-            'note': 'Using fallback prediction (TensorFlow not available)'
+            'note': 'Using Holt-Winters baseline (no trained LSTM model)'
         }
     
     def update_model(self, new_data: pd.DataFrame):
         """
         Continuous retraining with new data (from LSTM Model.ipynb Cell 9).
         
+        For scheduled retraining use services.lstm_retrainer, which tracks trained
+        rows, replays older windows and refits the scaler on drift.
+        
         Args:
             new_data: New prepared dataframe
         """
-        if not TENSORFLOW_AVAILABLE or self.model is None:
+        if not self._ensure_tensorflow() or self.model is None:
             return
         
-        try:
-            feature_data = new_data[self.feature_columns].values
-            new_scaled = self.scaler.transform(feature_data)
-            X_new, y_new = self.create_sequences(new_scaled)
-            
-            if len(X_new) > 0:
-                self.model.fit(X_new, y_new, epochs=3, batch_size=32, verbose=0)
-                self.model.save(self.model_path)
-                print(f"[LSTM] Model updated with {len(X_new)} new samples")
-        except Exception as e:
-            print(f"[LSTM] Update error: {e}")
+        variants = [(self.model, self.scaler, self.model_path, self.numpy_path, 1, "update")]
+        if self.direct_model is not None:
+            # Keep the direct model on the same data so auto-selection never serves a stale one
+            variants.append((self.direct_model, self.direct_scaler, self.direct_model_path,
+                             self.direct_numpy_path, self.horizon, "update_direct"))
+        
+        for model, scaler, path, npz_path, horizon, name in variants:
+            try:
+                feature_data = new_data[self.feature_columns].values
+                drift = scaler_drift(scaler, feature_data, self.feature_columns)
+                if drift:
+                    print(f"[LSTM] WARNING: features outside the fitted scaler range, values will clip: {drift}")
+                new_scaled = scale_to_memmap(scaler, feature_data, name, fit=False)
+                X_new, y_new = self.create_sequences(new_scaled, horizon)
+                
+                if len(X_new) > 0:
+                    model.fit(
+                        window_dataset(new_scaled, np.arange(len(X_new)), self.lookback, 32, horizon=horizon),
+                        epochs=3, verbose=0
+                    )
+                    self._save_model(model, path)
+                    print(f"[LSTM] Model updated with {len(X_new)} new samples ({path})")
+                    self._export_numpy(model, scaler, npz_path)
+            except Exception as e:
+                print(f"[LSTM] Update error: {e}")
+
+
+def _load_registered_lstm(files: Dict[str, str], meta: Dict[str, Any]) -> LSTMForecaster:
+    """Model registry loader: an LSTMForecaster built from a registered version's files."""
+    # Roles the version lacks (e.g. no direct model) point inside it too, so they are
+    # absent rather than picked up from the models/ working copy
+    version_dir = os.path.dirname(next(iter(files.values())))
+    paths = {role: files.get(role, os.path.join(version_dir, f"missing_{role}"))
+             for role in LSTMForecaster.FILE_ROLES}
+    return LSTMForecaster(lookback=meta["params"].get("lookback"), hparams=meta["params"], paths=paths)
+
+
+get_model_registry().register_loader("lstm", _load_registered_lstm)
+
+
+def register_lstm_version(forecaster: LSTMForecaster, metrics: Dict[str, Any],
+                          data: pd.DataFrame = None, promote: bool = True) -> int:
+    """
+    Register the forecaster's current model files as a new "lstm" version.
+    
+    Args:
+        metrics: Training results (MAE, RMSE, ...) stored with the version
+        data: The prepared training frame, fingerprinted so the version records what it saw
+        promote: Serve the new version from get_lstm_forecaster() right away
+    
+    Returns:
+        The registry version number
+    """
+    fingerprint = data_fingerprint(data[forecaster.feature_columns]) if data is not None else None
+    return get_model_registry().register(
+        "lstm", forecaster._paths(), metrics=metrics, data_fingerprint=fingerprint,
+        params={**forecaster.hparams, 'lookback': forecaster.lookback},
+        promote=promote, instance=forecaster
+    )
 
 
 # Singleton instance
@@ -362,9 +649,50 @@ _lstm_forecaster = None
 
 
 def get_lstm_forecaster() -> LSTMForecaster:
-    """Get or create LSTM forecaster singleton."""
+    """
+    The promoted "lstm" registry version, loaded on first use.
+    
+    Before any version is registered, a singleton over the models/ files
+    (reloaded when they change).
+    """
     global _lstm_forecaster
-    if _lstm_forecaster is None:
+    registry = get_model_registry()
+    if registry.current_version("lstm") is not None:
+        try:
+            return registry.get("lstm")
+        except (KeyError, ValueError, OSError) as e:
+            print(f"[LSTM] Registry model unavailable, using models/ files: {e}")
+    if _lstm_forecaster is None or _lstm_forecaster.loaded_version != model_version():
         _lstm_forecaster = LSTMForecaster()
     return _lstm_forecaster
 
+
+def serves_without_tensorflow() -> bool:
+    """True when get_lstm_forecaster() would serve NumPy weights, so TensorFlow is never imported."""
+    if not TENSORFLOW_AVAILABLE:
+        return True
+    if LSTM_BACKEND == "tensorflow":
+        return False
+    registry = get_model_registry()
+    try:
+        meta = registry.current("lstm")
+    except (OSError, ValueError):
+        meta = None
+    if meta:
+        version_dir = registry._version_dir("lstm", meta["version"])
+        files = {role: os.path.join(version_dir, e["file"]) for role, e in meta["files"].items()}
+        numpy_path, model_path = files.get("numpy"), files.get("model", "")
+    else:
+        numpy_path, model_path = "models/lstm_sales_model.npz", "models/lstm_sales_model.h5"
+    if not numpy_path:
+        return False
+    if LSTM_BACKEND == "numpy":
+        return os.path.exists(numpy_path)
+    return _numpy_export_current(numpy_path, model_path)
+
+
+def run_lstm_forecast(orders_csv: str = "data/orders_realtime.csv", hours_ahead: int = 24) -> Dict[str, Any]:
+    """Forecast the next hours, served from the forecast store when inputs and model are unchanged."""
+    from services.forecast_store import get_forecast_store
+    return get_forecast_store().get(orders_csv, hours_ahead)
+
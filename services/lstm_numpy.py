@@ -0,0 +1,180 @@
+"""
+NumPy LSTM Inference Engine
+Runs the trained Keras LSTM forward pass without TensorFlow
+"""
+import numpy as np
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PREDICT_BATCH_SIZE = 1024
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+    "hard_sigmoid": lambda x: np.clip(x / 6.0 + 0.5, 0.0, 1.0),  # Keras 3 definition
+}
+
+
+def _activation_name(activation) -> str:
+    name = activation if isinstance(activation, str) else getattr(activation, "__name__", str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation for NumPy engine: {name}")
+    return name
+
+
+class NumpyScaler:
+    """MinMaxScaler transform/inverse_transform from exported min_ and scale_."""
+
+    def __init__(self, min_: np.ndarray, scale_: np.ndarray):
+        self.min_ = min_
+        self.scale_ = scale_
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) * self.scale_ + self.min_
+
+    def inverse_transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.min_) / self.scale_
+
+
+class NumpyLSTMModel:
+    """
+    Forward pass of a Sequential LSTM/Dense stack in NumPy.
+
+    Exposes predict(X, verbose=0) like a Keras model, so LSTMForecaster can use
+    either one. Dropout is identity at inference time and is not exported.
+    """
+
+    def __init__(self, layers: List[Dict[str, Any]], lookback: Optional[int] = None):
+        self.layers = layers
+        self.input_shape = (None, lookback, layers[0]["kernel"].shape[0])
+        self.output_shape = (None, layers[-1]["kernel"].shape[1])
+
+    def _lstm(self, layer: Dict[str, Any], x: np.ndarray) -> np.ndarray:
+        kernel, recurrent, bias = layer["kernel"], layer["recurrent_kernel"], layer["bias"]
+        act = ACTIVATIONS[layer["activation"]]
+        gate = ACTIVATIONS[layer["recurrent_activation"]]
+        units = recurrent.shape[0]
+        batch, steps, _ = x.shape
+
+        # Input projections for every timestep in one matmul
+        x_proj = x @ kernel + bias
+        h = np.zeros((batch, units), dtype=x.dtype)
+        c = np.zeros((batch, units), dtype=x.dtype)
+        outputs = np.empty((batch, steps, units), dtype=x.dtype) if layer["return_sequences"] else None
+
+        for t in range(steps):
+            z = x_proj[:, t] + h @ recurrent
+            # Keras gate order: input, forget, cell, output
+            i = gate(z[:, :units])
+            f = gate(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = gate(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            if outputs is not None:
+                outputs[:, t] = h
+
+        return outputs if outputs is not None else h
+
+    def _forward(self, x: np.ndarray) -> np.ndarray:
+        for layer in self.layers:
+            if layer["type"] == "lstm":
+                x = self._lstm(layer, x)
+            else:
+                x = ACTIVATIONS[layer["activation"]](x @ layer["kernel"] + layer["bias"])
+        return x
+
+    def predict(self, X: np.ndarray, verbose: int = 0, batch_size: int = PREDICT_BATCH_SIZE) -> np.ndarray:
+        """Predict in batches so strided window views are only materialized a batch at a time."""
+        outputs = [
+            self._forward(np.asarray(X[start:start + batch_size], dtype=np.float32))
+            for start in range(0, len(X), batch_size)
+        ]
+        if not outputs:
+            return np.empty((0, self.output_shape[1]), dtype=np.float32)
+        return np.concatenate(outputs)
+
+
+def export_keras_model(model, scaler, out_path: str) -> str:
+    """
+    Write a trained Keras LSTM model and its MinMaxScaler to a compact .npz file.
+
+    Args:
+        model: Keras Sequential model of LSTM, Dropout and Dense layers
+        scaler: Fitted MinMaxScaler
+        out_path: Destination .npz path
+
+    Returns:
+        Path written
+    """
+    arrays = {
+        "scaler_min": np.asarray(scaler.min_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+    }
+    layer_types = []
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "Dropout":
+            continue
+        prefix = f"layer{len(layer_types)}_"
+        weights = layer.get_weights()
+
+        if kind == "LSTM":
+            config = layer.get_config()
+            arrays[prefix + "kernel"], arrays[prefix + "recurrent_kernel"], arrays[prefix + "bias"] = weights
+            arrays[prefix + "activation"] = np.array(_activation_name(config["activation"]))
+            arrays[prefix + "recurrent_activation"] = np.array(_activation_name(config["recurrent_activation"]))
+            arrays[prefix + "return_sequences"] = np.array(bool(config["return_sequences"]))
+            layer_types.append("lstm")
+        elif kind == "Dense":
+            arrays[prefix + "kernel"], arrays[prefix + "bias"] = weights
+            arrays[prefix + "activation"] = np.array(_activation_name(layer.get_config()["activation"]))
+            layer_types.append("dense")
+        else:
+            raise ValueError(f"Unsupported layer for NumPy engine: {kind}")
+
+    arrays["layer_types"] = np.array(layer_types)
+    if model.input_shape[1] is not None:
+        arrays["lookback"] = np.array(int(model.input_shape[1]))
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp_path = out_path + ".tmp.npz"
+    np.savez_compressed(tmp_path, **arrays)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def export_lstm_model(model_path: str, scaler_path: str, out_path: str) -> str:
+    """Export a saved .h5 model and scaler.pkl (needs TensorFlow)."""
+    import pickle
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path, compile=False)
+    with open(scaler_path, 'rb') as f:
+        scaler = pickle.load(f)
+    return export_keras_model(model, scaler, out_path)
+
+
+def load_numpy_model(path: str) -> Tuple[NumpyLSTMModel, NumpyScaler]:
+    """Load an exported .npz into a NumPy model and scaler."""
+    with np.load(path) as npz:
+        layers = []
+        for index, kind in enumerate(npz["layer_types"]):
+            prefix = f"layer{index}_"
+            layer = {"type": str(kind), "activation": str(npz[prefix + "activation"])}
+            layer["kernel"] = npz[prefix + "kernel"].astype(np.float32)
+            layer["bias"] = npz[prefix + "bias"].astype(np.float32)
+            if kind == "lstm":
+                layer["recurrent_kernel"] = npz[prefix + "recurrent_kernel"].astype(np.float32)
+                layer["recurrent_activation"] = str(npz[prefix + "recurrent_activation"])
+                layer["return_sequences"] = bool(npz[prefix + "return_sequences"])
+            layers.append(layer)
+
+        scaler = NumpyScaler(npz["scaler_min"], npz["scaler_scale"])
+        lookback = int(npz["lookback"]) if "lookback" in npz.files else None
+
+    return NumpyLSTMModel(layers, lookback), scaler
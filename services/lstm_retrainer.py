@@ -0,0 +1,186 @@
+"""
+Incremental LSTM Retrainer
+Warm-start fine-tuning on new hourly rows with a replay buffer of older windows
+"""
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.lstm_forecaster import LSTMForecaster, get_lstm_forecaster, register_lstm_version, scaler_drift
+from services.sequence_pipeline import scale_to_memmap, window_dataset
+
+
+RETRAIN_STATE_PATH = "models/retrain_state.json"
+FINE_TUNE_EPOCHS = 3
+FULL_REFIT_EPOCHS = 40
+DRIFT_TOLERANCE = 0.05  # Fraction of the fitted range a feature may overshoot before a refit
+REPLAY_RATIO = 1.0  # Old windows replayed per new window
+MIN_REPLAY_SAMPLES = 256
+MAX_REPLAY_SAMPLES = 4096
+
+
+class IncrementalRetrainer:
+    """
+    Keeps the LSTM models current without full retrains.
+
+    Each run fine-tunes only on windows whose targets are hours not yet trained
+    on, mixed with a random replay sample of older windows so the model does not
+    forget earlier patterns. A full refit (including the scaler) happens only on
+    the first run or when new data leaves the scaler's range. Every successful
+    run is registered and promoted as a new "lstm" version in the model registry.
+    """
+
+    def __init__(self, forecaster: Optional[LSTMForecaster] = None, state_path: str = RETRAIN_STATE_PATH,
+                 seed: Optional[int] = None):
+        self.forecaster = forecaster or get_lstm_forecaster()
+        self.state_path = state_path
+        self.rng = np.random.default_rng(seed)
+
+    def load_state(self) -> Dict[str, Any]:
+        if not os.path.exists(self.state_path):
+            return {"version": 0, "last_trained_hour": None, "history": []}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Any]):
+        tmp_path = f"{self.state_path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _variants(self):
+        """(name, model, scaler, model_path, npz_path, horizon) for every loaded model."""
+        f = self.forecaster
+        variants = [("iterative", f.model, f.scaler, f.model_path, f.numpy_path, 1)]
+        if f.direct_model is not None:
+            variants.append(("direct", f.direct_model, f.direct_scaler, f.direct_model_path,
+                             f.direct_numpy_path, f.horizon))
+        return variants
+
+    def run(self, orders_csv: str = "data/orders_realtime.csv", epochs: int = FINE_TUNE_EPOCHS,
+            full_epochs: int = FULL_REFIT_EPOCHS, force_full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the models up to date with orders_csv.
+
+        Returns:
+            Result dictionary with the action taken (skipped, fine_tune or full_refit)
+        """
+        f = self.forecaster
+        if not f._ensure_tensorflow():
+            return {'success': False, 'error': 'TensorFlow not available'}
+
+        start = time.perf_counter()
+        data = f.prepare_data_from_csv(orders_csv)
+        for col in f.feature_columns:
+            if col not in data.columns:
+                data[col] = 0
+
+        state = self.load_state()
+        last_hour = state.get("last_trained_hour")
+        if last_hour is not None:
+            new_mask = np.asarray(data.index > pd.Timestamp(last_hour))
+        else:
+            new_mask = np.ones(len(data), dtype=bool)
+
+        if not new_mask.any() and not force_full:
+            print(f"[RETRAIN] No new hours since {last_hour}, nothing to do")
+            return {'success': True, 'action': 'skipped', 'version': state["version"]}
+
+        first_new = int(np.argmax(new_mask)) if new_mask.any() else len(data)
+        drift = scaler_drift(f.scaler, data[f.feature_columns].values[first_new:],
+                             f.feature_columns, DRIFT_TOLERANCE)
+
+        if force_full or last_hour is None or drift:
+            reason = "forced" if force_full else ("first run" if last_hour is None else f"scaler drift {drift}")
+            print(f"[RETRAIN] Full refit ({reason})")
+            action, results = "full_refit", self._full_refit(data, full_epochs)
+        else:
+            print(f"[RETRAIN] Fine-tuning on {int(new_mask.sum())} new hours")
+            action, results = "fine_tune", self._fine_tune(data, first_new, epochs)
+
+        failed = [r for r in results.values() if not r.get('success')]
+        if failed:
+            return {'success': False, 'action': action, 'error': failed[0].get('error'), 'results': results}
+
+        version = register_lstm_version(f, {'action': action, **results}, data)
+
+        entry = {
+            "version": version,
+            "action": action,
+            "trained_at": datetime.now().isoformat(),
+            "new_hours": int(new_mask.sum()),
+            "drift": drift,
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+        state.update({
+            "version": version,
+            "last_trained_hour": data.index[-1].isoformat(),
+            "trained_rows": len(data),
+            "history": (state.get("history", []) + [entry])[-20:],
+        })
+        self._save_state(state)
+
+        print(f"[RETRAIN] Version {version} saved ({action}, {entry['seconds']}s)")
+        return {'success': True, 'action': action, 'version': version, 'results': results, **entry}
+
+    def _full_refit(self, data: pd.DataFrame, epochs: int) -> Dict[str, Dict[str, Any]]:
+        """Retrain every variant with a freshly fitted scaler."""
+        return {name: self.forecaster.train(data.copy(), epochs=epochs, mode=name)
+                for name, *_ in self._variants()}
+
+    def _fine_tune(self, data: pd.DataFrame, first_new: int, epochs: int) -> Dict[str, Dict[str, Any]]:
+        """
+        Fit each variant on new windows plus a replay sample of older ones.
+
+        Nothing is written until every variant has fitted: if one fails, the
+        ones already fitted get their previous weights back, so the files on
+        disk, the loaded models and the retrain state stay on the same version.
+        """
+        f = self.forecaster
+        feature_data = data[f.feature_columns].values
+        results, fitted = {}, []  # fitted: (model, scaler, model_path, npz_path, weights before the fit)
+
+        for name, model, scaler, model_path, npz_path, horizon in self._variants():
+            try:
+                scaled = scale_to_memmap(scaler, feature_data, f"retrain_{name}", fit=False)
+                n_samples = len(f.create_sequences(scaled, horizon)[0])
+
+                # A window is new if any of its targets falls on an untrained hour
+                boundary = min(max(0, first_new - f.lookback - horizon + 1), n_samples)
+                new_idx = np.arange(boundary, n_samples)
+                if len(new_idx) == 0:
+                    results[name] = {'success': True, 'samples': 0}
+                    continue
+
+                replay_size = int(min(boundary, MAX_REPLAY_SAMPLES,
+                                      max(MIN_REPLAY_SAMPLES, REPLAY_RATIO * len(new_idx))))
+                replay_idx = self.rng.choice(boundary, size=replay_size, replace=False)
+                indices = np.concatenate([new_idx, replay_idx])
+
+                weights = model.get_weights()
+                history = model.fit(window_dataset(scaled, indices, f.lookback, 32, horizon=horizon),
+                                    epochs=epochs, verbose=0)
+                fitted.append((model, scaler, model_path, npz_path, weights))
+
+                results[name] = {
+                    'success': True,
+                    'new_samples': len(new_idx),
+                    'replay_samples': replay_size,
+                    'loss': float(history.history['loss'][-1]),
+                }
+            except Exception as e:
+                results[name] = {'success': False, 'error': str(e)}
+                for model, _, _, _, weights in fitted:
+                    model.set_weights(weights)
+                print(f"[RETRAIN] {name} fine-tune failed, kept the previous weights: {e}")
+                return results
+
+        for model, scaler, model_path, npz_path, _ in fitted:
+            f._save_model(model, model_path)
+            f._export_numpy(model, scaler, npz_path)
+        return results
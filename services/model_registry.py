@@ -0,0 +1,288 @@
+"""
+Model Registry
+Versioned model artifacts with checksums, lazy loading and a memory-bounded LRU of loaded models
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+REGISTRY_DIR = "models/registry"
+CURRENT_FILE = "CURRENT"  # Per-model pointer to the promoted version, replaced atomically
+KEEP_VERSIONS = 5  # Older versions are pruned (the promoted one never is)
+
+# Shared budget for every model loaded through the registry, in MB
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "1024"))
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def data_fingerprint(frame: pd.DataFrame) -> str:
+    """Content hash of a training frame (values, index and columns)."""
+    digest = hashlib.sha1(",".join(map(str, frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _memory_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    Every production model's versions, and the loaded models they share memory in.
+
+    A version is an immutable directory, models/registry/{name}/v{n}, holding
+    copies of the model files plus meta.json (data fingerprint, metrics,
+    params and a SHA-256 per file). The directory is claimed with os.mkdir, so
+    concurrent trainers in different processes never share a number, and
+    meta.json is written last: until then the version does not exist. Promotion rewrites the model's CURRENT
+    pointer with os.replace, so readers see the old or the new version, never
+    a mix.
+
+    get() loads the promoted version on first use with the loader registered
+    for that model, after verifying checksums. Loaded models sit in one LRU
+    whose total (measured RSS growth on load, at least the file sizes) is kept
+    under MODEL_MEMORY_BUDGET_MB; the least recently used are dropped first.
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR, budget_mb: float = MODEL_MEMORY_BUDGET_MB):
+        self.root = root
+        self.budget_mb = budget_mb
+        self._loaders: Dict[str, Callable[[Dict[str, str], Dict[str, Any]], Any]] = {}
+        self._loaded: "OrderedDict[Tuple[str, int], Tuple[Any, float]]" = OrderedDict()  # -> (model, MB)
+        self._lock = threading.RLock()
+        self._load_locks: Dict[Tuple[str, int], threading.Lock] = {}
+
+    # ---- Versions ----
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _version_dir(self, name: str, version: int) -> str:
+        return os.path.join(self._model_dir(name), f"v{version}")
+
+    def _version_numbers(self, name: str) -> List[int]:
+        """Every claimed version number, including ones still being written."""
+        try:
+            entries = os.listdir(self._model_dir(name))
+        except OSError:
+            return []
+        return sorted(int(d[1:]) for d in entries if d.startswith("v") and d[1:].isdigit())
+
+    def versions(self, name: str) -> List[int]:
+        """Registered version numbers, oldest first (a version is complete once its meta.json exists)."""
+        return [v for v in self._version_numbers(name)
+                if os.path.exists(os.path.join(self._version_dir(name, v), "meta.json"))]
+
+    def _claim_version(self, name: str) -> int:
+        """Reserve the next version number; os.mkdir lets only one process win each number."""
+        os.makedirs(self._model_dir(name), exist_ok=True)
+        version = (self._version_numbers(name) or [0])[-1] + 1
+        while True:
+            try:
+                os.mkdir(self._version_dir(name, version))
+                return version
+            except FileExistsError:
+                version += 1
+
+    def metadata(self, name: str, version: int) -> Dict[str, Any]:
+        with open(os.path.join(self._version_dir(name, version), "meta.json"), 'r') as f:
+            return json.load(f)
+
+    def current_version(self, name: str) -> Optional[int]:
+        """The promoted version number, or None when nothing is promoted."""
+        try:
+            with open(os.path.join(self._model_dir(name), CURRENT_FILE), 'r') as f:
+                return int(json.load(f)["version"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def current(self, name: str) -> Optional[Dict[str, Any]]:
+        """Metadata of the promoted version."""
+        version = self.current_version(name)
+        return None if version is None else self.metadata(name, version)
+
+    def current_versions(self) -> Dict[str, int]:
+        """{model name: promoted version} for every registered model."""
+        try:
+            names = sorted(os.listdir(self.root))
+        except OSError:
+            return {}
+        versions = {name: self.current_version(name) for name in names}
+        return {name: v for name, v in versions.items() if v is not None}
+
+    def register(self, name: str, files: Dict[str, str], metrics: Optional[Dict[str, Any]] = None,
+                 data_fingerprint: Optional[str] = None, params: Optional[Dict[str, Any]] = None,
+                 promote: bool = True, instance: Any = None) -> int:
+        """
+        Store a new version of `name` from files on disk.
+
+        Args:
+            files: {role: path}, e.g. {"model": "models/lstm_sales_model.h5", "scaler": ...};
+                   missing paths are skipped
+            metrics: Evaluation results (MAE, RMSE, ...)
+            data_fingerprint: Identity of the training data (see data_fingerprint())
+            params: Hyperparameters the model was trained with
+            promote: Make it the served version right away
+            instance: The already-loaded model for these files, cached so the
+                      first get() does not load it again
+
+        Returns:
+            The new version number
+        """
+        files = {role: path for role, path in files.items() if path and os.path.exists(path)}
+        if not files:
+            raise ValueError(f"No files to register for {name}")
+
+        with self._lock:
+            version = self._claim_version(name)
+            version_dir = self._version_dir(name, version)
+
+            try:
+                entries = {}
+                for role, path in files.items():
+                    target = os.path.join(version_dir, os.path.basename(path))
+                    shutil.copy2(path, target)
+                    entries[role] = {"file": os.path.basename(path), "sha256": file_checksum(target),
+                                     "bytes": os.path.getsize(target)}
+
+                meta = {
+                    "name": name,
+                    "version": version,
+                    "created_at": datetime.now().isoformat(),
+                    "data_fingerprint": data_fingerprint,
+                    "metrics": metrics or {},
+                    "params": params or {},
+                    "files": entries,
+                }
+                meta_path = os.path.join(version_dir, "meta.json")
+                tmp_path = f"{meta_path}.tmp{os.getpid()}"
+                with open(tmp_path, 'w') as f:
+                    json.dump(meta, f, indent=2, default=str)
+                os.replace(tmp_path, meta_path)  # The version appears complete or not at all
+            except BaseException:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                raise
+            print(f"[REGISTRY] Registered {name} v{version}")
+
+            if instance is not None:
+                self._cache((name, version), instance, sum(e["bytes"] for e in entries.values()) / 2 ** 20)
+            if promote:
+                self.promote(name, version)
+            self._prune(name)
+        return version
+
+    def promote(self, name: str, version: int):
+        """Serve `version` of `name` from now on (checksums are verified first)."""
+        self._verify(name, self.metadata(name, version))
+        pointer = os.path.join(self._model_dir(name), CURRENT_FILE)
+        tmp_path = f"{pointer}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": version, "promoted_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, pointer)
+        print(f"[REGISTRY] Promoted {name} v{version}")
+
+    def _verify(self, name: str, meta: Dict[str, Any]):
+        version_dir = self._version_dir(name, meta["version"])
+        for role, entry in meta["files"].items():
+            if file_checksum(os.path.join(version_dir, entry["file"])) != entry["sha256"]:
+                raise ValueError(f"Checksum mismatch for {name} v{meta['version']} {role} file")
+
+    def _prune(self, name: str):
+        current = self.current_version(name)
+        for version in self.versions(name)[:-KEEP_VERSIONS]:
+            if version != current:
+                shutil.rmtree(self._version_dir(name, version), ignore_errors=True)
+                self._loaded.pop((name, version), None)
+
+    # ---- Loaded models ----
+
+    def register_loader(self, name: str, loader: Callable[[Dict[str, str], Dict[str, Any]], Any]):
+        """loader({role: path}, meta) -> model object, used by get(name)."""
+        self._loaders[name] = loader
+
+    def get(self, name: str, version: Optional[int] = None) -> Any:
+        """
+        The loaded model for a version (default: the promoted one), loading it on first use.
+
+        Raises:
+            KeyError: no loader for `name` or no promoted version
+        """
+        if name not in self._loaders:
+            raise KeyError(f"No loader registered for model {name}")
+        version = version or self.current_version(name)
+        if version is None:
+            raise KeyError(f"No promoted version of model {name}")
+        key = (name, version)
+
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                return self._loaded[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:  # One load per version, even with concurrent first requests
+            with self._lock:
+                if key in self._loaded:
+                    return self._loaded[key][0]
+            meta = self.metadata(name, version)
+            self._verify(name, meta)
+            version_dir = self._version_dir(name, version)
+            files = {role: os.path.join(version_dir, e["file"]) for role, e in meta["files"].items()}
+
+            before = _memory_mb()
+            model = self._loaders[name](files, meta)
+            after = _memory_mb()
+            file_mb = sum(e["bytes"] for e in meta["files"].values()) / 2 ** 20
+            size_mb = max(file_mb, after - before) if before is not None and after is not None else file_mb
+            self._cache(key, model, size_mb)
+            print(f"[REGISTRY] Loaded {name} v{version} ({size_mb:.1f} MB)")
+            return model
+
+    def _cache(self, key: Tuple[str, int], model: Any, size_mb: float):
+        """Add a loaded model, evicting least recently used ones beyond the budget."""
+        with self._lock:
+            self._loaded[key] = (model, size_mb)
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > 1 and self.memory_mb() > self.budget_mb:
+                evicted, _ = self._loaded.popitem(last=False)
+                print(f"[REGISTRY] Evicted {evicted[0]} v{evicted[1]} (memory budget {self.budget_mb:g} MB)")
+
+    def memory_mb(self) -> float:
+        """Estimated memory of all loaded models."""
+        return sum(size for _, size in self._loaded.values())
+
+    def loaded(self) -> Dict[str, float]:
+        """{"name vN": MB} of loaded models, least recently used first."""
+        with self._lock:
+            return {f"{name} v{version}": round(size, 1) for (name, version), (_, size) in self._loaded.items()}
+
+
+# Singleton instance
+_model_registry = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get or create model registry singleton."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
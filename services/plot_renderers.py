@@ -0,0 +1,234 @@
+"""
+Plot Renderers
+Matplotlib/seaborn/folium chart code, run by the render queue's worker process
+"""
+from typing import Any, Dict
+
+import pandas as pd
+
+
+def _pyplot():
+    """pyplot and seaborn on the non-interactive backend, imported on first render."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+def render_forecast_plot(data: Dict[str, Any], output_file: str):
+    """ForecastAgent chart of tomorrow's predicted orders per hour."""
+    plt, sns = _pyplot()
+    df_predictions = pd.DataFrame(data["predictions"])
+
+    plt.figure(figsize=(12, 6))
+    sns.set_style("whitegrid")
+
+    plt.plot(
+        df_predictions['hour'],
+        df_predictions['predicted_orders'],
+        marker='o',
+        linewidth=2,
+        markersize=8,
+        color='#FF6B35'
+    )
+
+    # Highlight peak
+    peak_idx = df_predictions['predicted_orders'].idxmax()
+    peak_row = df_predictions.iloc[peak_idx]
+    plt.scatter(
+        peak_row['hour'],
+        peak_row['predicted_orders'],
+        s=200,
+        color='#FFD700',
+        edgecolors='black',
+        linewidths=2,
+        zorder=5,
+        label='Peak Hour'
+    )
+
+    plt.xlabel('Hour of Day', fontsize=12, fontweight='bold')
+    plt.ylabel('Predicted Orders', fontsize=12, fontweight='bold')
+    plt.title('Tomorrow\'s Order Volume Forecast', fontsize=14, fontweight='bold')
+    plt.xticks(df_predictions['hour'])
+    plt.grid(True, alpha=0.3)
+    plt.legend()
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def render_lstm_forecast_plot(data: Dict[str, Any], output_file: str):
+    """ForecastAgentLSTM orders and revenue charts with confidence intervals (from notebook style)."""
+    plt, _ = _pyplot()
+    df_predictions = pd.DataFrame(data["predictions"])
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
+
+    # Plot 1: Orders with confidence intervals
+    ax1.plot(
+        df_predictions['hour'],
+        df_predictions['predicted_orders'],
+        marker='o',
+        linewidth=2,
+        markersize=8,
+        color='#FF6B35',
+        label='Predicted Orders',
+        zorder=3
+    )
+
+    # Confidence interval shading
+    ax1.fill_between(
+        df_predictions['hour'],
+        df_predictions['lower_ci_orders'],
+        df_predictions['upper_ci_orders'],
+        color='lightblue',
+        alpha=0.4,
+        label='90% Confidence Interval'
+    )
+
+    # Highlight peak
+    peak_idx = df_predictions['predicted_orders'].idxmax()
+    peak_row = df_predictions.iloc[peak_idx]
+    ax1.scatter(
+        peak_row['hour'],
+        peak_row['predicted_orders'],
+        s=200,
+        color='#FFD700',
+        edgecolors='black',
+        linewidths=2,
+        zorder=5,
+        label='Peak Hour'
+    )
+
+    ax1.set_xlabel('Hour of Day', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Predicted Orders', fontsize=12, fontweight='bold')
+    ax1.set_title('Tomorrow\'s Order Volume Forecast (LSTM with 90% CI)', 
+                 fontsize=14, fontweight='bold')
+    ax1.set_xticks(df_predictions['hour'])
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+
+    # Plot 2: Revenue forecast
+    ax2.plot(
+        df_predictions['hour'],
+        df_predictions['predicted_revenue'],
+        marker='s',
+        linewidth=2,
+        markersize=8,
+        color='#10B981',
+        label='Predicted Revenue',
+        zorder=3
+    )
+
+    # Revenue confidence interval
+    ax2.fill_between(
+        df_predictions['hour'],
+        df_predictions['lower_ci_revenue'],
+        df_predictions['upper_ci_revenue'],
+        color='lightgreen',
+        alpha=0.4,
+        label='90% Confidence Interval'
+    )
+
+    # Highlight peak revenue hour
+    ax2.scatter(
+        peak_row['hour'],
+        peak_row['predicted_revenue'],
+        s=200,
+        color='#FFD700',
+        edgecolors='black',
+        linewidths=2,
+        zorder=5,
+        label='Peak Hour'
+    )
+
+    ax2.set_xlabel('Hour of Day', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Predicted Revenue ($)', fontsize=12, fontweight='bold')
+    ax2.set_title('Tomorrow\'s Revenue Forecast (LSTM)', 
+                 fontsize=14, fontweight='bold')
+    ax2.set_xticks(df_predictions['hour'])
+    ax2.grid(True, alpha=0.3)
+    ax2.legend()
+
+    # Add total revenue annotation
+    total_revenue = df_predictions['predicted_revenue'].sum()
+    ax2.text(
+        0.98, 0.95,
+        f'Total Daily Revenue: ${total_revenue:,.2f}',
+        transform=ax2.transAxes,
+        fontsize=11,
+        fontweight='bold',
+        bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8),
+        verticalalignment='top',
+        horizontalalignment='right'
+    )
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def render_expansion_map(data: Dict[str, Any], output_file: str):
+    """GeoAgent interactive Folium map with location markers."""
+    import folium
+
+    locations = data["locations"]
+
+    # Center on first location or default
+    if locations:
+        center_lat = sum(loc["lat"] for loc in locations) / len(locations)
+        center_lng = sum(loc["lng"] for loc in locations) / len(locations)
+    else:
+        center_lat, center_lng = 37.7749, -122.4194
+
+    # Create map
+    m = folium.Map(
+        location=[center_lat, center_lng],
+        zoom_start=12,
+        tiles="OpenStreetMap"
+    )
+
+    # Add markers
+    for i, loc in enumerate(locations):
+        # Color based on ROI score
+        if loc["roi_score"] >= 0.7:
+            color = "green"
+        elif loc["roi_score"] >= 0.5:
+            color = "orange"
+        else:
+            color = "red"
+
+        # Create popup
+        popup_html = f"""
+        <div style="font-family: Arial; width: 250px;">
+            <h4>{loc['name']}</h4>
+            <b>ROI Score:</b> {loc['roi_score']:.2f}<br>
+            <b>Traffic:</b> {loc['traffic_score']:.2f}<br>
+            <b>Income:</b> {loc['income_score']:.2f}<br>
+            <b>Competition:</b> {loc['competition_score']:.2f}<br>
+            <b>Competitors:</b> {loc['competitors_count']}<br>
+            <b>Nearby Businesses:</b> {loc['businesses_count']}<br>
+            <br>
+            <a href="{loc['gmaps_url']}" target="_blank">Open in Google Maps</a>
+        </div>
+        """
+
+        folium.Marker(
+            location=[loc["lat"], loc["lng"]],
+            popup=folium.Popup(popup_html, max_width=300),
+            tooltip=f"{loc['name']} (ROI: {loc['roi_score']:.2f})",
+            icon=folium.Icon(color=color, icon="info-sign")
+        ).add_to(m)
+
+    # Save map
+    m.save(output_file)
+
+
+# kind -> (renderer, file extension)
+RENDERERS = {
+    "forecast_plot": (render_forecast_plot, "png"),
+    "lstm_forecast_plot": (render_lstm_forecast_plot, "png"),
+    "expansion_map": (render_expansion_map, "html"),
+}
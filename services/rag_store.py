@@ -4,9 +4,16 @@ Supports both Chroma (local) and Pinecone (cloud) vector stores.
 """
 import os
 import json
+import glob
+import hashlib
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
+from services.embedding_cache import (
+    EMBED_BATCH_SIZE, EMBED_CONCURRENCY, embed_texts, get_embedding_cache
+)
+
 # Optional imports - NOT USED when Captain is primary
 try:
     import chromadb
@@ -29,6 +36,16 @@ except ImportError:
             self.metadata = metadata or {}
 
 
+MANIFEST_DIR = os.path.join("artifacts", "rag_manifests")  # {tenant_id}.json per tenant
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+DELETE_BATCH_SIZE = 1000
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 @dataclass
 class Citation:
     """Citation with source and excerpt."""
@@ -46,17 +63,23 @@ class RAGStore:
         tenant_id: str,
         gemini_api_key: str,
         use_pinecone: bool = False,
-        pinecone_api_key: Optional[str] = None
+        pinecone_api_key: Optional[str] = None,
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        embed_concurrency: int = EMBED_CONCURRENCY
     ):
         self.tenant_id = tenant_id
         self.namespace = f"brew_{tenant_id}"
         self.use_pinecone = use_pinecone
-        self.documents_store = []  # Simple fallback storage
+        self.documents_store: Dict[str, Document] = {}  # Simple fallback storage, by chunk id
+        self._manifest = None
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.embedding_model = "models/embedding-001"
         
         # Initialize embeddings if available
         if HAS_LANGCHAIN:
             self.embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001",
+                model=self.embedding_model,
                 google_api_key=gemini_api_key
             )
             
@@ -119,8 +142,8 @@ class RAGStore:
     def chunk_documents(
         self, 
         documents: List[Document],
-        chunk_size: int = 1000,
-        chunk_overlap: int = 200
+        chunk_size: int = CHUNK_SIZE,
+        chunk_overlap: int = CHUNK_OVERLAP
     ) -> List[Document]:
         """Split documents into chunks."""
         if HAS_LANGCHAIN:
@@ -142,65 +165,241 @@ class RAGStore:
                     chunks.append(Document(chunk_text, doc.metadata))
             return chunks
     
-    def ingest_documents(self, documents: List[Document]) -> Dict[str, Any]:
+    # ---- Manifest ----
+    
+    def _backend_name(self) -> str:
+        if hasattr(self, 'use_simple_storage') and self.use_simple_storage:
+            return "simple_storage"
+        return "pinecone" if self.use_pinecone else "chroma"
+    
+    def _manifest_path(self) -> str:
+        return os.path.join(MANIFEST_DIR, f"{self.tenant_id}.json")
+    
+    def _load_manifest(self) -> Dict[str, Any]:
         """
-        Ingest documents into the vector store.
+        Sources already ingested for this tenant: {source: {hash, chunk_ids}}.
+        
+        Simple storage is in memory, so its manifest is too. A manifest written
+        for another backend describes nothing in this one and is ignored.
+        """
+        if self._manifest is not None:
+            return self._manifest
+        backend = self._backend_name()
+        manifest = None
+        if backend != "simple_storage":
+            try:
+                with open(self._manifest_path(), 'r') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = None
+            if manifest is None and backend == "chroma":
+                self._delete_legacy_chroma_ids()
+        if manifest is None or manifest.get("backend") != backend:
+            manifest = {"tenant_id": self.tenant_id, "backend": backend, "sources": {}}
+        self._manifest = manifest
+        return manifest
+    
+    def _save_manifest(self):
+        manifest = self._manifest
+        manifest["updated_at"] = datetime.now().isoformat()
+        if manifest["backend"] == "simple_storage":
+            return
+        os.makedirs(MANIFEST_DIR, exist_ok=True)
+        path = self._manifest_path()
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+    
+    def ingested_sources(self) -> Dict[str, Dict[str, Any]]:
+        """{source: {"hash", "chunk_ids", "ingested_at"}} of everything in the store."""
+        return dict(self._load_manifest()["sources"])
+    
+    @staticmethod
+    def _source_hash(documents: List[Document]) -> str:
+        """Hash of a source's text, metadata and the chunking settings that produced its chunks."""
+        payload = json.dumps(
+            [[CHUNK_SIZE, CHUNK_OVERLAP]] + [[doc.page_content, doc.metadata] for doc in documents],
+            sort_keys=True, default=str
+        )
+        return _sha256(payload)
+    
+    def chunk_id(self, source: str, text: str) -> str:
+        """Content-addressed id: the same chunk of the same source always gets the same id."""
+        return f"{self.tenant_id}:{source}:{_sha256(text)[:16]}"
+    
+    # ---- Ingestion ----
+    
+    def ingest_documents(
+        self,
+        documents: List[Document],
+        prune_prefix: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Ingest documents into the vector store, incrementally.
+        
+        Documents are grouped by metadata["source"]. A source whose content
+        hash matches the manifest is skipped; for a changed one only chunks
+        with new ids are embedded and added, and chunks that disappeared are
+        deleted. Sources not passed in are left alone, unless they start with
+        `prune_prefix` (e.g. a directory that was re-scanned), in which case
+        they were removed and their chunks are deleted.
         
         Args:
             documents: List of LangChain Document objects with page_content and metadata
+            prune_prefix: Delete ingested sources under this prefix that are not in `documents`
             
         Returns:
             Dict with ingestion stats
         """
-        chunks = self.chunk_documents(documents)
+        manifest = self._load_manifest()
+        by_source: Dict[str, List[Document]] = {}
+        for doc in documents:
+            by_source.setdefault(doc.metadata.get("source", ""), []).append(doc)
         
-        # Store in simple storage for fallback
-        self.documents_store.extend(chunks)
-        
-        if hasattr(self, 'use_simple_storage') and self.use_simple_storage:
-            return {
-                "chunks_ingested": len(chunks),
-                "total_documents": len(documents),
-                "namespace": self.namespace,
-                "backend": "simple_storage"
+        new_ids, new_chunks, deleted_ids = [], [], []
+        updates, unchanged = {}, 0
+        for source, docs in by_source.items():
+            source_hash = self._source_hash(docs)
+            entry = manifest["sources"].get(source)
+            if entry and entry["hash"] == source_hash:
+                unchanged += 1
+                continue
+            
+            chunks = {}
+            for chunk in self.chunk_documents(docs):
+                chunks.setdefault(self.chunk_id(source, chunk.page_content), chunk)
+            old_ids = set(entry["chunk_ids"]) if entry else set()
+            for chunk_id, chunk in chunks.items():
+                if chunk_id not in old_ids:
+                    new_ids.append(chunk_id)
+                    new_chunks.append(chunk)
+            deleted_ids.extend(i for i in (entry["chunk_ids"] if entry else []) if i not in chunks)
+            updates[source] = {
+                "hash": source_hash,
+                "chunk_ids": list(chunks),
+                "ingested_at": datetime.now().isoformat()
             }
+        
+        removed_sources = []
+        if prune_prefix is not None:
+            removed_sources = [
+                source for source in manifest["sources"]
+                if source.startswith(prune_prefix) and source not in by_source
+            ]
+            for source in removed_sources:
+                deleted_ids.extend(manifest["sources"][source]["chunk_ids"])
+        
+        backend = self._backend_name()
+        if backend == "simple_storage":
+            result = {"namespace": self.namespace, "backend": backend}
         elif self.use_pinecone:
-            return self._ingest_pinecone(chunks)
+            result = self._ingest_pinecone(new_chunks, new_ids)
+            self._delete_pinecone(deleted_ids)
         else:
-            return self._ingest_chroma(chunks)
+            result = self._ingest_chroma(new_chunks, new_ids)
+            self._delete_chroma(deleted_ids)
+        
+        # Store in simple storage for fallback
+        for chunk_id in deleted_ids:
+            self.documents_store.pop(chunk_id, None)
+        self.documents_store.update(zip(new_ids, new_chunks))
+        
+        manifest["sources"].update(updates)
+        for source in removed_sources:
+            del manifest["sources"][source]
+        self._save_manifest()
+        
+        if new_ids or deleted_ids:
+            print(f"[RAG] {self.namespace}: +{len(new_ids)} / -{len(deleted_ids)} chunks "
+                  f"({len(updates)} changed, {unchanged} unchanged, {len(removed_sources)} removed sources)")
+        
+        result.update({
+            "chunks_ingested": len(new_ids),
+            "chunks_deleted": len(deleted_ids),
+            "total_documents": len(by_source),
+            "sources_changed": len(updates),
+            "sources_unchanged": unchanged,
+            "sources_removed": len(removed_sources)
+        })
+        return result
+    
+    def ingest_directory(self, directory: str, patterns: tuple = ("*.md", "*.txt")) -> Dict[str, Any]:
+        """
+        Ingest every matching file in `directory` (e.g. data/tenant_demo), one source per file.
+        
+        Unchanged files are skipped, edited ones only have their own chunks
+        replaced and deleted files have their chunks removed.
+        """
+        prefix = directory.rstrip("/\\").replace(os.sep, "/") + "/"
+        paths = sorted({p for pattern in patterns for p in glob.glob(os.path.join(directory, pattern))})
+        documents = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            documents.append(Document(content, {
+                "source": prefix + os.path.basename(path),
+                "filename": os.path.basename(path),
+                "tenant_id": self.tenant_id,
+                "type": "knowledge_base"
+            }))
+        return self.ingest_documents(documents, prune_prefix=prefix)
+    
+    def _embed_chunks(self, texts: List[str]) -> Dict[str, Any]:
+        """Embed chunk texts in batches, reusing cached vectors for unchanged text."""
+        result = embed_texts(
+            self.embeddings, texts, self.embedding_model,
+            cache=get_embedding_cache(),
+            batch_size=self.embed_batch_size,
+            concurrency=self.embed_concurrency
+        )
+        if texts:
+            print(f"[RAG] Embedded {len(texts)} chunks: {result['cached']} cached, "
+                  f"{result['embedded']} new in {result['calls']} call(s)")
+        return result
+    
+    @staticmethod
+    def _embedding_stats(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "embeddings_cached": result["cached"],
+            "embeddings_computed": result["embedded"],
+            "embedding_calls": result["calls"]
+        }
     
-    def _ingest_chroma(self, chunks: List[Document]) -> Dict[str, Any]:
+    def _ingest_chroma(self, chunks: List[Document], ids: List[str]) -> Dict[str, Any]:
         """Ingest chunks into Chroma."""
         texts = [chunk.page_content for chunk in chunks]
         metadatas = [chunk.metadata for chunk in chunks]
-        ids = [f"{self.tenant_id}_{i}" for i in range(len(chunks))]
         
         # Generate embeddings
-        embeddings = [self.embeddings.embed_query(text) for text in texts]
-        
-        # Add to collection
-        self.collection.add(
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        embedded = self._embed_chunks(texts)
+        embeddings = embedded["vectors"]
+        
+        # Upsert: ids are content-addressed, so a repeated chunk overwrites itself
+        if chunks:
+            self.collection.upsert(
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
         
         return {
             "chunks_ingested": len(chunks),
             "total_documents": len(set(m.get("source", "") for m in metadatas)),
             "namespace": self.namespace,
-            "backend": "chroma"
+            "backend": "chroma",
+            **self._embedding_stats(embedded)
         }
     
-    def _ingest_pinecone(self, chunks: List[Document]) -> Dict[str, Any]:
+    def _ingest_pinecone(self, chunks: List[Document], ids: List[str]) -> Dict[str, Any]:
         """Ingest chunks into Pinecone."""
         vectors = []
+        embedded = self._embed_chunks([chunk.page_content for chunk in chunks])
         
-        for i, chunk in enumerate(chunks):
-            embedding = self.embeddings.embed_query(chunk.page_content)
+        for chunk_id, chunk, embedding in zip(ids, chunks, embedded["vectors"]):
             vectors.append({
-                "id": f"{self.tenant_id}_{i}",
+                "id": chunk_id,
                 "values": embedding,
                 "metadata": {
                     **chunk.metadata,
@@ -218,9 +417,28 @@ class RAGStore:
             "chunks_ingested": len(chunks),
             "total_documents": len(set(v["metadata"].get("source", "") for v in vectors)),
             "namespace": self.namespace,
-            "backend": "pinecone"
+            "backend": "pinecone",
+            **self._embedding_stats(embedded)
         }
     
+    def _delete_chroma(self, ids: List[str]):
+        """Delete chunks from Chroma."""
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            self.collection.delete(ids=ids[i:i+DELETE_BATCH_SIZE])
+    
+    def _delete_pinecone(self, ids: List[str]):
+        """Delete chunks from Pinecone."""
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            self.index.delete(ids=ids[i:i+DELETE_BATCH_SIZE], namespace=self.namespace)
+    
+    def _delete_legacy_chroma_ids(self):
+        """Drop chunks stored under the old positional ids ({tenant_id}_{i}) before the first manifest."""
+        prefix = f"{self.tenant_id}:"
+        legacy = [i for i in self.collection.get(include=[])["ids"] if not i.startswith(prefix)]
+        if legacy:
+            self._delete_chroma(legacy)
+            print(f"[RAG] {self.namespace}: removed {len(legacy)} chunks with legacy ids")
+    
     def query(
         self, 
         query: str, 
@@ -240,7 +458,7 @@ class RAGStore:
             # Simple keyword matching for fallback
             results = []
             query_lower = query.lower()
-            for doc in self.documents_store[:top_k]:
+            for doc in list(self.documents_store.values())[:top_k]:
                 text = doc.page_content
                 # Simple relevance: check if query words appear in text
                 score = sum(1 for word in query_lower.split() if word in text.lower()) / len(query_lower.split())
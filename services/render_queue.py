@@ -0,0 +1,271 @@
+"""
+Render Queue
+Background rendering of charts and maps, deduplicated by content hash
+"""
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from services.plot_renderers import RENDERERS
+
+RENDER_DIR = "artifacts/renders"  # Content-addressed outputs: {hash}.{ext}
+RENDER_VERSION = 1  # Bump when a renderer's output changes, so old renders are not reused
+
+# "process" renders in a background worker; "inline" renders during submit()
+RENDER_MODE = os.getenv("RENDER_MODE", "process").lower()
+SHUTDOWN_TIMEOUT = 60  # Seconds allowed at exit for queued renders to finish
+
+
+def spec_hash(kind: str, data: Dict[str, Any]) -> str:
+    """Content hash of a plot specification (renderer kind, version and data)."""
+    payload = json.dumps({"kind": kind, "version": RENDER_VERSION, "data": data},
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _copy_atomic(source: str, target: str):
+    """Copy a rendered file to an artifact path without exposing a half-written file."""
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    base, ext = os.path.splitext(target)
+    tmp = f"{base}.tmp{os.getpid()}{ext}"
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+
+
+def _render(kind: str, data: Dict[str, Any], path: str):
+    """Render one spec to its content-addressed path (extension kept so savefig picks the format)."""
+    renderer, ext = RENDERERS[kind]
+    tmp = f"{path[:-len(ext) - 1]}.tmp{os.getpid()}.{ext}"
+    renderer(data, tmp)
+    os.replace(tmp, path)
+
+
+def _render_worker(tasks, results):
+    """Worker process loop: render specs until the None sentinel arrives."""
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        key, kind, data, path = task
+        try:
+            _render(kind, data, path)
+            results.put((key, None))
+        except Exception as e:
+            results.put((key, f"{type(e).__name__}: {e}"))
+
+
+class RenderHandle:
+    """A queued artifact: its path is known at once, the file exists once status is 'done'."""
+
+    def __init__(self, key: str, kind: str, path: str):
+        self.key = key
+        self.kind = kind
+        self.path = path
+        self.status = "pending"
+        self.error = None
+        self._event = threading.Event()
+
+    def _finish(self, error: Optional[str] = None):
+        self.status = "failed" if error else "done"
+        self.error = error
+        self._event.set()
+
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until rendered; True when the artifact was written."""
+        self._event.wait(timeout)
+        return self.status == "done"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"key": self.key, "kind": self.kind, "path": self.path,
+                "status": self.status, "error": self.error}
+
+
+class RenderQueue:
+    """
+    Accepts plot specifications and renders them off the request path.
+
+    submit() returns a RenderHandle immediately. Specs are hashed; a spec
+    rendered before (this run or an earlier one) is copied from
+    RENDER_DIR/{hash}.{ext} without re-rendering, and a spec already queued
+    just gains another output path. A single spawned worker process does the
+    rendering, so matplotlib, seaborn and folium are never imported by the
+    caller.
+    """
+
+    def __init__(self, render_dir: str = RENDER_DIR, mode: str = RENDER_MODE):
+        self.render_dir = render_dir
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[RenderHandle]] = {}  # key -> handles waiting on that render
+        self._process = None
+        self._tasks = None
+        self._results = None
+        self._collector = None
+        self._close_registered = False
+        self.stats = {"submitted": 0, "rendered": 0, "deduplicated": 0, "failed": 0}
+
+    def _rendered_path(self, key: str, kind: str) -> str:
+        return os.path.join(self.render_dir, f"{key}.{RENDERERS[kind][1]}")
+
+    def submit(self, kind: str, data: Dict[str, Any], output_file: str) -> RenderHandle:
+        """
+        Queue a render of `kind` with `data` to `output_file`.
+
+        Args:
+            kind: A renderer from services.plot_renderers.RENDERERS
+            data: JSON-serializable renderer input (hashed for deduplication)
+            output_file: Artifact path the result is copied to
+        """
+        if kind not in RENDERERS:
+            raise ValueError(f"Unknown render kind: {kind} (available: {', '.join(RENDERERS)})")
+        key = spec_hash(kind, data)
+        handle = RenderHandle(key, kind, output_file)
+        rendered = self._rendered_path(key, kind)
+
+        with self._lock:
+            self.stats["submitted"] += 1
+            if os.path.exists(rendered):
+                self.stats["deduplicated"] += 1
+                self._deliver(rendered, [handle])
+                return handle
+            if key in self._pending:
+                self.stats["deduplicated"] += 1
+                self._pending[key].append(handle)
+                return handle
+            os.makedirs(self.render_dir, exist_ok=True)
+            self._pending[key] = [handle]
+            if self.mode != "inline" and self._ensure_worker():
+                self._tasks.put((key, kind, data, rendered))
+                return handle
+
+        # Inline mode, or the worker could not start
+        try:
+            _render(kind, data, rendered)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self._complete(key, error)
+        return handle
+
+    def status(self, key: str) -> str:
+        """'pending', 'done' or 'unknown' for a spec hash (any kind)."""
+        with self._lock:
+            if key in self._pending:
+                return "pending"
+        for _, ext in RENDERERS.values():
+            if os.path.exists(os.path.join(self.render_dir, f"{key}.{ext}")):
+                return "done"
+        return "unknown"
+
+    def _deliver(self, rendered: str, handles: List[RenderHandle], error: Optional[str] = None):
+        for handle in handles:
+            if error is None:
+                try:
+                    _copy_atomic(rendered, handle.path)
+                except OSError as e:
+                    handle._finish(str(e))
+                    continue
+            handle._finish(error)
+
+    def _complete(self, key: str, error: Optional[str]):
+        with self._lock:
+            handles = self._pending.pop(key, [])
+            self.stats["failed" if error else "rendered"] += 1
+        if error:
+            print(f"[RENDER] {handles[0].kind if handles else key} failed: {error}")
+        rendered = self._rendered_path(key, handles[0].kind) if handles else None
+        self._deliver(rendered, handles, error)
+
+    def _ensure_worker(self) -> bool:
+        """Start (or restart) the worker process and result collector; caller holds the lock."""
+        if self._process is not None and self._process.is_alive():
+            return True
+        try:
+            context = multiprocessing.get_context("spawn")
+            self._tasks, self._results = context.Queue(), context.Queue()
+            self._process = context.Process(target=_render_worker, args=(self._tasks, self._results),
+                                            name="render-worker", daemon=True)
+            self._process.start()
+        except Exception as e:
+            print(f"[RENDER] Worker unavailable, rendering inline: {e}")
+            self._process = None
+            self.mode = "inline"
+            return False
+        self._collector = threading.Thread(target=self._collect, args=(self._process, self._results),
+                                           name="render-collector", daemon=True)
+        self._collector.start()
+        if not self._close_registered:
+            # Registered after multiprocessing's own exit hook, so it runs first and
+            # queued renders finish before daemon workers are terminated
+            atexit.register(self.close)
+            self._close_registered = True
+        print(f"[RENDER] Started render worker (pid {self._process.pid})")
+        return True
+
+    def _collect(self, process, results):
+        """Hand finished renders to their handles; fail everything pending if the worker dies."""
+        while True:
+            try:
+                key, error = results.get(timeout=1.0)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                with self._lock:
+                    lost = list(self._pending) if self._process is process else []
+                for key in lost:
+                    self._complete(key, "render worker exited")
+                return
+            except (EOFError, OSError):
+                return
+            self._complete(key, error)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is pending; True if the queue drained in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                handles = [h for group in self._pending.values() for h in group]
+            if not handles:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            handles[0].wait(remaining)
+
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Let queued renders finish, then stop the worker."""
+        if self._process is None:
+            return
+        self.join(timeout)
+        try:
+            self._tasks.put(None)
+            self._process.join(5)
+        except Exception:
+            pass
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+
+# Singleton instance
+_render_queue = None
+
+
+def get_render_queue() -> RenderQueue:
+    """Get or create render queue singleton."""
+    global _render_queue
+    if _render_queue is None:
+        _render_queue = RenderQueue()
+    return _render_queue
@@ -0,0 +1,185 @@
+"""
+Sequence Pipeline for LSTM Training
+Zero-copy sliding windows and a streaming tf.data input pipeline
+"""
+import importlib.util
+import numpy as np
+import os
+import tempfile
+import weakref
+from typing import Optional, Tuple
+
+# TensorFlow is imported only when a dataset is built, so window helpers stay light
+TENSORFLOW_AVAILABLE = importlib.util.find_spec("tensorflow") is not None
+
+
+SEQUENCE_CACHE_DIR = "models/sequences"
+SCALE_CHUNK_ROWS = 65536
+
+
+def sliding_windows(data: np.ndarray, lookback: int, target_col: int = 0,
+                    horizon: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build LSTM windows as strided views over `data` (no copying).
+
+    Sample i is X[i] = data[i:i + lookback] with target y[i] = data[i + lookback, target_col],
+    matching the old append loop. With horizon > 1, y[i] holds the next `horizon` targets.
+    Both results share memory with `data`, so treat them as read-only.
+
+    Args:
+        data: 2D (rows, features) scaled feature array, may be a memmap
+        lookback: Number of past rows per window
+        target_col: Column to predict
+        horizon: Number of future steps per target
+
+    Returns:
+        Tuple of (X, y) views with shapes (n, lookback, features) and (n,) or (n, horizon)
+    """
+    n_samples = len(data) - lookback - horizon + 1
+    if n_samples <= 0:
+        y_shape = (0,) if horizon == 1 else (0, horizon)
+        return np.empty((0, lookback, data.shape[1]), dtype=data.dtype), np.empty(y_shape, dtype=data.dtype)
+
+    # sliding_window_view puts the window axis last: (n, features, lookback)
+    X = np.lib.stride_tricks.sliding_window_view(data[:len(data) - horizon], lookback, axis=0).transpose(0, 2, 1)
+    if horizon == 1:
+        y = data[lookback:, target_col]
+    else:
+        y = np.lib.stride_tricks.sliding_window_view(data[lookback:, target_col], horizon)
+    return X, y
+
+
+def split_indices(n_samples: int, test_fraction: float = 0.2,
+                  val_fraction: float = 0.1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Chronological train/val/test sample indices.
+
+    Test is the last `test_fraction` of samples, val the last `val_fraction`
+    of what remains - the same split Keras' validation_split used to make.
+    """
+    test_start = int((1 - test_fraction) * n_samples)
+    val_start = int((1 - val_fraction) * test_start)
+    return (np.arange(0, val_start), np.arange(val_start, test_start),
+            np.arange(test_start, n_samples))
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def scale_to_memmap(scaler, values: np.ndarray, name: str, fit: bool = True,
+                    chunk_rows: int = SCALE_CHUNK_ROWS) -> np.ndarray:
+    """
+    Scale `values` chunk by chunk into a float32 .npy memmap under models/sequences.
+
+    With fit=True the scaler is fitted incrementally (partial_fit), so neither
+    fitting nor transforming holds a second full-size copy in memory.
+
+    Each call gets its own file (`name` is only a prefix), so a training job,
+    the retrainer and a backend-triggered update never write into each other's
+    memmap mid-epoch. The file is unlinked as soon as it is mapped (POSIX keeps
+    the mapping readable), or else when the returned memmap is collected, so
+    nothing is left behind when training finishes or the process dies.
+
+    Returns:
+        Read-only memmap of the scaled array
+    """
+    os.makedirs(SEQUENCE_CACHE_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=f"{name}.", suffix=".npy", dir=SEQUENCE_CACHE_DIR)
+    os.close(fd)
+
+    try:
+        if fit:
+            if hasattr(scaler, "n_samples_seen_"):
+                # partial_fit accumulates onto a fitted scaler; this makes it start over
+                del scaler.n_samples_seen_
+            for start in range(0, len(values), chunk_rows):
+                scaler.partial_fit(values[start:start + chunk_rows])
+
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=values.shape)
+        for start in range(0, len(values), chunk_rows):
+            out[start:start + chunk_rows] = scaler.transform(values[start:start + chunk_rows])
+        out.flush()
+        del out
+
+        scaled = np.load(path, mmap_mode="r")
+    except BaseException:
+        _remove_quietly(path)
+        raise
+    if os.name == "posix":
+        _remove_quietly(path)
+    else:
+        weakref.finalize(scaled, _remove_quietly, path)  # Mapped files cannot be deleted on Windows
+    return scaled
+
+
+def window_dataset(data: np.ndarray, indices: np.ndarray, lookback: int,
+                   batch_size: int = 32, shuffle: bool = True, seed: Optional[int] = None,
+                   target_col: int = 0, horizon: int = 1, row_ids: Optional[np.ndarray] = None,
+                   id_dropout: float = 0.0):
+    """
+    Stream (window, target) batches from `data` for model.fit / model.predict.
+
+    Only sample indices go through tf.data, so shuffling costs 8 bytes per sample.
+    Each batch gathers its windows straight from `data` (typically a memmap) in
+    parallel map calls, and batches are prefetched so the model never waits on input.
+
+    Args:
+        data: 2D scaled feature array (memmap or ndarray)
+        indices: Sample indices, as returned by split_indices
+        lookback: Window length
+        batch_size: Samples per batch
+        shuffle: Reshuffle indices every epoch (use False for evaluation)
+        seed: Shuffle seed
+        target_col: Column to predict
+        horizon: Future steps per target (y becomes [batch, horizon] when > 1)
+        row_ids: Optional per-row integer ids (e.g. store index); each window's id is
+                 fed as a second model input, giving ((X, ids), y)
+        id_dropout: Fraction of windows whose id is replaced by 0, the "unknown" id,
+                    so the model also learns to forecast for ids it has never seen
+
+    Returns:
+        tf.data.Dataset yielding (X[batch, lookback, features], y[batch])
+    """
+    if not TENSORFLOW_AVAILABLE:
+        raise RuntimeError("TensorFlow not available")
+    import tensorflow as tf
+
+    n_features = data.shape[1]
+    offsets = np.arange(lookback)
+    steps = np.arange(horizon)
+
+    def gather(batch_idx):
+        X = np.asarray(data[batch_idx[:, None] + offsets], dtype=np.float32)
+        if horizon == 1:
+            y = np.asarray(data[batch_idx + lookback, target_col], dtype=np.float32)
+        else:
+            y = np.asarray(data[(batch_idx + lookback)[:, None] + steps, target_col], dtype=np.float32)
+        if row_ids is None:
+            return X, y
+        ids = np.asarray(row_ids[batch_idx], dtype=np.int32)
+        if id_dropout > 0:
+            ids = np.where(np.random.default_rng().random(len(ids)) < id_dropout, 0, ids).astype(np.int32)
+        return X, ids, y
+
+    def load_batch(batch_idx):
+        if row_ids is None:
+            X, y = tf.numpy_function(gather, [batch_idx], [tf.float32, tf.float32])
+        else:
+            X, ids, y = tf.numpy_function(gather, [batch_idx], [tf.float32, tf.int32, tf.float32])
+            ids.set_shape([None])
+        X.set_shape([None, lookback, n_features])
+        y.set_shape([None] if horizon == 1 else [None, horizon])
+        return (X, y) if row_ids is None else ((X, ids), y)
+
+    ds = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+    if shuffle:
+        ds = ds.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size).map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+
+    options = tf.data.Options()
+    options.deterministic = not shuffle
+    return ds.with_options(options).prefetch(tf.data.AUTOTUNE)
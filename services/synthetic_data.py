@@ -0,0 +1,438 @@
+"""
+Synthetic Data Generator
+Seeded, vectorized orders, order lines, inventory, weather and events for N stores
+"""
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+# Optional columnar output; CSV works without it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+SYNTHETIC_DIR = "data/synthetic"
+
+# Menu from data/orders_realtime.csv: item -> (price, share of orders)
+MENU = {
+    "Classic Burger": (12.99, 0.24),
+    "Combo Meal": (18.99, 0.21),
+    "French Fries": (4.99, 0.12),
+    "Buffalo Wings": (14.99, 0.12),
+    "Spicy Chicken Sandwich": (13.99, 0.09),
+    "Veggie Power Bowl": (11.99, 0.07),
+    "Grilled Chicken Salad": (12.49, 0.05),
+    "Fish Tacos": (12.99, 0.04),
+    "BBQ Pulled Pork Sandwich": (13.49, 0.03),
+    "Loaded Nachos": (10.99, 0.03),
+}
+QUANTITY_SHARES = {1: 0.31, 2: 0.43, 3: 0.18, 4: 0.06, 5: 0.02}
+
+# channel -> (share, prep minutes range, delivery minutes range)
+CHANNELS = {
+    "in_person": (0.47, (3, 18), (0, 0)),
+    "pickup": (0.18, (3, 16), (0, 0)),
+    "doordash": (0.18, (8, 14), (25, 33)),
+    "ubereats": (0.17, (8, 17), (28, 36)),
+}
+CUSTOMER_TYPES = {"regular": 0.86, "new": 0.14}
+PAYMENT_METHODS = {"card": 0.87, "cash": 0.13}
+
+# Relative demand by hour of day (closed hours are cut by open_hour/close_hour) and weekday (Mon first)
+HOUR_PROFILE = np.array([0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.4, 0.6, 0.7, 0.8, 0.9, 1.3,
+                         1.5, 1.3, 0.9, 0.8, 0.9, 1.4, 1.6, 1.4, 1.0, 0.8, 0.6, 0.4])
+WEEKDAY_PROFILE = np.array([0.90, 0.90, 0.95, 1.00, 1.15, 1.25, 1.05])
+
+# event type -> (traffic lift, expected impact label)
+EVENT_TYPES = {
+    "Sports": (0.25, "High"),
+    "Concert": (0.20, "High"),
+    "Festival": (0.15, "Medium"),
+    "Conference": (0.10, "Medium"),
+    "Holiday": (-0.10, "Low"),
+}
+EVENT_PROBABILITY = 0.12  # Share of days with a nearby event
+
+# Ingredients used per unit sold (names and units from data/inventory.csv)
+RECIPES = {
+    "Classic Burger": {"Beef Patties": 0.33, "Burger Buns": 1, "Cheese Slices": 1, "Lettuce": 0.05, "Tomatoes": 0.1},
+    "Combo Meal": {"Beef Patties": 0.33, "Burger Buns": 1, "Cheese Slices": 1,
+                   "French Fries (Frozen)": 0.4, "Soft Drinks (Coke)": 1},
+    "French Fries": {"French Fries (Frozen)": 0.4, "Cooking Oil": 0.01},
+    "Buffalo Wings": {"Chicken Wings": 0.75, "Buffalo Sauce": 0.02, "Ranch Dressing": 0.01},
+    "Spicy Chicken Sandwich": {"Chicken Breasts": 0.4, "Burger Buns": 1, "Pickles": 0.01, "Mayonnaise": 0.005},
+    "Veggie Power Bowl": {"Vegetable Mix": 0.4, "Rice": 0.3, "Black Beans": 0.2, "Avocados": 0.5},
+    "Grilled Chicken Salad": {"Chicken Breasts": 0.35, "Lettuce": 0.25, "Tomatoes": 0.1, "Ranch Dressing": 0.01},
+    "Fish Tacos": {"Tortillas": 3, "Coleslaw Mix": 0.1, "Salsa": 0.01},
+    "BBQ Pulled Pork Sandwich": {"Pork Shoulder": 0.4, "Burger Buns": 1, "BBQ Sauce": 0.02, "Coleslaw Mix": 0.1},
+    "Loaded Nachos": {"Shredded Cheese": 0.2, "Jalapenos": 0.05, "Sour Cream": 0.01, "Salsa": 0.02, "Guacamole": 0.1},
+}
+PACKAGING = {"Napkins": 2, "Takeout Containers": 1, "Paper Bags": 1}  # Per order not eaten in
+UNITS = {
+    "Beef Patties": "lbs", "Burger Buns": "units", "Cheese Slices": "units", "Lettuce": "heads",
+    "Tomatoes": "lbs", "French Fries (Frozen)": "lbs", "Soft Drinks (Coke)": "cans", "Cooking Oil": "gallons",
+    "Chicken Wings": "lbs", "Buffalo Sauce": "gallons", "Ranch Dressing": "gallons", "Chicken Breasts": "lbs",
+    "Pickles": "jars", "Mayonnaise": "gallons", "Vegetable Mix": "lbs", "Rice": "lbs", "Black Beans": "lbs",
+    "Avocados": "units", "Tortillas": "units", "Coleslaw Mix": "lbs", "Salsa": "gallons", "Pork Shoulder": "lbs",
+    "BBQ Sauce": "gallons", "Shredded Cheese": "lbs", "Jalapenos": "lbs", "Sour Cream": "gallons",
+    "Guacamole": "lbs", "Napkins": "units", "Takeout Containers": "units", "Paper Bags": "units",
+}
+REORDER_DAYS = 3  # Reorder when stock covers fewer days of average use than this
+PAR_DAYS = 7  # Order up to this many days of average use (delivered the next day)
+
+# Independent random stream per purpose, so changing one table never shifts another
+STREAMS = {"store": 0, "weather": 1, "events": 2, "orders": 3}
+
+
+def _shares(table: Dict[str, Any], field: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+    """Keys and normalized probabilities of a {key: share} table (share at `field` of tuple values)."""
+    shares = np.array([v if field is None else v[field] for v in table.values()], dtype=np.float64)
+    return list(table), shares / shares.sum()
+
+
+class _TableWriter:
+    """Appends DataFrame chunks to one CSV or Parquet file."""
+
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+        self._tmp = f"{path}.tmp{os.getpid()}"
+
+    def write(self, frame: pd.DataFrame):
+        if frame.empty:
+            return
+        if self.fmt == "parquet":
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._tmp, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self._tmp, mode='a', header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def finish(self):
+        """Complete the temporary file without publishing it."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self):
+        """Publish the finished file (readers never see a partial one)."""
+        self.finish()
+        if os.path.exists(self._tmp):
+            os.replace(self._tmp, self.path)
+
+    def discard(self):
+        """Drop the unpublished file after a failure; a previously published one is kept."""
+        self.finish()
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+
+class SyntheticDataGenerator:
+    """
+    Months or years of restaurant data for any number of stores.
+
+    Demand per open hour is Poisson around store level x hour-of-day x weekday
+    x annual season x growth x the day's weather and event factors, so the
+    forecasters have real signal to learn. Every table is built with array
+    operations per block of `chunk_days` days; only the inventory simulation
+    loops, over days, vectorized across ingredients.
+
+    Output is deterministic for a given seed and chunk_days: each store, table
+    and day block draws from its own seeded stream.
+    """
+
+    def __init__(self, stores: int = 1, days: int = 365, start: str = "2024-01-01", seed: int = 42,
+                 base_orders: float = 4.0, open_hour: int = 8, close_hour: int = 22, chunk_days: int = 28):
+        """
+        Args:
+            stores: Number of stores
+            days: Days of history per store
+            start: First date
+            seed: Random seed
+            base_orders: Median store's orders per hour at profile 1.0
+            open_hour, close_hour: Opening hours [open_hour, close_hour)
+            chunk_days: Days generated (and held in memory) at a time
+        """
+        self.stores = stores
+        self.days = days
+        self.start = pd.Timestamp(start).normalize()
+        self.seed = seed
+        self.base_orders = base_orders
+        self.hours = np.arange(open_hour, close_hour)
+        self.chunk_days = chunk_days
+
+        self.items, self.item_shares = _shares(MENU, 1)
+        self.prices = np.array([MENU[item][0] for item in self.items])
+        self.channels, self.channel_shares = _shares(CHANNELS, 0)
+        self.ingredients = list(UNITS)
+        self.recipe_matrix = np.zeros((len(self.items), len(self.ingredients)))
+        for i, item in enumerate(self.items):
+            for ingredient, amount in RECIPES[item].items():
+                self.recipe_matrix[i, self.ingredients.index(ingredient)] = amount
+
+    @property
+    def store_ids(self) -> List[str]:
+        return [f"store_{i:04d}" for i in range(self.stores)]
+
+    def _rng(self, store: int, stream: str, chunk: int = 0) -> np.random.Generator:
+        return np.random.default_rng([self.seed, store, STREAMS[stream], chunk])
+
+    def _store_profile(self, store: int) -> Dict[str, float]:
+        rng = self._rng(store, "store")
+        return {
+            "level": self.base_orders * rng.lognormal(0.0, 0.35),
+            "growth": rng.normal(0.05, 0.05),  # Per year
+            "temp_offset": rng.normal(0.0, 6.0),
+        }
+
+    def daily_conditions(self, store: int) -> pd.DataFrame:
+        """One row per day: weather_forecast.csv and events_calendar.csv columns side by side."""
+        profile = self._store_profile(store)
+        dates = pd.date_range(self.start, periods=self.days, freq="D")
+        doy = dates.dayofyear.values
+
+        rng = self._rng(store, "weather")
+        noise = lfilter([1.0], [1.0, -0.7], rng.normal(0, 4.0, self.days))  # Multi-day warm/cold spells
+        temp = np.round(56 + 22 * np.sin(2 * np.pi * (doy - 110) / 365) + profile["temp_offset"] + noise)
+        rain = np.round(rng.beta(0.6, 2.2, self.days) * 10) * 10
+        conditions = np.select(
+            [(rain >= 40) & (temp <= 34), rain >= 60, rain >= 40, rain >= 20],
+            ["Snow", "Rain", "Rain PM", "Cloudy"], default="Sunny"
+        )
+        weather_factor = np.round(np.clip(1.1 - 0.004 * rain + 0.006 * (np.clip(temp, 35, 80) - 60)
+                                          - 0.25 * (conditions == "Snow"), 0.6, 1.3), 2)
+
+        rng = self._rng(store, "events")
+        event_types = list(EVENT_TYPES)
+        has_event = rng.random(self.days) < EVENT_PROBABILITY
+        kind = rng.integers(0, len(event_types), self.days)
+        lift = np.array([EVENT_TYPES[t][0] for t in event_types])[kind]
+        event_type = np.where(has_event, np.array(event_types)[kind], "None")
+        impact = np.where(has_event, np.array([EVENT_TYPES[t][1] for t in event_types])[kind], "None")
+
+        return pd.DataFrame({
+            "date": dates.strftime("%Y-%m-%d"),
+            "day_of_week": dates.day_name(),
+            "temp_f": temp.astype(int),
+            "rain_chance": rain.astype(int),
+            "conditions": conditions,
+            "weather_factor": weather_factor,
+            "event_name": np.where(has_event, np.char.add(event_type.astype(str), " event nearby"), "None"),
+            "event_type": event_type,
+            "expected_impact": impact,
+            "traffic_factor": np.round(np.where(has_event, 1 + lift, 1.0), 2),
+        })
+
+    def _hourly_demand(self, store: int, days: np.ndarray, conditions: pd.DataFrame,
+                       profile: Dict[str, float]) -> np.ndarray:
+        """Expected orders, (days, open hours)."""
+        dates = self.start + pd.to_timedelta(days, unit="D")
+        season = 1 + 0.08 * np.sin(2 * np.pi * (dates.dayofyear.values - 170) / 365)
+        growth = (1 + profile["growth"]) ** (days / 365)
+        daily = (profile["level"] * season * growth * WEEKDAY_PROFILE[dates.dayofweek.values]
+                 * conditions["weather_factor"].values[days] * conditions["traffic_factor"].values[days])
+        return daily[:, np.newaxis] * HOUR_PROFILE[self.hours][np.newaxis, :]
+
+    def iter_chunks(self, store: int, conditions: Optional[pd.DataFrame] = None
+                    ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]]:
+        """
+        Yield (hourly orders, order lines, daily ingredient usage) per block of days.
+
+        Order lines follow the data/orders_realtime.csv layout (one item per
+        order); hourly orders follow data/orders.csv plus that day's weather
+        and traffic factors.
+        """
+        conditions = self.daily_conditions(store) if conditions is None else conditions
+        profile = self._store_profile(store)
+        n_hours = len(self.hours)
+        next_order = 1
+
+        for chunk, first in enumerate(range(0, self.days, self.chunk_days)):
+            rng = self._rng(store, "orders", chunk)
+            days = np.arange(first, min(first + self.chunk_days, self.days))
+            counts = rng.poisson(self._hourly_demand(store, days, conditions, profile))
+
+            slot_minutes = (days[:, np.newaxis] * 1440 + self.hours[np.newaxis, :] * 60).ravel()
+            hourly = pd.DataFrame({
+                "timestamp": self.start + pd.to_timedelta(slot_minutes, unit="m"),
+                "orders": counts.ravel(),
+                "weather": np.repeat(conditions["weather_factor"].values[days], n_hours),
+                "traffic": np.repeat(conditions["traffic_factor"].values[days], n_hours),
+            })
+
+            # One row per order: slot of each order, then a minute within the hour
+            n = int(counts.sum())
+            minutes = np.repeat(slot_minutes, counts.ravel()) + rng.integers(0, 60, n)
+            minutes.sort(kind="stable")
+            items = rng.choice(len(self.items), n, p=self.item_shares)
+            quantity = rng.choice(list(QUANTITY_SHARES), n, p=list(QUANTITY_SHARES.values()))
+            channel = rng.choice(len(self.channels), n, p=self.channel_shares)
+            prep_lo, prep_hi, deliv_lo, deliv_hi = (
+                np.array([CHANNELS[c][k][j] for c in self.channels])[channel]
+                for k, j in ((1, 0), (1, 1), (2, 0), (2, 1))
+            )
+            price = self.prices[items]
+            order_ids = pd.Series(np.arange(next_order, next_order + n)).astype(str).str.zfill(9)
+            next_order += n
+
+            lines = pd.DataFrame({
+                "timestamp": self.start + pd.to_timedelta(minutes, unit="m"),
+                "order_id": f"ORD{store:04d}-" + order_ids,
+                "item": np.array(self.items, dtype=object)[items],
+                "quantity": quantity,
+                "price": price,
+                "channel": np.array(self.channels, dtype=object)[channel],
+                "customer_type": rng.choice(list(CUSTOMER_TYPES), n, p=list(CUSTOMER_TYPES.values())),
+                "payment_method": rng.choice(list(PAYMENT_METHODS), n, p=list(PAYMENT_METHODS.values())),
+                "prep_time_min": rng.integers(prep_lo, prep_hi + 1) + (quantity > 2),
+                "delivery_time_min": rng.integers(deliv_lo, deliv_hi + 1),
+                "total_amount": np.round(quantity * price, 2),
+            })
+
+            # Ingredient use per day: units sold per (day, item) through the recipes, plus packaging
+            day_of_order = minutes // 1440 - first
+            sold = np.bincount(day_of_order * len(self.items) + items, weights=quantity,
+                               minlength=len(days) * len(self.items)).reshape(len(days), -1)
+            usage = sold @ self.recipe_matrix
+            takeout = np.bincount(day_of_order, weights=channel != self.channels.index("in_person"),
+                                  minlength=len(days))
+            for name, per_order in PACKAGING.items():
+                usage[:, self.ingredients.index(name)] += takeout * per_order
+
+            yield hourly, lines, usage
+
+    def inventory_movements(self, store: int, usage: np.ndarray) -> pd.DataFrame:
+        """
+        Daily stock movements per ingredient under a reorder-point policy.
+
+        Stock starts at par; when closing stock drops below REORDER_DAYS of
+        average use, an order up to PAR_DAYS of use arrives the next morning.
+        """
+        average = usage.mean(axis=0)
+        reorder_point = np.ceil(average * REORDER_DAYS)
+        par = np.ceil(average * PAR_DAYS)
+        n_days, n_ing = usage.shape
+
+        opening = np.empty((n_days, n_ing))
+        received = np.zeros((n_days, n_ing))
+        used = np.empty((n_days, n_ing))
+        ordered = np.zeros((n_days, n_ing))
+        stock, arriving = par.copy(), np.zeros(n_ing)
+        for d in range(n_days):
+            received[d] = arriving
+            opening[d] = stock + arriving
+            used[d] = np.minimum(usage[d], opening[d])
+            stock = opening[d] - used[d]
+            ordered[d] = np.where(stock < reorder_point, par - stock, 0.0)
+            arriving = ordered[d]
+
+        dates = pd.date_range(self.start, periods=n_days, freq="D").strftime("%Y-%m-%d")
+        return pd.DataFrame({
+            "store_id": self.store_ids[store],
+            "date": np.repeat(dates, n_ing),
+            "item_name": np.tile(self.ingredients, n_days),
+            "unit": np.tile([UNITS[i] for i in self.ingredients], n_days),
+            "opening_stock": np.round(opening.ravel(), 2),
+            "received": np.round(received.ravel(), 2),
+            "used": np.round(used.ravel(), 2),
+            "closing_stock": np.round((opening - used).ravel(), 2),
+            "ordered": np.round(ordered.ravel(), 2),
+            "stockout": (usage > opening).ravel(),
+        })
+
+    def hourly_orders(self, store: int = 0) -> pd.DataFrame:
+        """A store's whole hourly history (timestamp, orders, weather, traffic) in memory."""
+        return pd.concat([hourly for hourly, _, _ in self.iter_chunks(store)], ignore_index=True)
+
+    def order_lines(self, store: int = 0) -> pd.DataFrame:
+        """A store's whole order-line history in memory (orders_realtime.csv layout)."""
+        return pd.concat([lines for _, lines, _ in self.iter_chunks(store)], ignore_index=True)
+
+    def write(self, output_dir: str = SYNTHETIC_DIR, fmt: str = "csv") -> Dict[str, Any]:
+        """
+        Stream every table to disk, one store and one block of days at a time.
+
+        Layout:
+            stores/{store_id}.{fmt}  order lines per store (GlobalLSTMForecaster input)
+            orders_hourly, weather, events, inventory_movements  all stores, with store_id
+            manifest.json  generator settings and row counts
+
+        Files are published only once every table is complete; a failure
+        removes the partial files and leaves any earlier output untouched.
+
+        Returns:
+            {'success', 'rows': {table: rows}, 'files', 'seconds'}
+        """
+        if fmt not in ("csv", "parquet"):
+            return {'success': False, 'error': f"Unknown format: {fmt} (csv or parquet)"}
+        if fmt == "parquet" and not HAS_PYARROW:
+            return {'success': False, 'error': 'pyarrow is required for Parquet output'}
+
+        started = time.perf_counter()
+        stores_dir = os.path.join(output_dir, "stores")
+        os.makedirs(stores_dir, exist_ok=True)
+        tables = {name: _TableWriter(os.path.join(output_dir, f"{name}.{fmt}"), fmt)
+                  for name in ("orders_hourly", "weather", "events", "inventory_movements")}
+        rows = {"order_lines": 0}
+        weather_cols = ["store_id", "date", "day_of_week", "temp_f", "rain_chance", "conditions", "weather_factor"]
+        event_cols = ["store_id", "date", "day_of_week", "event_name", "event_type", "expected_impact",
+                      "traffic_factor"]
+
+        writers = list(tables.values())
+        try:
+            for store, store_id in enumerate(self.store_ids):
+                conditions = self.daily_conditions(store)
+                tables["weather"].write(conditions.assign(store_id=store_id)[weather_cols])
+                tables["events"].write(conditions.assign(store_id=store_id)[event_cols])
+
+                store_lines = _TableWriter(os.path.join(stores_dir, f"{store_id}.{fmt}"), fmt)
+                writers.append(store_lines)
+                usage = []
+                for hourly, lines, day_usage in self.iter_chunks(store, conditions):
+                    tables["orders_hourly"].write(hourly.assign(store_id=store_id)[["store_id"] + list(hourly.columns)])
+                    store_lines.write(lines)
+                    usage.append(day_usage)
+                store_lines.finish()
+                rows["order_lines"] += store_lines.rows
+
+                tables["inventory_movements"].write(self.inventory_movements(store, np.vstack(usage)))
+                print(f"[SYNTHETIC] {store_id}: {store_lines.rows} order lines over {self.days} days")
+        except BaseException:
+            for writer in writers:
+                writer.discard()
+            raise
+        for writer in writers:
+            writer.close()
+
+        rows.update({name: writer.rows for name, writer in tables.items()})
+        manifest = {
+            "seed": self.seed, "stores": self.stores, "days": self.days,
+            "start": self.start.strftime("%Y-%m-%d"), "base_orders": self.base_orders,
+            "hours": [int(self.hours[0]), int(self.hours[-1]) + 1], "chunk_days": self.chunk_days,
+            "format": fmt, "rows": rows,
+        }
+        manifest_path = os.path.join(output_dir, "manifest.json")
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return {
+            'success': True,
+            'rows': rows,
+            'files': [w.path for w in tables.values()] + [stores_dir, manifest_path],
+            'seconds': round(time.perf_counter() - started, 2)
+        }
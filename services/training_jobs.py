@@ -0,0 +1,461 @@
+"""
+Training Jobs
+Model training in background processes with per-epoch progress, cancellation and a time budget
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TRAINING_JOBS_DIR = "models/training_jobs"  # {job_id}/status.json, log.txt and cancel flag; locks/{model}
+DEFAULT_BUDGET_SECONDS = 1800.0  # Wall-clock limit per job
+STOP_GRACE_SECONDS = 30.0  # After a cancel or the budget, time allowed to stop cleanly before termination
+PROGRESS_INTERVAL = 0.5  # Seconds between in-epoch progress writes and cancel checks
+MAX_KEPT_JOBS = 50
+
+FINISHED = ("succeeded", "failed", "cancelled", "timed_out")
+
+
+class JobConflict(Exception):
+    """A training job for the same model is already running."""
+
+
+class TrainingCancelled(Exception):
+    """Raised inside training when the job's cancel flag is set."""
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ---- Worker side ----
+
+class TrainingJob:
+    """A job as seen from its training process: progress, log lines and stop checks."""
+
+    def __init__(self, job_dir: str, status: Dict[str, Any]):
+        self.dir = job_dir
+        self.status = status
+        self.started = time.monotonic()
+        self.budget = float(status["budget_seconds"])
+        self.budget_exhausted = False
+
+    def log(self, message: str):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def update(self, **fields):
+        """Merge fields into status.json (progress fields go under 'progress')."""
+        self.status["progress"].update(fields, elapsed_seconds=round(time.monotonic() - self.started, 1))
+        _write_json_atomic(os.path.join(self.dir, "status.json"), self.status)
+
+    def cancel_requested(self) -> bool:
+        return os.path.exists(os.path.join(self.dir, "cancel"))
+
+    def over_budget(self) -> bool:
+        return time.monotonic() - self.started > self.budget
+
+    def check(self, budget: bool = True):
+        """Raise TrainingCancelled when cancelled (or out of time, with budget=True); call between phases."""
+        if self.cancel_requested():
+            raise TrainingCancelled("Cancelled by request")
+        if budget and self.over_budget():
+            raise TrainingCancelled(f"Time budget of {self.budget:.0f}s used up before training finished")
+
+    def keras_callback(self, epochs: int):
+        """Keras callback reporting each epoch, stopping on cancel and at the time budget."""
+        from tensorflow.keras.callbacks import Callback
+
+        job = self
+
+        class JobProgress(Callback):
+            def on_train_begin(self, logs=None):
+                self.last_check = time.monotonic()
+                job.update(phase="training", epoch=0, epochs=epochs)
+
+            def on_train_batch_end(self, batch, logs=None):
+                now = time.monotonic()
+                if now - self.last_check < PROGRESS_INTERVAL:
+                    return
+                self.last_check = now
+                if job.cancel_requested():
+                    raise TrainingCancelled("Cancelled by request")
+                if job.over_budget() and not job.budget_exhausted:
+                    # Stop after this batch; the weights so far are still evaluated and saved
+                    job.budget_exhausted = True
+                    self.model.stop_training = True
+                    job.log(f"Time budget of {job.budget:.0f}s reached, stopping training")
+                job.update(batch=batch + 1)
+
+            def on_epoch_end(self, epoch, logs=None):
+                metrics = {k: round(float(v), 6) for k, v in (logs or {}).items()}
+                job.update(epoch=epoch + 1, batch=None, **metrics)
+                job.log(f"Epoch {epoch + 1}/{epochs} " + " ".join(f"{k}={v:.4f}" for k, v in metrics.items()))
+
+        return JobProgress()
+
+
+def _train_lstm(job: TrainingJob, params: Dict[str, Any], mode: str) -> Dict[str, Any]:
+    """LSTMForecaster.train in `mode`, registered and promoted as a new "lstm" version."""
+    from services.lstm_forecaster import get_lstm_forecaster, register_lstm_version
+
+    forecaster = get_lstm_forecaster()
+    job.update(phase="loading data")
+    data = forecaster.prepare_data_from_csv(params.get("orders_csv", "data/orders_realtime.csv"))
+    job.log(f"Loaded {len(data)} hourly rows")
+    job.check()
+
+    epochs = int(params.get("epochs", forecaster.hparams.get("epochs", 40)))
+    result = forecaster.train(data, epochs=epochs, batch_size=int(params.get("batch_size", 32)),
+                              mode=mode, callbacks=[job.keras_callback(epochs)])
+    job.check(budget=False)  # A model stopped at the budget is still kept
+    if not result["success"]:
+        raise RuntimeError(result.get("error"))
+
+    job.update(phase="registering")
+    result["registry_version"] = register_lstm_version(forecaster, result, data)
+    return result
+
+
+def _train_global(job: TrainingJob, params: Dict[str, Any]) -> Dict[str, Any]:
+    """GlobalLSTMForecaster.train over every store in the stores directory."""
+    from services.global_forecaster import STORES_DIR, get_global_forecaster, load_store_frames
+
+    job.update(phase="loading data")
+    epochs = int(params.get("epochs", 40))
+    result = get_global_forecaster().train(
+        load_store_frames(params.get("stores_dir", STORES_DIR)), epochs=epochs,
+        batch_size=int(params.get("batch_size", 256)), callbacks=[job.keras_callback(epochs)]
+    )
+    job.check(budget=False)
+    if not result["success"]:
+        raise RuntimeError(result.get("error"))
+    return result
+
+
+# kind -> (model it trains, trainer(job, params)); one running job per model
+TRAINERS: Dict[str, Tuple[str, Callable[[TrainingJob, Dict[str, Any]], Dict[str, Any]]]] = {
+    "lstm": ("lstm", lambda job, params: _train_lstm(job, params, "iterative")),
+    "lstm_direct": ("lstm", lambda job, params: _train_lstm(job, params, "direct")),
+    "global": ("global", _train_global),
+}
+
+
+def _run_job(job_dir: str, workdir: Optional[str]):
+    """Training process entry point: run the job and record how it ended."""
+    if workdir:
+        os.chdir(workdir)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Stopped through the cancel flag, not Ctrl+C in a terminal
+    log_file = open(os.path.join(job_dir, "log.txt"), 'a', buffering=1)
+    sys.stdout = sys.stderr = log_file  # Trainer prints ([LSTM] ...) land in the job log
+
+    with open(os.path.join(job_dir, "status.json"), 'r') as f:
+        status = json.load(f)
+    job = TrainingJob(job_dir, status)
+    status.update(status="running", pid=os.getpid(), started_at=datetime.now().isoformat())
+    job.update(phase="starting")
+    job.log(f"Started {status['kind']} training (pid {os.getpid()}, budget {job.budget:.0f}s)")
+
+    try:
+        result = TRAINERS[status["kind"]][1](job, status["params"])
+        status.update(status="succeeded", result=result, budget_exhausted=job.budget_exhausted)
+        job.log("Training succeeded" + (" (stopped at the time budget)" if job.budget_exhausted else ""))
+    except TrainingCancelled as e:
+        status.update(status="cancelled" if job.cancel_requested() else "timed_out", error=str(e))
+        job.log(str(e))
+    except Exception as e:
+        # A cancel raised inside Keras reaches train() and comes back as a failed result
+        if job.cancel_requested():
+            status.update(status="cancelled", error="Cancelled by request")
+        else:
+            status.update(status="failed", error=f"{type(e).__name__}: {e}")
+            traceback.print_exc()
+        job.log(status["error"])
+    status["finished_at"] = datetime.now().isoformat()
+    job.update(phase="finished")
+    log_file.flush()
+
+
+# ---- Runner side ----
+
+class TrainingJobRunner:
+    """
+    Starts training jobs in spawned processes and reports on them.
+
+    Everything about a job lives in its directory, so any process (backend,
+    Streamlit app, CLI) can start, watch or cancel jobs: status.json is
+    rewritten atomically by the training process with per-epoch progress,
+    log.txt collects its output, and a 'cancel' file asks it to stop. A lock
+    file per model (created with O_EXCL, cleared when its owner is gone) keeps
+    to one running job per model across processes.
+
+    A job lives as long as the process that started it (the backend, the
+    app or the CLI); if that process exits first the job is reported as
+    interrupted.
+    """
+
+    def __init__(self, root: str = TRAINING_JOBS_DIR, workdir: Optional[str] = None):
+        """
+        Args:
+            workdir: Project root the training processes run in, and that
+                     `root` is relative to, when the caller's working directory is elsewhere
+        """
+        self.workdir = workdir
+        self.root = os.path.join(workdir, root) if workdir else root
+        self.lock_dir = os.path.join(self.root, "locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._processes: Dict[str, Any] = {}
+        self.recover()
+
+    def _dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def _read(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self._dir(job_id), "status.json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _acquire(self, model: str, job_id: str):
+        """Take the model's lock, clearing it first if its job is no longer running."""
+        path = os.path.join(self.lock_dir, model)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(path, 'r') as f:
+                        holder = f.read().strip()
+                except OSError:
+                    continue
+                status = self._reconcile(self._read(holder)) if holder else None
+                if status and status["status"] not in FINISHED:
+                    raise JobConflict(f"Training job {holder} for model {model} is already {status['status']}")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            with os.fdopen(fd, 'w') as f:
+                f.write(job_id)
+            return
+        raise JobConflict(f"Could not take the training lock for model {model}")
+
+    def _release(self, model: str, job_id: str):
+        path = os.path.join(self.lock_dir, model)
+        try:
+            with open(path, 'r') as f:
+                if f.read().strip() == job_id:
+                    os.remove(path)
+        except OSError:
+            pass
+
+    def start(self, kind: str = "lstm", params: Optional[Dict[str, Any]] = None,
+              budget_seconds: float = DEFAULT_BUDGET_SECONDS) -> Dict[str, Any]:
+        """
+        Start a training job in a new process.
+
+        Args:
+            kind: A key of TRAINERS ("lstm", "lstm_direct" or "global")
+            params: Trainer options (epochs, batch_size, orders_csv / stores_dir)
+            budget_seconds: Wall-clock limit; training stops gracefully when it is reached
+
+        Returns:
+            The job's status dict
+
+        Raises:
+            ValueError: unknown kind
+            JobConflict: a job for the same model is still running
+        """
+        if kind not in TRAINERS:
+            raise ValueError(f"Unknown training job: {kind} (available: {', '.join(TRAINERS)})")
+        model = TRAINERS[kind][0]
+        job_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        job_dir = self._dir(job_id)
+
+        with self._lock:
+            self._acquire(model, job_id)
+            try:
+                os.makedirs(job_dir)
+                status = {
+                    "job_id": job_id,
+                    "kind": kind,
+                    "model": model,
+                    "params": params or {},
+                    "status": "queued",
+                    "budget_seconds": budget_seconds,
+                    "created_at": datetime.now().isoformat(),
+                    "started_at": None,
+                    "finished_at": None,
+                    "pid": None,
+                    "progress": {"phase": "queued"},
+                    "result": None,
+                    "error": None,
+                }
+                _write_json_atomic(os.path.join(job_dir, "status.json"), status)
+                process = multiprocessing.get_context("spawn").Process(
+                    target=_run_job, args=(job_dir, self.workdir), name=f"training-{job_id}", daemon=True
+                )
+                process.start()
+            except Exception:
+                self._release(model, job_id)
+                raise
+            self._processes[job_id] = process
+
+        threading.Thread(target=self._monitor, args=(job_id, model, process, budget_seconds),
+                         name=f"training-monitor-{job_id}", daemon=True).start()
+        print(f"[TRAINING] Started {kind} job {job_id} (pid {process.pid})")
+        self._prune()
+        return status
+
+    def _monitor(self, job_id: str, model: str, process, budget_seconds: float):
+        """Enforce cancel and budget deadlines, then record how the process ended."""
+        deadline = time.monotonic() + budget_seconds + STOP_GRACE_SECONDS
+        cancel_path = os.path.join(self._dir(job_id), "cancel")
+        terminated = None
+        while process.is_alive():
+            process.join(1.0)
+            if not process.is_alive():
+                break
+            if os.path.exists(cancel_path) and time.time() - os.path.getmtime(cancel_path) > STOP_GRACE_SECONDS:
+                terminated = ("cancelled", "Cancelled by request (training process terminated)")
+            elif time.monotonic() > deadline:
+                terminated = ("timed_out", f"Exceeded the {budget_seconds:.0f}s time budget (training process terminated)")
+            if terminated:
+                process.terminate()
+                process.join(10)
+
+        status = self._read(job_id)
+        if status and status["status"] not in FINISHED:
+            if terminated is None and os.path.exists(cancel_path):
+                terminated = ("cancelled", "Cancelled by request")
+            state, error = terminated or ("failed", f"Training process exited with code {process.exitcode}")
+            status.update(status=state, error=error, finished_at=datetime.now().isoformat())
+            _write_json_atomic(os.path.join(self._dir(job_id), "status.json"), status)
+        with self._lock:
+            self._processes.pop(job_id, None)
+        self._release(model, job_id)
+        print(f"[TRAINING] Job {job_id} {status['status'] if status else 'ended'}")
+
+    def _reconcile(self, status: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Mark a job failed when it claims to run but no process is behind it."""
+        if not status or status["status"] in FINISHED or status["job_id"] in self._processes:
+            return status
+        if status["status"] == "running" and _pid_alive(status.get("pid")):
+            return status
+        if status["status"] == "queued" and time.time() - os.path.getmtime(
+                os.path.join(self._dir(status["job_id"]), "status.json")) < 60:
+            return status  # Just created; its process may still be starting
+        status.update(status="failed", error="Interrupted: the training process is gone",
+                      finished_at=datetime.now().isoformat())
+        _write_json_atomic(os.path.join(self._dir(status["job_id"]), "status.json"), status)
+        return status
+
+    def recover(self) -> int:
+        """Fail jobs whose training process died with the process that started them."""
+        recovered = 0
+        for job_id in self._job_ids():
+            status = self._read(job_id)
+            if status and status["status"] not in FINISHED and self._reconcile(status)["status"] == "failed":
+                self._release(status["model"], job_id)
+                recovered += 1
+        return recovered
+
+    def _job_ids(self) -> List[str]:
+        try:
+            return sorted((d for d in os.listdir(self.root) if d != "locks"), reverse=True)
+        except OSError:
+            return []
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, progress and result of a job, or None."""
+        status = self._reconcile(self._read(job_id))
+        if status:
+            status["cancel_requested"] = os.path.exists(os.path.join(self._dir(job_id), "cancel"))
+        return status
+
+    def list(self, model: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally for one model."""
+        jobs = []
+        for job_id in self._job_ids():
+            status = self.get(job_id)
+            if status and (model is None or status["model"] == model):
+                jobs.append(status)
+                if len(jobs) >= limit:
+                    break
+        return jobs
+
+    def log(self, job_id: str, offset: int = 0) -> Dict[str, Any]:
+        """Log text from byte `offset` on; pass the returned offset to read only new lines."""
+        path = os.path.join(self._dir(job_id), "log.txt")
+        try:
+            with open(path, 'r', errors='replace') as f:
+                f.seek(offset)
+                text = f.read()
+                return {"text": text, "offset": f.tell()}
+        except OSError:
+            return {"text": "", "offset": offset}
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a running job to stop; False when it does not exist or already finished."""
+        status = self.get(job_id)
+        if not status or status["status"] in FINISHED:
+            return False
+        with open(os.path.join(self._dir(job_id), "cancel"), 'w') as f:
+            f.write(datetime.now().isoformat())
+        print(f"[TRAINING] Cancel requested for job {job_id}")
+        return True
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 1.0) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes (or the timeout passes); returns its status."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.get(job_id)
+            if not status or status["status"] in FINISHED:
+                return status
+            if deadline is not None and time.monotonic() > deadline:
+                return status
+            time.sleep(poll)
+
+    def _prune(self):
+        """Keep the newest MAX_KEPT_JOBS finished jobs."""
+        for job_id in self._job_ids()[MAX_KEPT_JOBS:]:
+            status = self._read(job_id)
+            if status is None or status["status"] in FINISHED:
+                shutil.rmtree(self._dir(job_id), ignore_errors=True)
+
+
+# Singleton instance
+_training_runner = None
+
+
+def get_training_runner() -> TrainingJobRunner:
+    """Get or create training job runner singleton."""
+    global _training_runner
+    if _training_runner is None:
+        _training_runner = TrainingJobRunner()
+    return _training_runner
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Tests import services/ and agents/ from the project root, like the scripts do
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="session")
+def main(tmp_path_factory):
+    """backend.main with its job queue and tenant spills in scratch directories."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("JOB_QUEUE_DB", str(tmp_path_factory.mktemp("jobs") / "jobs.sqlite3"))
+        mp.setenv("TENANT_SPILL_DIR", str(tmp_path_factory.mktemp("tenants")))
+        import backend.main as main
+        yield main
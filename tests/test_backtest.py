@@ -0,0 +1,95 @@
+"""
+Backtest folds must never touch production models or artifacts.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.backtest import run_backtest
+from services.model_registry import ModelRegistry
+
+HAS_TENSORFLOW = True
+try:
+    import tensorflow  # noqa: F401
+except ImportError:
+    HAS_TENSORFLOW = False
+
+
+def _write_orders(path: str, hours: int = 24 * 10):
+    """Hourly orders.csv layout with a daily cycle."""
+    index = pd.date_range("2025-01-01", periods=hours, freq="h")
+    rng = np.random.default_rng(0)
+    orders = 20 + 10 * np.sin(2 * np.pi * index.hour / 24) + rng.poisson(3, hours)
+    pd.DataFrame({"timestamp": index, "orders": orders.round()}).to_csv(path, index=False)
+
+
+def _snapshot(*roots: str) -> dict:
+    """{path: sha256} of every file under the given directories."""
+    files = {}
+    for root in roots:
+        for dirpath, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                with open(path, 'rb') as f:
+                    files[path] = hashlib.sha256(f.read()).hexdigest()
+    return files
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A scratch project root with a promoted production model and its artifacts."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    os.makedirs("artifacts")
+    _write_orders("data/orders.csv")
+
+    production = {
+        "xgboost": {"model": "artifacts/xgboost_model.json"},
+        "agent_lstm": {"model": "artifacts/lstm_sales_model.h5", "scaler": "artifacts/lstm_sales_scaler.pkl"},
+    }
+    registry = ModelRegistry()
+    for name, files in production.items():
+        for path in files.values():
+            with open(path, 'w') as f:
+                f.write(f"production {name}")
+        registry.register(name, files)
+    return tmp_path
+
+
+def _models():
+    return ["xgboost"] + (["agent_lstm"] if HAS_TENSORFLOW else [])
+
+
+def test_backtest_leaves_production_registry_and_artifacts_unchanged(project):
+    registry = ModelRegistry()
+    before = _snapshot("models/registry", "artifacts")
+
+    result = run_backtest("data/orders.csv", _models(), horizon=24, folds=1, workers=1, runs=1,
+                          model_params={"agent_lstm": {"epochs": 1}}, output_dir=str(project / "out"))
+
+    assert result["success"]
+    assert result["folds"]["success"].all(), result["folds"].get("error")
+    for name in _models():
+        assert registry.versions(name) == [1]
+        assert registry.current_version(name) == 1
+    assert _snapshot("models/registry", "artifacts") == before
+
+
+@pytest.mark.parametrize("name", _models())
+def test_fold_model_writes_only_inside_its_workdir(project, tmp_path_factory, name):
+    from services.forecast_models import create_model, load_hourly_series
+
+    workdir = str(tmp_path_factory.mktemp(f"{name}_fold"))
+    history = load_hourly_series("data/orders.csv")
+    before = _snapshot(".")
+
+    model = create_model(name, workdir=workdir, epochs=1)
+    model.fit(history)
+
+    written = {getattr(model.agent, attr) for attr in dir(type(model.agent)) if attr.endswith("_FILE")}
+    assert written and all(os.path.dirname(path) == workdir for path in written)
+    assert any(os.path.exists(path) for path in written)
+    assert _snapshot(".") == before
@@ -0,0 +1,27 @@
+"""
+Training frames hold exactly the hours the manifest records.
+"""
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from services.feature_store import FeatureStore
+
+
+def _orders(hours, seed=0):
+    timestamps = pd.date_range("2026-01-01", periods=hours, freq="h")
+    return pd.DataFrame({"timestamp": timestamps, "orders": np.random.default_rng(seed).integers(0, 20, hours)})
+
+
+def test_stray_part_is_not_read(tmp_path):
+    store = FeatureStore(root=str(tmp_path))
+    store.update(_orders(48))
+    part = store._load_manifest()["parts"][0]
+    # A part the manifest does not list, e.g. from an interrupted update
+    shutil.copy(f"{store.version_dir}/{part}", f"{store.version_dir}/part-2099010100-2099010123.parquet")
+
+    frame = store.training_frame(_orders(72))
+
+    assert len(frame) == 72
+    assert frame["timestamp"].is_unique
@@ -0,0 +1,71 @@
+"""
+A caller that gives up on a forecast never breaks the server for everyone else.
+"""
+import asyncio
+import queue
+import threading
+
+import pytest
+
+from services.forecast_server import ForecastServer
+
+
+class _Worker:
+    """Stands in for the worker process: alive, answering nothing by itself."""
+
+    pid = 0
+
+    def is_alive(self):
+        return True
+
+
+@pytest.fixture
+def server():
+    """A ForecastServer whose worker is an in-process queue pair."""
+    server = ForecastServer()
+    server._process = _Worker()
+    server._requests, server._results = queue.Queue(), queue.Queue()
+    server._ready = threading.Event()
+    server._ready.set()
+    server._collector = threading.Thread(target=server._collect,
+                                         args=(server._process, server._results, server._ready), daemon=True)
+    server._collector.start()
+    yield server
+    server._process = None  # Nothing to shut down
+
+
+def _answer(server, request_id, forecast):
+    server._results.put((request_id, forecast, None, 1, 1))
+
+
+def test_answer_for_cancelled_future_is_dropped(server):
+    cancelled = server.submit()
+    cancelled.cancel()
+    live = server.submit()
+
+    _answer(server, cancelled.request_id, {"forecast": "late"})
+    _answer(server, live.request_id, {"forecast": "ok"})
+
+    assert live.result(timeout=5) == {"forecast": "ok"}
+    assert server._collector.is_alive()
+
+
+def test_cancelled_forecast_leaves_nothing_pending(server):
+    async def cancel_one():
+        task = asyncio.create_task(server.forecast(timeout=5))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_one())
+    assert server._pending == {}
+    assert server.stats["timeouts"] == 0
+
+    # The request is still in the worker's queue; its answer must not hurt anyone
+    request_id = server._requests.get_nowait()[0]
+    _answer(server, request_id, {"forecast": "late"})
+    live = server.submit()
+    _answer(server, live.request_id, {"forecast": "ok"})
+    assert live.result(timeout=5) == {"forecast": "ok"}
+    assert server._collector.is_alive()
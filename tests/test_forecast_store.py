@@ -0,0 +1,36 @@
+"""
+A forecast store hit never loads the model.
+"""
+import pytest
+
+import services.lstm_forecaster as lstm_forecaster
+from services.forecast_store import ForecastStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "orders.csv").write_text("timestamp,total\n")
+
+    def no_model():
+        raise AssertionError("the model was loaded for a cache hit")
+
+    monkeypatch.setattr(lstm_forecaster, "get_lstm_forecaster", no_model)
+    return ForecastStore(cache_dir=str(tmp_path / "forecasts"))
+
+
+def test_hit_is_served_without_the_model(store):
+    fingerprint = store.fingerprint("data/orders.csv", 24)
+    store.save(fingerprint, {"future_predictions": [1.0, 2.0]})
+
+    forecast = store.get("data/orders.csv", 24)
+    assert forecast["cached"] is True
+    assert forecast["future_predictions"] == [1.0, 2.0]
+
+
+def test_changed_input_misses(store, tmp_path):
+    store.save(store.fingerprint("data/orders.csv", 24), {"future_predictions": [1.0]})
+    (tmp_path / "data" / "orders.csv").write_text("timestamp,total\n2026-01-01 00:00,5\n")
+
+    assert store.lookup("data/orders.csv", 24) is None
@@ -0,0 +1,32 @@
+"""
+The global forecaster trains its unknown-store embedding and cleans up its row files.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.global_forecaster import UNKNOWN_STORE, GlobalLSTMForecaster
+from services.lstm_forecaster import LSTMForecaster
+from services.sequence_pipeline import SEQUENCE_CACHE_DIR
+
+
+def _store_frames(n_stores=3, hours=120, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(n_stores):
+        values = rng.random((hours, len(LSTMForecaster.FEATURE_COLUMNS))) * (i + 1)
+        yield f"store_{i}", pd.DataFrame(values, columns=LSTMForecaster.FEATURE_COLUMNS)
+
+
+def test_training_updates_unknown_store_and_leaves_no_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    forecaster = GlobalLSTMForecaster(lookback=12, horizon=6)
+    forecaster.model = forecaster._build_model()
+    embedding = next(layer for layer in forecaster.model.layers if type(layer).__name__ == "Embedding")
+    before = embedding.get_weights()[0][UNKNOWN_STORE].copy()
+
+    result = forecaster.train(_store_frames(), epochs=2, batch_size=32)
+
+    assert result["success"], result.get("error")
+    assert not np.allclose(embedding.get_weights()[0][UNKNOWN_STORE], before)
+    assert os.listdir(SEQUENCE_CACHE_DIR) == []
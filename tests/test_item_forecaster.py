@@ -0,0 +1,34 @@
+"""
+Item forecasts reject store totals that do not cover the horizon.
+"""
+import numpy as np
+import pandas as pd
+
+from services.item_forecaster import ItemForecaster
+
+
+def _orders_csv(tmp_path):
+    hours = pd.date_range("2026-01-01", periods=72, freq="h")
+    orders = pd.DataFrame({
+        "timestamp": np.repeat(hours, 2),
+        "item": ["Latte", "Bagel"] * len(hours),
+        "quantity": np.tile([3, 1], len(hours)),
+    })
+    path = tmp_path / "orders.csv"
+    orders.to_csv(path, index=False)
+    return str(path)
+
+
+def test_short_store_totals_are_rejected(tmp_path):
+    result = ItemForecaster(_orders_csv(tmp_path)).forecast(24, store_totals=np.ones(10))
+
+    assert result["success"] is False
+    assert "10 hours" in result["error"]
+
+
+def test_store_totals_are_matched_hour_by_hour(tmp_path):
+    result = ItemForecaster(_orders_csv(tmp_path)).forecast(24, store_totals=np.full(24, 8.0),
+                                                            method="proportional")
+
+    assert result["success"]
+    assert result["hour_totals"] == [8.0] * 24
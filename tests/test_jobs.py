@@ -0,0 +1,95 @@
+"""
+Retried background jobs apply their tenant changes exactly once.
+"""
+import asyncio
+
+import pytest
+
+CRISIS = {
+    "type": "Staff Resignation",
+    "severity": "HIGH",
+    "automations": ["emergency_hiring", "manager_notification"],
+    "store_actions": ["post_job", "promotion"],
+    "compliance_impact": -5,
+    "email_content": "Our chef has resigned",
+    "email_sender": "chef@example.com",
+    "email_subject": "Resignation",
+}
+
+
+def _state(tenant) -> dict:
+    return {
+        "job_postings": len(tenant.store["job_postings"]),
+        "flash_sale": dict(tenant.store["flash_sale"]),
+        "automation_log": len(tenant.automation_log),
+        "compliance_score": tenant.compliance["score"],
+        "incidents": len(tenant.compliance["incidents"]),
+        "activity_feed": len(tenant.activity_feed),
+    }
+
+
+def test_failed_crisis_job_leaves_no_partial_writes_and_retries_once(main, monkeypatch):
+    tenant = main.TENANTS.get("crisis_retry")
+    payload = {"tenant_id": tenant.tenant_id, "crisis": CRISIS}
+    before = _state(tenant)
+
+    add_incident = main.add_compliance_incident
+
+    def fail_once(*args, **kwargs):
+        monkeypatch.setattr(main, "add_compliance_incident", add_incident)
+        raise RuntimeError("incident store unavailable")
+
+    monkeypatch.setattr(main, "add_compliance_incident", fail_once)
+    with pytest.raises(RuntimeError):
+        asyncio.run(main.run_crisis_automations_job(payload, "job-1"))
+    assert _state(tenant) == before
+
+    first = asyncio.run(main.run_crisis_automations_job(payload, "job-1"))
+    after = _state(tenant)
+    assert after["job_postings"] == before["job_postings"] + 1
+    assert after["automation_log"] == before["automation_log"] + 2
+    assert after["incidents"] == before["incidents"] + 1
+    assert after["compliance_score"] == before["compliance_score"] - 5
+
+    # A retry after success (e.g. the result write was lost) changes nothing
+    again = asyncio.run(main.run_crisis_automations_job(payload, "job-1"))
+    assert _state(tenant) == after
+    assert again["reply_job_id"] == first["reply_job_id"]
+
+
+def test_tenant_lock_is_free_while_automations_run(main, monkeypatch):
+    tenant = main.TENANTS.get("crisis_unlocked")
+    execute = main.execute_single_automation
+    locked = []
+
+    async def record_lock(tenant, name, crisis):
+        locked.append(tenant.lock.locked())
+        return await execute(tenant, name, crisis)
+
+    monkeypatch.setattr(main, "execute_single_automation", record_lock)
+    result = asyncio.run(main.run_crisis_automations_job({"tenant_id": tenant.tenant_id, "crisis": CRISIS}, "job-2"))
+
+    assert locked == [False, False]
+    assert result["automations_executed"] == 2
+
+
+def test_queue_runs_a_job_to_completion(main, tmp_path):
+    queue = main.JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+    @queue.handler("echo")
+    async def echo(payload, job_id):
+        return {"echo": payload["value"], "job_id": job_id}
+
+    async def run():
+        job_id = await queue.enqueue("echo", {"value": 7})
+        worker = asyncio.create_task(queue.worker(poll_interval=0.05))
+        for _ in range(100):
+            job = await queue.get(job_id)
+            if job["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.05)
+        worker.cancel()
+        return job_id, job
+
+    job_id, job = asyncio.run(run())
+    assert job["result"] == {"echo": 7, "job_id": job_id}
@@ -0,0 +1,33 @@
+"""
+Trainers in separate processes never register the same version number.
+"""
+import multiprocessing
+
+from services.model_registry import ModelRegistry
+
+
+def _register(args):
+    root, source = args
+    return ModelRegistry(root=root).register("lstm", {"model": source}, promote=False)
+
+
+def test_concurrent_processes_get_distinct_versions(tmp_path):
+    source = tmp_path / "model.bin"
+    source.write_bytes(b"\0" * 2 ** 24)  # Slow enough to copy that registrations overlap
+    root = str(tmp_path / "registry")
+
+    with multiprocessing.get_context("spawn").Pool(8) as pool:
+        versions = pool.map(_register, [(root, str(source))] * 16)
+
+    assert sorted(versions) == list(range(1, 17))
+    assert ModelRegistry(root=root).versions("lstm")[-1] == 16
+
+
+def test_unfinished_version_is_not_listed(tmp_path):
+    registry = ModelRegistry(root=str(tmp_path))
+    (tmp_path / "lstm" / "v1").mkdir(parents=True)  # Claimed, meta.json not written yet
+
+    assert registry.versions("lstm") == []
+    source = tmp_path / "model.bin"
+    source.write_bytes(b"weights")
+    assert registry.register("lstm", {"model": str(source)}) == 2
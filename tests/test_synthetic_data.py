@@ -0,0 +1,30 @@
+"""
+A failed synthetic data run publishes nothing and leaves no temporary files.
+"""
+import pytest
+
+from services.synthetic_data import SyntheticDataGenerator
+
+
+def _files(root):
+    return {str(p.relative_to(root)): p.read_bytes() for p in root.rglob("*") if p.is_file()}
+
+
+def test_failed_write_keeps_previous_output(tmp_path):
+    generator = SyntheticDataGenerator(stores=3, days=14, seed=1)
+    assert generator.write(str(tmp_path))["success"]
+    before = _files(tmp_path)
+
+    inventory_movements = generator.inventory_movements
+
+    def fail_on_last_store(store, usage):
+        if store == 2:
+            raise RuntimeError("disk full")
+        return inventory_movements(store, usage)
+
+    generator.inventory_movements = fail_on_last_store
+    generator.seed = 2  # Different data, so a published partial table would show
+    with pytest.raises(RuntimeError):
+        generator.write(str(tmp_path))
+
+    assert _files(tmp_path) == before
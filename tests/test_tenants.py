@@ -0,0 +1,50 @@
+"""
+Tenant eviction frees memory without losing a tenant's live state.
+"""
+
+
+def test_evicted_tenant_state_survives_reload(main, tmp_path):
+    registry = main.TenantRegistry(max_tenants=1, idle_seconds=3600, spill_dir=str(tmp_path))
+
+    tenant = registry.get("store_a")
+    order_id = next(tenant.order_ids)
+    tenant.add_order({"id": order_id, "total": 12.5})
+    tenant.inventory[0]["stock_level"] = 3
+    tenant.compliance["score"] = 80
+    tenant.order_idempotency.put("key-1", "fingerprint", {"order_id": order_id})
+
+    registry.get("store_b")  # Over capacity: store_a is evicted
+    assert "store_a" not in registry.tenants
+
+    reloaded = registry.get("store_a")
+    assert reloaded is not tenant
+    assert reloaded.orders == [{"id": order_id, "total": 12.5}]
+    assert reloaded.inventory[0]["stock_level"] == 3
+    assert reloaded.compliance["score"] == 80
+    assert reloaded.order_idempotency.get("key-1") == ("fingerprint", {"order_id": order_id})
+    assert next(reloaded.order_ids) > order_id
+    assert not reloaded.lock.locked()
+
+
+def test_default_tenant_is_never_evicted(main, tmp_path):
+    registry = main.TenantRegistry(max_tenants=1, idle_seconds=0, spill_dir=str(tmp_path))
+
+    default = registry.get(main.DEFAULT_TENANT_ID)
+    registry.get("store_a")
+    registry.get("store_b")
+
+    assert registry.tenants[main.DEFAULT_TENANT_ID] is default
+    assert "store_a" not in registry.tenants
+
+
+def test_pinned_tenant_is_not_evicted(main, tmp_path):
+    registry = main.TenantRegistry(max_tenants=1, idle_seconds=3600, spill_dir=str(tmp_path))
+
+    with registry.pinned("store_a") as tenant:
+        registry.get("store_b")  # Over capacity while store_a is still in use
+        assert registry.tenants["store_a"] is tenant
+        tenant.compliance["score"] = 70
+
+    registry.get("store_c")  # Released: store_a can go now
+    assert "store_a" not in registry.tenants
+    assert registry.get("store_a").compliance["score"] == 70